@@ -45,13 +45,21 @@ class sfp__stor_db(SpiderFootPlugin):
         if not self.opts['_store']:
             return
 
+        # once the event can be loaded back from the database, the event
+        # arena no longer has to keep it in memory
+        onStored = self.__stored if sfEvent.arena is not None else None
+
         if self.opts['maxstorage'] != 0:
-            if len(sfEvent.data) > self.opts['maxstorage']:
+            # data kept on disk knows its length, so it isn't read here
+            if len(sfEvent.blob or sfEvent.data) > self.opts['maxstorage']:
                 self.sf.debug("Storing an event: " + sfEvent.eventType)
-                self.__sfdb__.scanEventStore(self.getScanId(), sfEvent, self.opts['maxstorage'])
+                self.__sfdb__.scanEventStore(self.getScanId(), sfEvent, self.opts['maxstorage'], onStored)
                 return
 
         self.sf.debug("Storing an event: " + sfEvent.eventType)
-        self.__sfdb__.scanEventStore(self.getScanId(), sfEvent)
+        self.__sfdb__.scanEventStore(self.getScanId(), sfEvent, onStored=onStored)
+
+    def __stored(self, sfEvent):
+        sfEvent.arena.stored(sfEvent.hash)
 
 # End of sfp__stor_db class
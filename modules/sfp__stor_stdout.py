@@ -50,7 +50,10 @@ class sfp__stor_stdout(SpiderFootPlugin):
 
     def output(self, event):
         d = self.opts['_csvdelim']
-        if type(event.data) in [list, dict]:
+        if event.blob is not None and self.opts['_maxlength'] > 0:
+            # only read what is printed of data kept on disk
+            data = event.blob.read(self.opts['_maxlength'])
+        elif type(event.data) in [list, dict]:
             data = str(event.data)
         else:
             data = event.data
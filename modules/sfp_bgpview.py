@@ -11,7 +11,6 @@
 # -------------------------------------------------------------------------------
 
 import json
-import time
 
 from spiderfoot import SpiderFootEvent, SpiderFootPlugin
 
@@ -34,6 +33,9 @@ class sfp_bgpview(SpiderFootPlugin):
             'favIcon': "https://bgpview.io/favicon-32x32.png",
             'logo': "https://bgpview.io/assets/logo.png",
             'description': "BGPView是一个简单的API，允许用户查看关于互联网当前状态和结构的所有种类的分析数据",
+        },
+        'rateLimits': {
+            'api.bgpview.io': {'rate': 1}
         }
     }
 
@@ -65,8 +67,6 @@ class sfp_bgpview(SpiderFootPlugin):
                                useragent=self.opts['_useragent'],
                                timeout=self.opts['_fetchtimeout'])
 
-        time.sleep(1)
-
         if res['content'] is None:
             return None
 
@@ -93,8 +93,6 @@ class sfp_bgpview(SpiderFootPlugin):
                                useragent=self.opts['_useragent'],
                                timeout=self.opts['_fetchtimeout'])
 
-        time.sleep(1)
-
         if res['content'] is None:
             return None
 
@@ -121,8 +119,6 @@ class sfp_bgpview(SpiderFootPlugin):
                                useragent=self.opts['_useragent'],
                                timeout=self.opts['_fetchtimeout'])
 
-        time.sleep(1)
-
         if res['content'] is None:
             return None
 
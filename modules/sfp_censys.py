@@ -72,6 +72,12 @@ class sfp_censys(SpiderFootPlugin):
         for opt in list(userOpts.keys()):
             self.opts[opt] = userOpts[opt]
 
+    def rateLimits(self):
+        # API rate limit: 0.4 actions/second (120.0 per 5 minute interval)
+        if not self.opts['delay']:
+            return dict()
+        return {'censys.io': {'rate': 1 / self.opts['delay']}}
+
     def watchedEvents(self):
         return ["IP_ADDRESS", "INTERNET_NAME", "NETBLOCK_OWNER"]
 
@@ -101,9 +107,6 @@ class sfp_censys(SpiderFootPlugin):
             headers=headers
         )
 
-        # API rate limit: 0.4 actions/second (120.0 per 5 minute interval)
-        time.sleep(self.opts['delay'])
-
         return self.parseApiResponse(res)
 
     def queryHost(self, qry):
@@ -121,9 +124,6 @@ class sfp_censys(SpiderFootPlugin):
             headers=headers
         )
 
-        # API rate limit: 0.4 actions/second (120.0 per 5 minute interval)
-        time.sleep(self.opts['delay'])
-
         return self.parseApiResponse(res)
 
     def parseApiResponse(self, res):
@@ -62,26 +62,21 @@ class sfp_commoncrawl(SpiderFootPlugin):
         for opt in list(userOpts.keys()):
             self.opts[opt] = userOpts[opt]
 
-    def search(self, target):
-        ret = list()
-        for index in self.indexBase:
-            url = f"https://index.commoncrawl.org/{index}-index?url={target}/*&output=json"
-            res = self.sf.fetchUrl(url, timeout=60,
-                                   useragent="SpiderFoot")
-
-            if res['code'] in ["400", "401", "402", "403", "404"]:
-                self.sf.error("CommonCrawl search doesn't seem to be available.")
-                self.errorState = True
-                return None
+    def search(self, target, index):
+        url = f"https://index.commoncrawl.org/{index}-index?url={target}/*&output=json"
 
-            if not res['content']:
-                self.sf.error("CommonCrawl search doesn't seem to be available.")
-                self.errorState = True
-                return None
+        # Stream the results, which can be large
+        res = self.sf.fetchUrl(url, timeout=60,
+                               useragent="SpiderFoot", stream=True)
 
-            ret.append(res['content'])
+        if res['code'] in ["400", "401", "402", "403", "404"] or not res['content']:
+            if res['content']:
+                res['content'].close()
+            self.sf.error("CommonCrawl search doesn't seem to be available.")
+            self.errorState = True
+            return None
 
-        return ret
+        return res['content']
 
     def getLatestIndexes(self):
         url = "https://commoncrawl.s3.amazonaws.com/cc-index/collections/index.html"
@@ -154,36 +149,39 @@ class sfp_commoncrawl(SpiderFootPlugin):
             self.sf.error("Unable to fetch CommonCrawl index.")
             return None
 
-        data = self.search(eventData)
-        if not data:
-            self.sf.error("Unable to obtain content from CommonCrawl.")
-            return None
-
         sent = list()
-        for content in data:
-            try:
-                for line in content.split("\n"):
-                    if self.checkForStop():
-                        return None
-
-                    if len(line) < 2:
-                        continue
-                    link = json.loads(line)
-                    if 'url' not in link:
-                        continue
-
-                    # CommonCrawl sometimes returns hosts with a trailing . after the domain
-                    link['url'] = link['url'].replace(eventData + ".", eventData)
-
-                    if link['url'] in sent:
-                        continue
-                    sent.append(link['url'])
-
-                    evt = SpiderFootEvent("LINKED_URL", link['url'],
-                                          self.__name__, event)
-                    self.notifyListeners(evt)
-            except Exception as e:
-                self.sf.error("Malformed JSON from CommonCrawl.org: " + str(e))
-                return
+        # One index at a time, each stream read to the end and closed before
+        # the next is opened, as it holds a session until then
+        for index in self.indexBase:
+            content = self.search(eventData, index)
+            if not content:
+                self.sf.error("Unable to obtain content from CommonCrawl.")
+                return None
+
+            with content:
+                try:
+                    for line in content.lines():
+                        if self.checkForStop():
+                            return None
+
+                        if len(line) < 2:
+                            continue
+                        link = json.loads(line)
+                        if 'url' not in link:
+                            continue
+
+                        # CommonCrawl sometimes returns hosts with a trailing . after the domain
+                        link['url'] = link['url'].replace(eventData + ".", eventData)
+
+                        if link['url'] in sent:
+                            continue
+                        sent.append(link['url'])
+
+                        evt = SpiderFootEvent("LINKED_URL", link['url'],
+                                              self.__name__, event)
+                        self.notifyListeners(evt)
+                except Exception as e:
+                    self.sf.error("Malformed JSON from CommonCrawl.org: " + str(e))
+                    return None
 
 # End of sfp_commoncrawl class
@@ -37,6 +37,9 @@ class sfp_company(SpiderFootPlugin):
         'filterjscss': "过滤掉源自CSS/JS内容的公司名称。启用这个功能可以避免检测到流行的Javascript和网络框架作者的公司名称"
     }
 
+    # Content scanning is CPU bound, so keep it off the scan process's GIL
+    _isolated = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
 
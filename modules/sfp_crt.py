@@ -46,13 +46,12 @@ class sfp_crt(SpiderFootPlugin):
         'verify': '验证证书主题替代名称的解析'
     }
 
-    results = None
-    cert_ids = None
+    # Certificate lookups are I/O bound, so run several workers
+    _threadSafe = True
+    _maxThreads = 5
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
-        self.results = self.tempStorage()
-        self.cert_ids = self.tempStorage()
 
         for opt in list(userOpts.keys()):
             self.opts[opt] = userOpts[opt]
@@ -75,11 +74,9 @@ class sfp_crt(SpiderFootPlugin):
         srcModuleName = event.module
         eventData = event.data
 
-        if eventData in self.results:
+        if self.seen(eventData):
             return None
 
-        self.results[eventData] = True
-
         self.sf.debug(f"Received event, {eventName}, from {srcModuleName}")
 
         params = {
@@ -115,9 +112,8 @@ class sfp_crt(SpiderFootPlugin):
 
             if cert_id:
                 # Don't process the same cert twice
-                if cert_id in self.cert_ids:
+                if self.seen(str(cert_id), "cert_id"):
                     continue
-                self.cert_ids[cert_id] = True
 
             fetch_certs.append(cert_id)
 
@@ -133,44 +129,47 @@ class sfp_crt(SpiderFootPlugin):
         if self.opts['verify'] and len(domains) > 0:
             self.sf.info("Resolving " + str(len(set(domains))) + " domains ...")
 
-        for domain in set(domains):
-            if domain in self.results:
-                continue
+        hosts = self.sf.classifyHosts(set(domains), self.opts['_internettlds'], self.getTarget(),
+                                      includeParents=True, includeChildren=True)
 
-            if not self.sf.validHost(domain, self.opts['_internettlds']):
+        # Differently written names of the same host, such as with a
+        # trailing dot or in upper case, are reported once, normalized
+        names = set()
+        for host in hosts.values():
+            name = host['name']
+            if not host['valid'] or name in names or self.seen(name, add=False):
                 continue
+            names.add(name)
 
-            if self.getTarget().matches(domain, includeChildren=True, includeParents=True):
+            if host['matches']:
                 evt_type = 'INTERNET_NAME'
             else:
                 evt_type = 'AFFILIATE_INTERNET_NAME'
 
-            if self.opts['verify'] and not self.sf.resolveHost(domain):
-                self.sf.debug(f"Host {domain} could not be resolved")
+            if self.opts['verify'] and not self.sf.resolveHost(name):
+                self.sf.debug(f"Host {name} could not be resolved")
                 evt_type += '_UNRESOLVED'
 
-            evt = SpiderFootEvent(evt_type, domain, self.__name__, event)
+            evt = SpiderFootEvent(evt_type, name, self.__name__, event)
             self.notifyListeners(evt)
 
-            if self.sf.isDomain(domain, self.opts['_internettlds']):
+            if host['isDomain']:
                 if evt_type.startswith('AFFILIATE'):
-                    evt = SpiderFootEvent('AFFILIATE_DOMAIN_NAME', domain, self.__name__, event)
+                    evt = SpiderFootEvent('AFFILIATE_DOMAIN_NAME', name, self.__name__, event)
                     self.notifyListeners(evt)
                 else:
-                    evt = SpiderFootEvent('DOMAIN_NAME', domain, self.__name__, event)
+                    evt = SpiderFootEvent('DOMAIN_NAME', name, self.__name__, event)
                     self.notifyListeners(evt)
 
-        for cert_id in fetch_certs:
+        urls = ['https://crt.sh/?' + urllib.parse.urlencode({'d': str(cert_id)}) for cert_id in fetch_certs]
+
+        # Fetch the certificates concurrently, handling them in their original order
+        for i, res in self.sf.fetchUrls(urls, self.opts['_fetchconcurrency'], stop=self.checkForStop,
+                                         timeout=30, useragent=self.opts['_useragent']):
             if self.checkForStop():
                 return None
 
-            params = {
-                'd': str(cert_id)
-            }
-
-            res = self.sf.fetchUrl('https://crt.sh/?' + urllib.parse.urlencode(params),
-                                   timeout=30,
-                                   useragent=self.opts['_useragent'])
+            cert_id = fetch_certs[i]
 
             if res['content'] is None:
                 self.sf.info("Error retrieving certificate with ID " + str(cert_id))
@@ -40,13 +40,8 @@ class sfp_dnsraw(SpiderFootPlugin):
         'verify': "验证已确定的主机名是否解析"
     }
 
-    events = None
-    checked = None
-
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
-        self.events = self.tempStorage()
-        self.checked = self.tempStorage()
         self.__dataSource__ = "DNS"
 
         for opt in list(userOpts.keys()):
@@ -68,17 +63,14 @@ class sfp_dnsraw(SpiderFootPlugin):
         eventName = event.eventType
         srcModuleName = event.module
         eventData = event.data
-        eventDataHash = self.sf.hashstring(eventData)
         parentEvent = event
 
         self.sf.debug(f"Received event, {eventName}, from {srcModuleName}")
 
-        if eventDataHash in self.events:
+        if self.seen(eventData):
             self.sf.debug("Skipping duplicate event for " + eventData)
             return
 
-        self.events[eventDataHash] = True
-
         self.sf.debug("Gathering DNS records for " + eventData)
 
         domains = list()
@@ -114,11 +106,9 @@ class sfp_dnsraw(SpiderFootPlugin):
 
             # Iterate through DNS answers
             for x in res.answer:
-                if str(x) in self.checked:
+                if self.seen(str(x), "RAW_DNS_RECORDS"):
                     continue
 
-                self.checked[str(x)] = True
-
                 evt = SpiderFootEvent("RAW_DNS_RECORDS", str(x), self.__name__, parentEvent)
                 self.notifyListeners(evt)
 
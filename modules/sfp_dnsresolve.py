@@ -41,17 +41,12 @@ class sfp_dnsresolve(SpiderFootPlugin):
         'maxnetblock': "查询所有IP的最大子网块大小（CIDR值，24=/24，16=/16，等等）"
     }
 
-    events = None
-    domresults = None
-    hostresults = None
-    parentresults = None
+    # DNS lookups are I/O bound, so run several workers
+    _threadSafe = True
+    _maxThreads = 10
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
-        self.events = self.tempStorage()
-        self.domresults = self.tempStorage()
-        self.hostresults = self.tempStorage()
-        self.parentresults = self.tempStorage()
         self.__dataSource__ = "DNS"
 
         for opt in list(userOpts.keys()):
@@ -115,7 +110,6 @@ class sfp_dnsresolve(SpiderFootPlugin):
         eventName = event.eventType
         srcModuleName = event.module
         eventData = event.data
-        eventDataHash = self.sf.hashstring(eventData)
         addrs = None
         parentEvent = event
 
@@ -125,10 +119,9 @@ class sfp_dnsresolve(SpiderFootPlugin):
 
         self.sf.debug(f"Received event, {eventName}, from {srcModuleName}")
 
-        if eventDataHash in self.events:
+        if self.seen(eventData):
             self.sf.debug("Skipping duplicate event.")
             return
-        self.events[eventDataHash] = True
 
         # Simply translates these to their domains
         if eventName in ["CO_HOSTED_SITE", "AFFILIATE_INTERNET_NAME"]:
@@ -235,15 +228,11 @@ class sfp_dnsresolve(SpiderFootPlugin):
 
     # Process a host/IP, parentEvent is the event that represents this entity
     def processHost(self, host, parentEvent, affiliate=None):
-        parentHash = self.sf.hashstring(parentEvent.data)
-        if host not in self.hostresults:
-            self.hostresults[host] = [parentHash]
-        else:
-            if parentHash in self.hostresults[host] or parentEvent.data == host:
-                self.sf.debug("Skipping host, " + host + ", already processed.")
-                return None
-
-            self.hostresults[host] = self.hostresults[host] + [parentHash]
+        newHost = not self.seen(host, "host")
+        newParent = not self.seen((host, parentEvent.data), "host_parent")
+        if not newHost and (not newParent or parentEvent.data == host):
+            self.sf.debug("Skipping host, " + host + ", already processed.")
+            return None
 
         self.sf.debug("Found host: " + host)
         # If the returned hostname is aliaseed to our
@@ -304,15 +293,11 @@ class sfp_dnsresolve(SpiderFootPlugin):
             ip6s = self.sf.resolveHost6(host)
             if ip6s:
                 for ip6 in ip6s:
-                    parentHash = self.sf.hashstring(evt.data)
-                    if ip6 not in self.hostresults:
-                        self.hostresults[ip6] = [parentHash]
-                    else:
-                        if parentHash in self.hostresults[ip6] or evt.data == ip6:
-                            self.sf.debug("Skipping host, " + ip6 + ", already processed.")
-                            continue
-                        else:
-                            self.hostresults[ip6] = self.hostresults[ip6] + [parentHash]
+                    newHost = not self.seen(ip6, "host")
+                    newParent = not self.seen((ip6, evt.data), "host_parent")
+                    if not newHost and (not newParent or evt.data == ip6):
+                        self.sf.debug("Skipping host, " + ip6 + ", already processed.")
+                        continue
 
                     evt6 = SpiderFootEvent("IPV6_ADDRESS", ip6, self.__name__, evt)
                     self.notifyListeners(evt6)
@@ -328,12 +313,10 @@ class sfp_dnsresolve(SpiderFootPlugin):
         return evt
 
     def processDomain(self, domainName, parentEvent, affil=False, host=None):
-        if domainName in self.domresults:
+        if self.seen(domainName, "domain"):
             self.sf.debug(f"Skipping domain, {domainName}, already processed.")
             return None
 
-        self.domresults[domainName] = True
-
         if affil:
             domevt = SpiderFootEvent("AFFILIATE_DOMAIN_NAME", domainName,
                                      self.__name__, parentEvent)
@@ -344,21 +327,20 @@ class sfp_dnsresolve(SpiderFootPlugin):
             domevt = SpiderFootEvent("DOMAIN_NAME", domainName,
                                      self.__name__, parentEvent)
             self.notifyListeners(domevt)
-            if domainName not in self.parentresults:
-                domevt = SpiderFootEvent("DOMAIN_NAME_PARENT", domainName,
+            if self.seen(domainName, "DOMAIN_NAME_PARENT"):
+                return None
+            domevt = SpiderFootEvent("DOMAIN_NAME_PARENT", domainName,
                                      self.__name__, parentEvent)
-                self.parentresults[domevt.data] = True
-                self.notifyListeners(domevt)
+            self.notifyListeners(domevt)
         else:
             # Only makes sense to link this event with a source event
             # that sits on the parent domain.
             if not host:
                 return None
             if parentEvent.data.endswith("." + domainName):
-                if domainName not in self.parentresults:
+                if not self.seen(domainName, "DOMAIN_NAME_PARENT"):
                     domevt = SpiderFootEvent("DOMAIN_NAME_PARENT", domainName,
                                              self.__name__, parentEvent)
-                    self.parentresults[domevt.data] = True
                     self.notifyListeners(domevt)
                 domevt = SpiderFootEvent("DOMAIN_NAME_PARENT", domainName,
                                          self.__name__, parentEvent)
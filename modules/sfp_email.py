@@ -32,6 +32,9 @@ class sfp_email(SpiderFootPlugin):
     optdescs = {
     }
 
+    # Content scanning is CPU bound, so keep it off the scan process's GIL
+    _isolated = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
 
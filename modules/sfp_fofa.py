@@ -11,8 +11,6 @@
 import base64
 from spiderfoot import SpiderFootEvent, SpiderFootPlugin
 from lxml import etree
-import random
-import time
 
 
 class sfp_fofa(SpiderFootPlugin):
@@ -58,6 +56,10 @@ class sfp_fofa(SpiderFootPlugin):
         for opt in list(userOpts.keys()):
             self.opts[opt] = userOpts[opt]
 
+    # 每个事件发送1个请求：请求之间至少间隔1秒，被限速的请求再随机延时最多0.5秒（总共不超过maxdelay秒）
+    def rateLimits(self):
+        return {'fofa.so': {'rate': 1, 'jitter': min(0.5, max(0, self.opts['maxdelay'] - 1))}}
+
     def watchedEvents(self):
         return [
             # "DOMAIN_NAME",
@@ -126,7 +128,6 @@ class sfp_fofa(SpiderFootPlugin):
         self.results[eventData] = True
 
         qry = 'host="' + eventData + '"'
-        time.sleep(random.randint(1, self.opts['maxdelay']))
         html = self.query(qry)
 
         if html and isinstance(html, str):
@@ -175,14 +175,17 @@ class sfp_github(SpiderFootPlugin):
 
         if not failed:
             # For each user matching the username, get their repos
+            urls = list()
             for item in ret['items']:
                 if item.get('repos_url') is None:
                     self.sf.debug("Incomplete Github information found (repos_url).")
                     continue
+                urls.append(item['repos_url'])
 
-                url = item['repos_url']
-                res = self.sf.fetchUrl(url, timeout=self.opts['_fetchtimeout'],
-                                       useragent=self.opts['_useragent'])
+            for i, res in self.sf.fetchUrls(urls, self.opts['_fetchconcurrency'], stop=self.checkForStop,
+                                             timeout=self.opts['_fetchtimeout'],
+                                             useragent=self.opts['_useragent']):
+                url = urls[i]
 
                 if res['content'] is None:
                     self.sf.error(f"Unable to fetch {url}")
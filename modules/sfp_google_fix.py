@@ -85,9 +85,10 @@ class sfp_google_fix(SpiderFootPlugin):
 
         self.processQry(qry)
         res = []
-        for i in range(17):
-            url = f"https://www.google-fix.com/search?q=inurl:{qry}&&start={i}"
-            r = self.sf.fetchUrl(url, timeout=self.opts['_fetchtimeout'], useragent=self.opts['_useragent'])
+        urls = [f"https://www.google-fix.com/search?q=inurl:{qry}&&start={i}" for i in range(17)]
+        # 并发获取结果页，按页码顺序处理；遇到最后一页时停止，其余尚未开始的请求不再发送
+        for i, r in self.sf.fetchUrls(urls, self.opts['_fetchconcurrency'], stop=self.checkForStop,
+                                       timeout=self.opts['_fetchtimeout'], useragent=self.opts['_useragent']):
             if r['content'] is None:
                 self.sf.error("Received no content from Google Fix")
                 return res
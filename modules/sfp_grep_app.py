@@ -13,7 +13,6 @@
 
 import json
 import math
-import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -36,6 +35,9 @@ class sfp_grep_app(SpiderFootPlugin):
             'favIcon': "https://grep.app/favicon-16x16.png",
             'logo': "https://grep.app/apple-touch-icon.png",
             'description': "grep.app从GitHub上的50多万个公共存储库中搜索代码",
+        },
+        'rateLimits': {
+            'grep.app': {'rate': 1}
         }
     }
 
@@ -79,8 +81,6 @@ class sfp_grep_app(SpiderFootPlugin):
                                useragent=self.opts['_useragent'],
                                timeout=self.opts['_fetchtimeout'])
 
-        time.sleep(1)
-
         if res['content'] is None:
             return None
 
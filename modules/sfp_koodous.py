@@ -12,7 +12,6 @@
 
 import json
 import re
-import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -35,6 +34,9 @@ class sfp_koodous(SpiderFootPlugin):
             ],
             'website': "https://koodous.com/apks/",
             'logo': "https://koodous.com/assets/img/koodous-logo.png",
+        },
+        'rateLimits': {
+            'api.koodous.com': {'rate': 1}
         }
     }
 
@@ -80,8 +82,6 @@ class sfp_koodous(SpiderFootPlugin):
             timeout=self.opts['_fetchtimeout']
         )
 
-        time.sleep(1)
-
         if res['content'] is None:
             return None
 
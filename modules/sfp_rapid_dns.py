@@ -7,8 +7,7 @@
 # Licence:     GPL
 # -------------------------------------------------------------------------------
 
-import time
-import random
+from copy import copy
 from lxml import etree
 from netaddr import IPNetwork
 
@@ -50,19 +49,19 @@ class sfp_rapid_dns(SpiderFootPlugin):
         'maxdelay': "最大延时"
     }
 
-    # 跟踪结果可以帮助避免报告/处理重复的情况
-    results = None
-
     # 追踪模块的错误状态对于检测第三方的失败和你不希望再处理任何事件是很有用的
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
-        self.results = self.tempStorage()
 
         for opt in list(userOpts.keys()):
             self.opts[opt] = userOpts[opt]
 
+    # 每个事件发送1个请求，查询网段时每100个结果再多翻一页：最多连续发送5个请求，之后请求之间至少间隔0.5秒，被限速的请求再随机延时最多0.5秒（总共不超过maxdelay秒）
+    def rateLimits(self):
+        return {'rapiddns.io': {'rate': 2, 'burst': 5, 'jitter': min(0.5, max(0, self.opts['maxdelay'] - 1))}}
+
     # 这个模块对什么事件的输入感兴趣。关于所有事件的列表，请查看spiderfoot/db.py。
     def watchedEvents(self):
         return [
@@ -173,7 +172,7 @@ class sfp_rapid_dns(SpiderFootPlugin):
             if not self.judgeDomain(domains[i]):
                 continue
             data = domains[i] + " : " + addresses[i]
-            if data in self.results:
+            if self.seen(data, add=False):
                 self.sf.debug(f"Skipping {domains[i]}, already checked.")
                 continue
             if flag:
@@ -202,7 +201,7 @@ class sfp_rapid_dns(SpiderFootPlugin):
                     evt = SpiderFootEvent("AFFILIATE_DOMAIN_NAME", domains[i], self.__name__, event)
                     self.notifyListeners(evt)
             else:
-                if data in self.results:
+                if self.seen(data, add=False):
                     self.sf.debug(f"Skipping {domains[i]}, already checked.")
                     continue
                 if types[i] == 'A':
@@ -243,28 +242,24 @@ class sfp_rapid_dns(SpiderFootPlugin):
             return
 
         # 检查模块是否已经分析了该事件数据
-        if eventData in self.results:
+        # 记录事件数据，以防止重复查询
+        if self.seen(eventData):
             self.sf.debug(f"Skipping {eventData}, already checked.")
             return
 
-        # 将事件数据添加到结果字典中，以防止重复查询。如果eventData可能是大的东西，把键设置为值的哈希而不是值，以避免内存的滥用。
-        self.results[eventData] = True
-
-        time.sleep(random.randint(1, self.opts['maxdelay']))
-
         if eventName in ["IP_ADDRESS", "AFFILIATE_IPADDR"]:
             tmp = eventData.split('.')
             tmp = tmp[:-1]
             eventData = '.'.join(tmp)
             eventData += '.0/24'
+            # events are shared between modules, so only modify a copy
+            event = copy(event)
             event.data = eventData
 
-            if eventData in self.results:
+            if self.seen(eventData):
                 self.sf.debug(f"Skipping {eventData}, already checked.")
                 return
 
-            self.results[eventData] = True
-
         if eventName in ["DOMAIN_NAME_PARENT", "AFFILIATE_DOMAIN_NAME_PARENT"]:
             result = self.queryDomain(eventData)
             if isinstance(result, list):
@@ -11,7 +11,6 @@
 # -------------------------------------------------------------------------------
 
 import json
-import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -44,6 +43,9 @@ class sfp_shodan(SpiderFootPlugin):
             'favIcon': "https://static.shodan.io/shodan/img/favicon.png",
             'logo': "https://static.shodan.io/developer/img/logo.png",
             'description': "Shodan是世界上第一个互联网连接设备的搜索引擎,使用Shodan来发现你的哪些设备连接到了互联网，它们在哪里，谁在使用它们,追踪你的网络上所有可直接从互联网访问的计算机"
+        },
+        'rateLimits': {
+            'api.shodan.io': {'rate': 1}
         }
     }
 
@@ -87,7 +89,6 @@ class sfp_shodan(SpiderFootPlugin):
             timeout=self.opts['_fetchtimeout'],
             useragent="SpiderFoot"
         )
-        time.sleep(1)
 
         if res['content'] is None:
             self.sf.info(f"No SHODAN info found for {qry}")
@@ -116,7 +117,7 @@ class sfp_shodan(SpiderFootPlugin):
             timeout=self.opts['_fetchtimeout'],
             useragent="SpiderFoot"
         )
-        time.sleep(1)
+
         if res['content'] is None:
             self.sf.info(f"No SHODAN info found for {qry}")
             return None
@@ -144,7 +145,7 @@ class sfp_shodan(SpiderFootPlugin):
             timeout=self.opts['_fetchtimeout'],
             useragent="SpiderFoot"
         )
-        time.sleep(1)
+
         if res['content'] is None:
             self.sf.info(f"No SHODAN info found for {qry}")
             return None
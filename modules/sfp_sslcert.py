@@ -41,14 +41,12 @@ class sfp_sslcert(SpiderFootPlugin):
         "certexpiringdays": "证书过期后的天数，以便将其视为过期"
     }
 
-    # Be sure to completely clear any class variables in setup()
-    # or you run the risk of data persisting between scan runs.
-
-    results = None
+    # SSL connections are I/O bound, so run several workers
+    _threadSafe = True
+    _maxThreads = 10
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
-        self.results = self.tempStorage()
 
         # Clear / reset any other class member variables here
         # or you risk them persisting between threads.
@@ -96,9 +94,7 @@ class sfp_sslcert(SpiderFootPlugin):
             fqdn = eventData
             port = 443
 
-        if fqdn not in self.results:
-            self.results[fqdn] = True
-        else:
+        if self.seen(fqdn):
             return
 
         self.sf.debug("Testing SSL for: " + fqdn + ':' + str(port))
@@ -7,10 +7,7 @@
 # Licence:     GPL
 # -------------------------------------------------------------------------------
 
-import time
-import random
 import json
-import requests
 from netaddr import IPNetwork
 from spiderfoot import SpiderFootEvent, SpiderFootPlugin
 
@@ -60,6 +57,10 @@ class sfp_zoomeye(SpiderFootPlugin):
         for opt in list(userOpts.keys()):
             self.opts[opt] = userOpts[opt]
 
+    # 每个事件发送3个请求，每个匹配结果再发送3个详情请求：最多连续发送30个请求，之后每秒最多5个，被限速的请求再随机延时最多0.5秒（总共不超过maxdelay秒）
+    def rateLimits(self):
+        return {'www.zoomeye.org': {'rate': 5, 'burst': 30, 'jitter': min(0.5, max(0, self.opts['maxdelay'] - 1))}}
+
     def watchedEvents(self):
         return [
             "IP_ADDRESS",
@@ -165,7 +166,6 @@ class sfp_zoomeye(SpiderFootPlugin):
     def handleEvent(self, event):
         eventName = event.eventType
         eventData = event.data
-        s = requests.Session()
 
         # 一旦我们处于这种状态，立即返回.
         if self.errorState:
@@ -179,34 +179,34 @@ class sfp_zoomeye(SpiderFootPlugin):
         # 将事件数据添加到结果字典中，以防止重复查询。如果eventData可能是大的东西，把键设置为值的哈希而不是值，以避免内存的滥用。
         self.results[eventData] = True
 
-        # 延时操作
-        time.sleep(random.randint(1, self.opts['maxdelay']))
-
         res = None
         res1, res2, res3, res4 = list(), list(), list(), list()
-        if eventName in ['IP_ADDRESS', 'IPV6_ADDRESS']:
-            res = self.query(eventData, s, 'ip')
-
-        if eventName in ['DOMAIN_NAME_PARENT', 'DOMAIN_NAME', 'INTERNET_NAME']:
-            res = self.query(eventData, s, 'domain')
-
-        if eventName in ['NETBLOCK_OWNER', 'NETBLOCK_MEMBER']:
-            res = self.query(eventData, s, 'cidr')
-
-        if res and isinstance(res, dict):
-            res1 = res.get('matches')
-            if res1 and isinstance(res1, list):
-                if eventName in ['IP_ADDRESS', 'IPV6_ADDRESS']:
-                    t = self.queryDetial(res1[0].get('token'), s, res1[0].get('type'))  # 返回为dict对象
-                    if t and isinstance(t, list):
-                        res2, res3, res4 = t[0], t[1], t[2]
-                if eventName in ['DOMAIN_NAME_PARENT', 'DOMAIN_NAME', 'INTERNET_NAME', 'NETBLOCK_OWNER', 'NETBLOCK_MEMBER']:
-                    for i in res1:
-                        t = self.queryDetial(i.get('token'), s, i.get('type'))
+
+        # search_check 设置后续查询所需的cookie，因此同一事件的请求共用一个会话
+        with self.sf.httpSession("https://www.zoomeye.org/", self.opts['_fetchtimeout']) as s:
+            if eventName in ['IP_ADDRESS', 'IPV6_ADDRESS']:
+                res = self.query(eventData, s, 'ip')
+
+            if eventName in ['DOMAIN_NAME_PARENT', 'DOMAIN_NAME', 'INTERNET_NAME']:
+                res = self.query(eventData, s, 'domain')
+
+            if eventName in ['NETBLOCK_OWNER', 'NETBLOCK_MEMBER']:
+                res = self.query(eventData, s, 'cidr')
+
+            if res and isinstance(res, dict):
+                res1 = res.get('matches')
+                if res1 and isinstance(res1, list):
+                    if eventName in ['IP_ADDRESS', 'IPV6_ADDRESS']:
+                        t = self.queryDetial(res1[0].get('token'), s, res1[0].get('type'))  # 返回为dict对象
                         if t and isinstance(t, list):
-                            res2.append(t[0])
-                            res3.append(t[1])
-                            res4.append(t[2])
+                            res2, res3, res4 = t[0], t[1], t[2]
+                    if eventName in ['DOMAIN_NAME_PARENT', 'DOMAIN_NAME', 'INTERNET_NAME', 'NETBLOCK_OWNER', 'NETBLOCK_MEMBER']:
+                        for i in res1:
+                            t = self.queryDetial(i.get('token'), s, i.get('type'))
+                            if t and isinstance(t, list):
+                                res2.append(t[0])
+                                res3.append(t[1])
+                                res4.append(t[2])
 
         if res2:
             data = list()
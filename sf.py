@@ -13,7 +13,6 @@
 
 import argparse
 import logging
-import multiprocessing as mp
 import os
 import os.path
 import random
@@ -28,7 +27,7 @@ import cherrypy_cors
 from cherrypy.lib import auth_digest
 
 from sflib import SpiderFoot
-from sfscan import SpiderFootScanner
+from sfscan import startSpiderFootScanner
 from sfwebui import SpiderFootWebUi
 from spiderfoot import SpiderFootHelpers
 from spiderfoot import SpiderFootDb
@@ -85,6 +84,21 @@ def main():
         '_useragent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:62.0) Gecko/20100101 Firefox/62.0',  # User-Agent to use for HTTP requests
         '_dnsserver': '',  # Override the default resolver
         '_fetchtimeout': 5,  # number of seconds before giving up on a fetch
+        '_fetchconcurrency': 4,  # URLs fetched at a time by modules fetching a batch of URLs
+        '_asyncscan': False,  # Run modules on a single asyncio event loop instead of one thread each
+        '_maxqueuesize': 10000,  # Maximum number of events queued in memory for each module, 0 for no limit
+        '_queuefullpolicy': 'spill',  # What to do with events for a module whose queue is full: block, spill or drop
+        '_dedupebloom': 0,  # Keys the bloom filter of data seen by modules is sized for, 0 to store exact hashes
+        '_eventwindow': 50000,  # Number of recent events kept in memory, older ones are loaded back from the database; 0 for no limit
+        '_dbbatchsize': 500,  # Rows written to the database in a single transaction by the scan's writer thread, 0 to commit each row
+        '_httpmaxperhost': 8,  # Keep-alive HTTP sessions open at once for the same host, shared by all modules; 0 for a new connection per request
+        '_httpidletimeout': 60,  # Seconds after which an unused keep-alive HTTP session is closed
+        '_httpcache': 0,  # Hours HTTP responses are reused for, across scans; 0 to not cache them
+        '_httpcachemodules': '',  # Hours HTTP responses are reused for by module, overriding _httpcache, such as sfp_crt=24,sfp_shodan=0
+        '_httpcachesize': 500,  # Most MiB of HTTP responses kept in the cache, least recently used ones are removed first
+        '_logsample': 0,  # After this many identical log messages, only log one in this many more; 0 to log every message
+        '_blobthreshold': 65536,  # Length from which event data is kept on disk rather than in memory, 0 to never
+        '_eventpriority': True,  # Handle events about the target before low value events, instead of in order of arrival
         '_internettlds': 'https://publicsuffix.org/list/effective_tld_names.dat',
         '_internettlds_cache': 72,
         '_genericusers': "abuse,admin,billing,compliance,devnull,dns,ftp,hostmaster,inoc,ispfeedback,ispsupport,list-request,list,maildaemon,marketing,noc,no-reply,noreply,null,peering,peering-notify,peering-request,phish,phishing,postmaster,privacy,registrar,registry,root,routing-registry,rr,sales,security,spam,support,sysadmin,tech,undisclosed-recipients,unsubscribe,usenet,uucp,webmaster,www",
@@ -102,6 +116,21 @@ def main():
         '_useragent': r"用于HTTP请求的用户代理字符串。前缀为'@'，从包含每个请求的用户代理字符串的文件中随机选择用户代理，例如：@C:\useragents.txt或@/home/bob/useragents.txt。或者提供一个URL，从那里加载列表",
         '_dnsserver': "用另一个DNS服务器覆盖默认解析器。例如，8.8.8.8是谷歌的开放式DNS服务器",
         '_fetchtimeout': "放弃一个HTTP请求前的秒数",
+        '_fetchconcurrency': "模块批量获取多个URL（例如crt.sh证书、CommonCrawl索引、GitHub仓库列表）时同时进行的请求数，1表示逐个获取",
+        '_asyncscan': "在单个asyncio事件循环中运行所有模块，而不是每个模块一个线程。支持异步handleEvent()的模块可以同时处理大量请求",
+        '_maxqueuesize': "每个模块在内存中排队的最大事件数，0表示没有限制",
+        '_queuefullpolicy': "当模块的事件队列已满时如何处理新事件：'block'（等待模块处理）、'spill'（写入磁盘）或'drop'（丢弃并计数）",
+        '_dedupebloom': "模块记录已处理数据时使用布隆过滤器，并按此键数量预分配（节省内存，但有约0.1%的误判率），0表示存储精确哈希",
+        '_eventwindow': "在内存中保留的最近事件数，更早的事件在需要时从数据库重新加载，以便长时间扫描的内存占用保持平稳（需要将事件存储到数据库），0表示没有限制",
+        '_dbbatchsize': "扫描结果和日志由单独的写入线程批量写入数据库，每个事务最多写入的行数（最长等待250毫秒），0表示每行单独提交",
+        '_httpmaxperhost': "所有模块共享保持连接（keep-alive）的HTTP会话，避免每个请求都重新进行TCP和TLS握手；此为同一主机同时打开的最大会话数（超过时请求等待空闲会话），0表示每个请求使用新连接",
+        '_httpidletimeout': "未使用的保持连接HTTP会话在多少秒后关闭",
+        '_httpcache': "在多少小时内重复使用缓存的HTTP响应（跨扫描有效，适合每天重复扫描相同目标），0表示不缓存。过期的响应如有ETag或Last-Modified，会通过条件请求重新验证。只缓存GET和HEAD请求；使用不同API密钥或认证头的请求不共享缓存；服务器标记为no-store或private的响应，以及报告错误的JSON响应不会被缓存",
+        '_httpcachemodules': "按模块设置HTTP响应的缓存小时数，覆盖上面的全局设置，例如sfp_crt=24,sfp_shodan=0（0表示不缓存该模块的请求）",
+        '_httpcachesize': "HTTP响应缓存在磁盘上的最大大小（MiB，压缩后），超过时先删除最久未使用的响应",
+        '_logsample': "同一模块重复记录相同的日志消息达到此次数后，之后每此次数只记录一次（被省略的消息在扫描结束时计数），0表示记录每条消息。日志写入队列已满时，INFO/DEBUG日志会被丢弃并计数，ERROR和STATUS日志不会被丢弃",
+        '_blobthreshold': "事件数据达到此长度（字符数）时保存在磁盘上，事件只保留对数据的引用，在需要时才读取（例如RAW_RIR_DATA中完整的crt.sh响应），0表示始终保存在内存中",
+        '_eventpriority': "按优先级处理模块队列中的事件：与目标相关的事件（如目标的DOMAIN_NAME/INTERNET_NAME）优先，AFFILIATE_*和RAW_*等低价值事件最后，而不是按到达顺序处理",
         '_internettlds': "互联网顶级域名列表",
         '_internettlds_cache': "按小时来缓存互联网顶级域名列表。鉴于该列表并不经常变化，这可以安全地成为一个相当长的时间",
         '_genericusers': "如果发现作为用户名或电子邮件地址的一部分，应与非通用名区别对待的用户名列表",
@@ -422,9 +451,7 @@ def start_scan(sfConfig, sfModules, args):
     scanName = target
     scanId = SpiderFootHelpers.genScanInstanceId()
     try:
-        p = mp.Process(target=SpiderFootScanner, args=(scanName, scanId, target, targetType, modlist, cfg))
-        p.daemon = True
-        p.start()
+        p = startSpiderFootScanner(scanName, scanId, target, targetType, modlist, cfg)
     except BaseException as e:
         log.error(f"Scan [{scanId}] failed: {e}")
         sys.exit(-1)
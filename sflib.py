@@ -10,6 +10,9 @@
 # Licence:     GPL
 # -------------------------------------------------------------------------------
 
+import asyncio
+import contextlib
+import functools
 import hashlib
 import html
 import inspect
@@ -22,16 +25,21 @@ import re
 import socket
 import ssl
 import sys
+import tempfile
+import threading
 import time
 import traceback
 import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from copy import deepcopy
 from datetime import datetime
 
 import cryptography
+import dns.rdatatype
 import dns.resolver
+import dns.reversename
 import netaddr
 import phonenumbers
 import OpenSSL
@@ -40,6 +48,14 @@ import urllib3
 from bs4 import BeautifulSoup, SoupStrainer
 from publicsuffixlist import PublicSuffixList
 
+from spiderfoot import SpiderFootHttpStream, SpiderFootRateLimitedAdapter
+
+try:
+    from dns import asyncresolver
+except ImportError:
+    # dnspython < 2.0; async lookups fall back to running in a thread
+    asyncresolver = None
+
 # For hiding the SSL warnings coming from the requests lib
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)  # noqa: DUO131
 
@@ -51,15 +67,33 @@ class SpiderFoot:
         dbh (SpiderFootDb): database handle
         scanId (str): scan ID this instance of SpiderFoot is being used in
         socksProxy (str): SOCKS proxy
+        component (str): component messages are logged for, if bound
+        sessionPool (SpiderFootSessionPool): pool of keep-alive HTTP sessions, if any
+        httpCache (SpiderFootHttpCache): persistent cache of HTTP responses, if any
         opts (dict): configuration options
     """
 
     _dbh = None
     _scanId = None
     _socksProxy = None
+    _sessionPool = None
+    _httpCache = None
+    _component = None
+    _asyncResolver = None
     opts = dict()
     log = logging.getLogger(__name__)
 
+    # compiled public suffix lists, shared by all instances, keyed by the
+    # TLD list's content and accept_unknown
+    _suffixLists = dict()
+    # TLD lists seen, keyed by id() and accept_unknown, each held along
+    # with its compiled list so that the id can't be reused
+    _suffixListsById = dict()
+    _suffixListsLock = threading.Lock()
+
+    # query parameters holding credentials, masked in logs
+    urlCredParams = ('key', 'pass', 'user', 'password')
+
     def __init__(self, options):
         """Initialize SpiderFoot object.
 
@@ -110,6 +144,33 @@ class SpiderFoot:
         """
         return self._socksProxy
 
+    @property
+    def sessionPool(self):
+        """Pool of keep-alive HTTP sessions used by fetchUrl()
+
+        Returns:
+            SpiderFootSessionPool: session pool, or None for a new session per request
+        """
+        return self._sessionPool
+
+    @property
+    def httpCache(self):
+        """Persistent cache of HTTP responses used by fetchUrl()
+
+        Returns:
+            SpiderFootHttpCache: HTTP cache, or None to always send requests
+        """
+        return self._httpCache
+
+    @property
+    def component(self):
+        """Component messages are logged for
+
+        Returns:
+            str: component name, or None to use the calling Python module
+        """
+        return self._component
+
     @dbh.setter
     def dbh(self, dbh):
         """Called usually some time after instantiation
@@ -143,6 +204,40 @@ class SpiderFoot:
         """
         self._socksProxy = socksProxy
 
+    @sessionPool.setter
+    def sessionPool(self, sessionPool):
+        """Set the pool of keep-alive HTTP sessions used by fetchUrl(). The
+        scanner sets one up for the duration of the scan, which copies of
+        this object made for modules share.
+
+        Args:
+            sessionPool (SpiderFootSessionPool): session pool, or None for a new session per request
+        """
+        self._sessionPool = sessionPool
+
+    @httpCache.setter
+    def httpCache(self, httpCache):
+        """Set the persistent cache of HTTP responses used by fetchUrl().
+        Like the session pool, the scanner sets one up, which copies of
+        this object made for modules share.
+
+        Args:
+            httpCache (SpiderFootHttpCache): HTTP cache, or None to always send requests
+        """
+        self._httpCache = httpCache
+
+    @component.setter
+    def component(self, component):
+        """Bind the component messages are logged for, so that info() and
+        debug() don't need to look up the caller on every call. Modules
+        bind their own copy of the SpiderFoot object (see
+        SpiderFootPlugin._setupWorkers()).
+
+        Args:
+            component (str): component name, or None to use the calling Python module
+        """
+        self._component = component
+
     def optValueToData(self, val):
         """Supplied an option value, return the data based on what the
         value is. If val is a URL, you'll get back the fetched content,
@@ -205,6 +300,26 @@ class SpiderFoot:
 
         return self.dbh.scanLogEvent(self.scanId, level, message, component)
 
+    def _logComponent(self):
+        """Component a message is logged for: the bound component if any,
+        and otherwise the Python module which called info() or debug(),
+        skipping calls from within sflib itself (e.g. fetchUrl()).
+
+        Returns:
+            str: component name
+        """
+        if self._component is not None:
+            return self._component
+
+        frame = sys._getframe(2)
+        while frame is not None and frame.f_globals.get('__name__') == __name__:
+            frame = frame.f_back
+
+        if frame is None:
+            return "Unknown"
+
+        return frame.f_globals.get('__name__', "Unknown")
+
     def error(self, message):
         """Print and log an error message
 
@@ -261,21 +376,7 @@ class SpiderFoot:
         if not self.opts['__logging']:
             return
 
-        frm = inspect.stack()[1]
-        mod = inspect.getmodule(frm[0])
-
-        if mod is None:
-            modName = "Unknown"
-        else:
-            if mod.__name__ == "sflib":
-                frm = inspect.stack()[2]
-                mod = inspect.getmodule(frm[0])
-                if mod is None:
-                    modName = "Unknown"
-                else:
-                    modName = mod.__name__
-            else:
-                modName = mod.__name__
+        modName = self._logComponent()
 
         if self.dbh:
             self._dblog("INFO", message, modName)
@@ -293,21 +394,8 @@ class SpiderFoot:
             return
         if not self.opts['__logging']:
             return
-        frm = inspect.stack()[1]
-        mod = inspect.getmodule(frm[0])
 
-        if mod is None:
-            modName = "Unknown"
-        else:
-            if mod.__name__ == "sflib":
-                frm = inspect.stack()[2]
-                mod = inspect.getmodule(frm[0])
-                if mod is None:
-                    modName = "Unknown"
-                else:
-                    modName = mod.__name__
-            else:
-                modName = mod.__name__
+        modName = self._logComponent()
 
         if self.dbh:
             self._dblog("DEBUG", message, modName)
@@ -373,18 +461,30 @@ class SpiderFoot:
 
         pathLabel = hashlib.sha224(label.encode('utf-8')).hexdigest()
         cacheFile = self.cachePath() + "/" + pathLabel
-        with io.open(cacheFile, "w", encoding="utf-8", errors="ignore") as fp:
-            if isinstance(data, list):
-                for line in data:
-                    if isinstance(line, str):
-                        fp.write(line)
-                        fp.write("\n")
-                    else:
-                        fp.write(line.decode('utf-8') + '\n')
-            elif isinstance(data, bytes):
-                fp.write(data.decode('utf-8'))
-            else:
-                fp.write(data)
+
+        # written in full before it replaces the cached data, as other
+        # scans may be reading it
+        fd, tmpFile = tempfile.mkstemp(dir=self.cachePath(), prefix=f".{pathLabel}-")
+        try:
+            with io.open(fd, "w", encoding="utf-8", errors="ignore") as fp:
+                if isinstance(data, list):
+                    for line in data:
+                        if isinstance(line, str):
+                            fp.write(line)
+                            fp.write("\n")
+                        else:
+                            fp.write(line.decode('utf-8') + '\n')
+                elif isinstance(data, bytes):
+                    fp.write(data.decode('utf-8'))
+                else:
+                    fp.write(data)
+            os.replace(tmpFile, cacheFile)
+        except BaseException:
+            try:
+                os.unlink(tmpFile)
+            except OSError:
+                pass
+            raise
 
     def cacheGet(self, label, timeoutHrs):
         """Retreive data from the cache
@@ -869,6 +969,97 @@ class SpiderFoot:
         self.debug("Keywords: %s" % keywords)
         return set([k for k in keywords if k])
 
+    def publicSuffixList(self, tldList, acceptUnknown=True):
+        """Compiled public suffix list for a TLD list.
+
+        Compiling the list takes far longer than a lookup, so each TLD list
+        is only compiled once per process, and the result is shared by all
+        threads and SpiderFoot instances. Copies of the same TLD list, such
+        as those in each module's options, share one compiled list. The
+        rules compiled from the latest TLD list are also kept in the cache
+        (see suffixRules()), sparing other processes the work.
+
+        Args:
+            tldList (str): The list of TLDs based on the Mozilla public list,
+                as a string or a list of lines.
+            acceptUnknown (bool): Treat unknown TLDs as public suffixes.
+
+        Returns:
+            PublicSuffixList: compiled public suffix list (ICANN section only)
+        """
+        entry = self._suffixListsById.get((id(tldList), acceptUnknown))
+        if entry is not None and entry[0] is tldList:
+            return entry[1]
+
+        with self._suffixListsLock:
+            if isinstance(tldList, str):
+                lines = tldList.splitlines()
+            else:
+                lines = list(tldList)
+
+            content = "\n".join(lines).encode('utf-8', 'surrogatepass')
+            digest = hashlib.sha256(content).hexdigest()
+            ps = self._suffixLists.get((digest, acceptUnknown))
+            if ps is None:
+                rules = self.suffixRules(lines, digest)
+                # the rules are already normalized and include their IDNA
+                # encoded form
+                ps = PublicSuffixList(rules, accept_unknown=acceptUnknown, accept_encoded_idn=False)
+                self._suffixLists[(digest, acceptUnknown)] = ps
+
+            if len(self._suffixListsById) >= 64:
+                self._suffixListsById.clear()
+            self._suffixListsById[(id(tldList), acceptUnknown)] = (tldList, ps)
+
+        return ps
+
+    def suffixRules(self, lines, digest):
+        """Public suffix rules of the ICANN section of a TLD list, lower case
+        and along with their IDNA encoded form, as PublicSuffixList parses
+        them. The rules of the latest TLD list are kept in the cache, under
+        the digest of the list they were compiled from.
+
+        Args:
+            lines (list): The list of TLDs based on the Mozilla public list, as lines.
+            digest (str): SHA-256 digest of the TLD list.
+
+        Returns:
+            list: sorted public suffix rules
+        """
+        cached = self.cacheGet("internet_tlds_rules", 0)
+        if cached and cached.startswith(f"// {digest}\n"):
+            return cached.splitlines()[1:]
+
+        rules = set()
+        icann = False
+        for line in lines:
+            line = line.rstrip()
+            if line == "// ===BEGIN ICANN DOMAINS===":
+                icann = True
+                continue
+            if line == "// ===END ICANN DOMAINS===":
+                icann = False
+                continue
+            if not icann:
+                continue
+
+            rule = line.lower().split(" ")[0]
+            if not rule or rule.startswith("//"):
+                continue
+
+            rules.add(rule)
+            encoded = rule.lstrip("!").encode("idna").decode("ascii")
+            rules.add("!" + encoded if rule.startswith("!") else encoded)
+
+        rules = sorted(rules)
+
+        try:
+            self.cachePut("internet_tlds_rules", [f"// {digest}"] + rules)
+        except OSError as e:
+            self.log.debug(f"Unable to cache public suffix rules: {e}")
+
+        return rules
+
     def hostDomain(self, hostname, tldList):
         """Obtain the domain name for a supplied hostname.
 
@@ -885,7 +1076,7 @@ class SpiderFoot:
         if not hostname:
             return None
 
-        ps = PublicSuffixList(tldList, only_icann=True)
+        ps = self.publicSuffixList(tldList)
         return ps.privatesuffix(hostname)
 
     def validHost(self, hostname, tldList):
@@ -910,7 +1101,7 @@ class SpiderFoot:
         if not re.match(r"^[a-z0-9-\.]*$", hostname, re.IGNORECASE):
             return False
 
-        ps = PublicSuffixList(tldList, only_icann=True, accept_unknown=False)
+        ps = self.publicSuffixList(tldList, acceptUnknown=False)
         sfx = ps.privatesuffix(hostname)
         return sfx is not None
 
@@ -935,10 +1126,114 @@ class SpiderFoot:
         if not hostname:
             return False
 
-        ps = PublicSuffixList(tldList, only_icann=True, accept_unknown=False)
+        ps = self.publicSuffixList(tldList, acceptUnknown=False)
         sfx = ps.privatesuffix(hostname)
         return sfx == hostname
 
+    def classifyHosts(self, hostnames, tldList, target=None, includeParents=False, includeChildren=True):
+        """Classify a batch of hostnames in one pass, as validHost(),
+        hostDomain(), isDomain() and SpiderFootTarget.matches() would one
+        at a time.
+
+        Hostnames are normalized first: surrounding whitespace and a
+        trailing dot are removed, the name is lower cased and
+        internationalized names are IDNA encoded. Each distinct name is
+        classified once, and the target's names are indexed once for the
+        whole batch.
+
+        Args:
+            hostnames (list): hostnames to classify
+            tldList (str): The list of TLDs based on the Mozilla public list.
+            target (SpiderFootTarget): target to match the hostnames against, if any
+            includeParents (bool): a parent domain of the target matches it
+            includeChildren (bool): a child of the target matches it
+
+        Returns:
+            dict: for each hostname, a dict of the normalized 'name', whether
+                it is a 'valid' hostname with a known public suffix, its
+                registrable 'domain' (or None) as hostDomain() finds it, so
+                also under an unknown TLD, whether it 'isDomain' itself, and
+                whether it 'matches' the target (False without a target)
+        """
+        results = dict()
+
+        if not hostnames:
+            return results
+
+        # validHost() and isDomain() only know the listed TLDs, while
+        # hostDomain() treats unknown TLDs as public suffixes
+        psKnown = self.publicSuffixList(tldList, acceptUnknown=False) if tldList else None
+        psAny = self.publicSuffixList(tldList) if tldList else None
+        validName = re.compile(r"[a-z0-9-\.]*")
+
+        # the target's names, and the domains they are children of, so that
+        # matching a name takes a few set lookups instead of a scan
+        names = set()
+        parents = set()
+        matchAll = False
+        if target is not None:
+            matchAll = target.targetType in ["HUMAN_NAME", "PHONE_NUMBER", "USERNAME", "BITCOIN_ADDRESS"]
+            for name in target.getNames():
+                names.add(name)
+                labels = name.split(".")
+                for i in range(1, len(labels)):
+                    parents.add(".".join(labels[i:]))
+
+        classified = dict()
+        for hostname in hostnames:
+            if hostname in results:
+                continue
+
+            if isinstance(hostname, bytes):
+                name = hostname.decode("utf-8", errors="replace")
+            elif isinstance(hostname, str):
+                name = hostname
+            else:
+                continue
+
+            name = name.strip().rstrip(".").lower()
+            if not name.isascii():
+                try:
+                    name = name.encode("idna").decode("ascii")
+                except UnicodeError:
+                    pass
+
+            result = classified.get(name)
+            if result is None:
+                known = domain = None
+                if psKnown is not None and name:
+                    known = psKnown.privatesuffix(name)
+                    # both lists agree on the names under a listed TLD
+                    domain = known if known is not None else psAny.privatesuffix(name)
+
+                matched = False
+                if target is not None and name:
+                    if matchAll:
+                        matched = True
+                    elif (name[-1].isdigit() or ":" in name) and (netaddr.valid_ipv4(name) or netaddr.valid_ipv6(name)):
+                        matched = target.matches(name, includeParents=includeParents, includeChildren=includeChildren)
+                    elif name in names:
+                        matched = True
+                    elif includeParents and name in parents:
+                        matched = True
+                    elif includeChildren:
+                        dot = name.find(".")
+                        while dot >= 0 and not matched:
+                            matched = name[dot + 1:] in names
+                            dot = name.find(".", dot + 1)
+
+                result = classified[name] = {
+                    'name': name,
+                    'valid': known is not None and "." in name and validName.fullmatch(name) is not None,
+                    'domain': domain,
+                    'isDomain': known is not None and known == name,
+                    'matches': matched
+                }
+
+            results[hostname] = result
+
+        return results
+
     def validIP(self, address):
         """Check if the provided string is a valid IPv4 address.
 
@@ -2153,7 +2448,7 @@ class SpiderFoot:
         return re.sub('[\x80-\xFF]', lambda c: '%%%02x' % ord(c.group(0)), url)
 
     def getSession(self):
-        session = requests.session()
+        session = SpiderFootRateLimitedAdapter.mount(requests.session())
         if self.socksProxy:
             session.proxies = {
                 'http': self.socksProxy,
@@ -2161,6 +2456,146 @@ class SpiderFoot:
             }
         return session
 
+    def _request(self, method, url, timeout=None, sizeLimit=None, **kwargs):
+        """Send an HTTP request, on a pooled keep-alive session if a session
+        pool is set, or else on a new session. GET and HEAD requests are
+        answered from the HTTP cache, if one is set and the calling module
+        has its requests cached, unless their body is streamed.
+
+        With a size limit, the body is read as it is downloaded, and no
+        more than sizeLimit bytes of it are. A streamed body is left to the
+        caller, and the session is only given back once the response is
+        closed, or its body read to the end through a SpiderFootHttpStream.
+
+        Args:
+            method (str): HTTP method
+            url (str): URL
+            timeout (int): timeout
+            sizeLimit (int): most bytes of the body read, unless streamed
+            kwargs: other arguments of requests.Session.request()
+
+        Returns:
+            requests.Response: response, with its content read unless
+                streamed; the content is None if the body was larger than
+                sizeLimit
+        """
+        # as requests.Session.head()
+        if method == 'HEAD':
+            kwargs.setdefault('allow_redirects', False)
+
+        if kwargs.pop('stream', False):
+            return self._streamRequest(method, url, timeout, stream=True, **kwargs)
+
+        def send(extraHeaders=None):
+            if extraHeaders:
+                kwargs['headers'] = dict(kwargs.get('headers') or dict(), **extraHeaders)
+            # a throttled request waits before taking a session, not with it
+            with SpiderFootRateLimitedAdapter.admit(url), self.httpSession(url, timeout) as session:
+                if not sizeLimit:
+                    return session.request(method, url, timeout=timeout, **kwargs)
+
+                res = session.request(method, url, timeout=timeout, stream=True, **kwargs)
+                content = None
+                if int(res.headers.get('content-length', 0) or 0) <= sizeLimit:
+                    # Sometimes content exceeds the size limit after decompression
+                    with SpiderFootHttpStream(res, sizeLimit) as body:
+                        content = body.read()
+                    if body.exceeded:
+                        content = None
+                res.close()
+                res._content = content
+                res._content_consumed = True
+                return res
+
+        # responses cut short at the size limit aren't stored
+        if self._httpCache is None or method not in self._httpCache.cacheableMethods:
+            return send()
+
+        ttl = self._httpCache.ttlFor(self._component)
+        if not ttl:
+            return send()
+
+        key = self._httpCache.key(
+            method,
+            url,
+            kwargs.get('data'),
+            kwargs.get('headers'),
+            kwargs.get('cookies')
+        )
+
+        return self._httpCache.fetch(key, ttl, url, send)
+
+    def _streamRequest(self, method, url, timeout=None, **kwargs):
+        """Send an HTTP request whose body is left to the caller, keeping
+        the session until the response is closed, so that no other request
+        is sent on its connection in the meantime.
+
+        Args:
+            method (str): HTTP method
+            url (str): URL
+            timeout (int): timeout
+            kwargs: other arguments of requests.Session.request()
+
+        Returns:
+            requests.Response: response, with its body not read yet
+        """
+        with SpiderFootRateLimitedAdapter.admit(url):
+            session, release = self._takeSession(url, timeout)
+            try:
+                res = session.request(method, url, timeout=timeout, **kwargs)
+            except BaseException:
+                release()
+                raise
+
+        closeResponse = res.close
+        released = threading.Lock()
+
+        def close():
+            closeResponse()
+            # closed by the caller and by SpiderFootHttpStream alike
+            if released.acquire(blocking=False):
+                release()
+
+        res.close = close
+        return res
+
+    def _takeSession(self, url, timeout=None):
+        """Session for requests to a host, from the session pool if any.
+
+        Args:
+            url (str): URL of the host requests are sent to
+            timeout (int): seconds to wait for a pooled session
+
+        Returns:
+            tuple: requests.Session, and the function giving it back
+        """
+        if self._sessionPool is None:
+            session = self.getSession()
+            return session, session.close
+
+        session = self._sessionPool.acquire(url, self.socksProxy, timeout)
+        return session, lambda: self._sessionPool.release(session)
+
+    @contextlib.contextmanager
+    def httpSession(self, url, timeout=None):
+        """HTTP session for a series of requests to the same host which
+        share cookies, such as a login followed by queries. The session is
+        taken from the session pool, if any, and given back (with its
+        cookies cleared) when the block exits.
+
+        Args:
+            url (str): URL of the host requests are sent to
+            timeout (int): seconds to wait for a pooled session
+
+        Yields:
+            requests.Session: session, using the SOCKS proxy if one is set
+        """
+        session, release = self._takeSession(url, timeout)
+        try:
+            yield session
+        finally:
+            release()
+
     def removeUrlCreds(self, url):
         """Remove key= and others from URLs to avoid credentials in logs.
 
@@ -2171,12 +2606,7 @@ class SpiderFoot:
             str: URL
         """
 
-        pats = {
-            r'key=\S+': "key=XXX",
-            r'pass=\S+': "pass=XXX",
-            r'user=\S+': "user=XXX",
-            r'password=\S+': "password=XXX"
-        }
+        pats = {rf'{param}=\S+': f"{param}=XXX" for param in self.urlCredParams}
 
         ret = url
         for pat in pats:
@@ -2247,10 +2677,16 @@ class SpiderFoot:
         dontMangle=False,
         sizeLimit=None,
         headOnly=False,
-        verify=True
+        verify=True,
+        stream=False
     ):
         """Fetch a URL, return the response object.
 
+        With a size limit, the body is read as it is downloaded, and no
+        more than sizeLimit bytes of it are, so there is no need to check
+        its size with a HEAD request first. Bodies read in full within the
+        limit are cached as any other.
+
         Args:
             url (str): URL to fetch
             fatal (bool): raise an exception upon request error
@@ -2264,6 +2700,11 @@ class SpiderFoot:
             sizeLimit (int): size threshold
             headOnly (bool): use HTTP HEAD method
             verify (bool): use HTTPS SSL/TLS verification
+            stream (bool): leave the body to the caller, as a
+                SpiderFootHttpStream in 'content' (read up to sizeLimit
+                bytes, if set), rather than reading it in full. The caller
+                closes the stream, or reads it to the end, to give back the
+                connection. Streamed responses are not cached.
 
         Returns:
             dict: HTTP response
@@ -2319,12 +2760,13 @@ class SpiderFoot:
         request_log.append(f"timeout={timeout}")
         request_log.append(f"cookies={cookies}")
 
-        if sizeLimit or headOnly:
+        if headOnly:
             if not noLog:
                 self.info(f"Fetching (HEAD): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
 
             try:
-                hdr = self.getSession().head(
+                hdr = self._request(
+                    'HEAD',
                     url,
                     headers=header,
                     proxies=proxies,
@@ -2341,7 +2783,6 @@ class SpiderFoot:
 
                 return result
 
-            size = int(hdr.headers.get('content-length', 0))
             newloc = hdr.headers.get('location', url).strip()
 
             # Relative re-direct
@@ -2350,46 +2791,14 @@ class SpiderFoot:
             result['realurl'] = newloc
             result['code'] = str(hdr.status_code)
 
-            if headOnly:
-                return result
-
-            if size > sizeLimit:
-                return result
-
-            if result['realurl'] != url:
-                if not noLog:
-                    self.info(f"Fetching (HEAD): {self.removeUrlCreds(result['realurl'])} ({', '.join(request_log)})")
-
-                try:
-                    hdr = self.getSession().head(
-                        result['realurl'],
-                        headers=header,
-                        proxies=proxies,
-                        verify=verify,
-                        timeout=timeout
-                    )
-                    size = int(hdr.headers.get('content-length', 0))
-                    result['realurl'] = hdr.headers.get('location', result['realurl'])
-                    result['code'] = str(hdr.status_code)
-
-                    if size > sizeLimit:
-                        return result
-
-                except Exception as e:
-                    if not noLog:
-                        self.error(f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {result['realurl']}")
-                        self.error(traceback.format_exc())
-
-                    if fatal:
-                        self.fatal(f"URL could not be fetched ({e})")
-
-                    return result
+            return result
 
         try:
             if postData:
                 if not noLog:
                     self.info(f"Fetching (POST): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
-                res = self.getSession().post(
+                res = self._request(
+                    'POST',
                     url,
                     data=postData,
                     headers=header,
@@ -2397,19 +2806,24 @@ class SpiderFoot:
                     allow_redirects=True,
                     cookies=cookies,
                     timeout=timeout,
-                    verify=verify
+                    verify=verify,
+                    sizeLimit=sizeLimit,
+                    stream=stream
                 )
             else:
                 if not noLog:
                     self.info(f"Fetching (GET): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
-                res = self.getSession().get(
+                res = self._request(
+                    'GET',
                     url,
                     headers=header,
                     proxies=proxies,
                     allow_redirects=True,
                     cookies=cookies,
                     timeout=timeout,
-                    verify=verify
+                    verify=verify,
+                    sizeLimit=sizeLimit,
+                    stream=stream
                 )
         except requests.exceptions.RequestException:
             self.error(f"Failed to connect to {url}")
@@ -2430,8 +2844,8 @@ class SpiderFoot:
             for header, value in res.headers.items():
                 result['headers'][str(header).lower()] = str(value)
 
-            # Sometimes content exceeds the size limit after decompression
-            if sizeLimit and len(res.content) > sizeLimit:
+            if sizeLimit and int(result['headers'].get('content-length', 0) or 0) > sizeLimit:
+                res.close()
                 self.debug(f"Content exceeded size limit ({sizeLimit}), so returning no data just headers")
                 result['realurl'] = res.url
                 result['code'] = str(res.status_code)
@@ -2439,6 +2853,7 @@ class SpiderFoot:
 
             refresh_header = result['headers'].get('refresh')
             if refresh_header:
+                res.close()
                 try:
                     newurl = refresh_header.split(";url=")[1]
                 except Exception as e:
@@ -2458,31 +2873,49 @@ class SpiderFoot:
                     postData,
                     dontMangle,
                     sizeLimit,
-                    headOnly
+                    headOnly,
+                    stream=stream
                 )
 
             result['realurl'] = res.url
             result['code'] = str(res.status_code)
+
+            if stream:
+                if fatal:
+                    try:
+                        res.raise_for_status()
+                    except requests.exceptions.HTTPError:
+                        res.close()
+                        self.fatal(f"URL could not be fetched ({res.status_code})")
+
+                result['content'] = SpiderFootHttpStream(res, sizeLimit)
+                self.info(f"Fetched {self.removeUrlCreds(url)} (streaming)")
+                return result
+
+            # a cached response may have been fetched without a size limit
+            content = res.content
+            if content is None or (sizeLimit and len(content) > sizeLimit):
+                self.debug(f"Content exceeded size limit ({sizeLimit}), so returning no data just headers")
+                return result
+
             if dontMangle:
-                result['content'] = res.content
+                result['content'] = content
             else:
-                for encoding in ("utf-8", "ascii"):
-                    try:
-                        result["content"] = res.content.decode(encoding)
-                    except UnicodeDecodeError:
-                        pass
-                    else:
-                        break
-                else:
-                    result["content"] = res.content
+                # ASCII is a subset of UTF-8, so there is no other encoding to try
+                try:
+                    result["content"] = content.decode("utf-8")
+                except UnicodeDecodeError:
+                    result["content"] = content
 
             if fatal:
                 try:
                     res.raise_for_status()
                 except requests.exceptions.HTTPError:
-                    self.fatal(f"URL could not be fetched ({res.status_code}) / {res.content})")
+                    self.fatal(f"URL could not be fetched ({res.status_code}) / {content})")
 
         except Exception as e:
+            # gives back the session of a streamed response
+            res.close()
             self.error(f"Unexpected exception ({e}) occurred parsing response for URL: {url}")
             self.error(traceback.format_exc())
 
@@ -2497,6 +2930,245 @@ class SpiderFoot:
         self.info(f"Fetched {self.removeUrlCreds(url)} ({len(result['content'] or '')} bytes in {t}s)")
         return result
 
+    def fetchUrls(self, urls, concurrency=4, ordered=True, stop=None, **kwargs):
+        """Fetch a batch of URLs concurrently, each as fetchUrl() would.
+
+        Requests go through fetchUrl(), so they use the same session pool,
+        per-host limits and proxy settings. At most concurrency URLs are
+        fetched at a time, and a URL is only fetched once there is room for
+        it, so that fetching can be stopped early: no more URLs are fetched
+        once stop() returns True, or once the caller stops iterating (for
+        example with break). Fetches already under way are let finish and
+        their responses discarded.
+
+        Args:
+            urls (list): URLs to fetch, each a URL or a dict of fetchUrl()
+                arguments with the URL in 'url'
+            concurrency (int): most URLs fetched at a time
+            ordered (bool): yield responses in the order of urls, rather than
+                as they are fetched
+            stop (function): called without arguments before each URL is
+                fetched, such as SpiderFootPlugin.checkForStop
+            kwargs: fetchUrl() arguments common to all the URLs
+
+        Returns:
+            generator: (index in urls, HTTP response) tuples
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(concurrency, int):
+            raise TypeError(f"concurrency is {type(concurrency)}; expected int()")
+        if concurrency < 1:
+            raise ValueError(f"concurrency value is {concurrency}; expected 1 or more")
+        if stop is not None and not callable(stop):
+            raise TypeError(f"stop is {type(stop)}; expected function()")
+
+        fetches = list()
+        for url in urls:
+            if isinstance(url, dict):
+                args = dict(kwargs)
+                args.update(url)
+                url = args.pop('url', None)
+            else:
+                args = kwargs
+            fetches.append((url, args))
+
+        return self._fetchUrls(fetches, concurrency, ordered, stop)
+
+    def _fetchUrls(self, fetches, concurrency, ordered, stop):
+        """Generator behind fetchUrls().
+
+        Args:
+            fetches (list): (URL, fetchUrl() arguments) tuples
+            concurrency (int): most URLs fetched at a time
+            ordered (bool): yield responses in the order of fetches
+            stop (function): called before each URL is fetched
+
+        Yields:
+            tuple: index in fetches, and HTTP response
+        """
+        if not fetches:
+            return
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(concurrency, len(fetches)),
+            thread_name_prefix="SpiderFootFetch"
+        )
+        pending = dict()
+        fetched = dict()
+        nextFetch = 0
+        nextYield = 0
+
+        try:
+            while True:
+                while nextFetch < len(fetches) and len(pending) < concurrency:
+                    if stop is not None and stop():
+                        # nothing past what is under way will be fetched
+                        fetches = fetches[:nextFetch]
+                        break
+                    url, args = fetches[nextFetch]
+                    pending[executor.submit(self.fetchUrl, url, **args)] = nextFetch
+                    nextFetch += 1
+
+                if not pending:
+                    return
+
+                done, notDone = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    if ordered:
+                        fetched[index] = future.result()
+                    else:
+                        yield index, future.result()
+
+                while nextYield in fetched:
+                    yield nextYield, fetched.pop(nextYield)
+                    nextYield += 1
+        finally:
+            # requests not started yet are dropped if the caller stops early
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    async def fetchUrlAsync(self, url, **kwargs):
+        """Fetch a URL without blocking the event loop, for modules with a
+        coroutine handleEvent().
+
+        requests has no asyncio interface, so the fetch is run in the event
+        loop's thread pool.
+
+        Args:
+            url (str): URL to fetch
+            kwargs: fetchUrl() arguments
+
+        Returns:
+            dict: HTTP response
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.fetchUrl, url, **kwargs))
+
+    def _getAsyncResolver(self):
+        """Asynchronous DNS resolver, honouring the _dnsserver option.
+
+        Returns:
+            dns.asyncresolver.Resolver: resolver, or None if dnspython has no asyncio support
+        """
+        if asyncresolver is None:
+            return None
+
+        if self._asyncResolver is None:
+            res = asyncresolver.Resolver()
+            if self.opts.get('_dnsserver', "") != "":
+                res.nameservers = [self.opts['_dnsserver']]
+            self._asyncResolver = res
+
+        return self._asyncResolver
+
+    async def resolveHostAsync(self, host):
+        """Async version of resolveHost().
+
+        Args:
+            host (str): host to resolve
+
+        Returns:
+            list: IP addresses
+        """
+
+        if not host:
+            self.error(f"Unable to resolve host: {host} (Invalid host)")
+            return list()
+
+        if self._getAsyncResolver() is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.resolveHost, host)
+
+        try:
+            answer = await self._getAsyncResolver().resolve(host, 'A', search=False)
+            # Like gethostbyname_ex(), include the canonical name and
+            # the aliases (CNAMEs) followed along the way.
+            res = [answer.canonical_name]
+            for rrset in answer.response.answer:
+                if rrset.rdtype == dns.rdatatype.CNAME:
+                    res.append(rrset.name)
+            res.append([rdata.address for rdata in answer])
+            addrs = self.normalizeDNS(res)
+        except Exception as e:
+            self.debug(f"Unable to resolve host: {host} ({e})")
+            return list()
+
+        if not addrs:
+            self.debug(f"Unable to resolve host: {host}")
+            return list()
+
+        self.debug(f"Resolved {host} to: {addrs}")
+
+        return list(set(addrs))
+
+    async def resolveHost6Async(self, hostname):
+        """Async version of resolveHost6().
+
+        Args:
+            hostname (str): hostname to resolve
+
+        Returns:
+            list: IPv6 addresses
+        """
+
+        if not hostname:
+            self.error(f"Unable to resolve {hostname} (Invalid hostname)")
+            return list()
+
+        if self._getAsyncResolver() is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.resolveHost6, hostname)
+
+        try:
+            answer = await self._getAsyncResolver().resolve(hostname, 'AAAA', search=False)
+            addrs = [rdata.address for rdata in answer]
+        except Exception as e:
+            self.debug(f"Unable to IPv6 resolve {hostname} ({e})")
+            return list()
+
+        if addrs:
+            self.debug(f"Resolved {hostname} to IPv6: {addrs}")
+
+        return list(set(addrs))
+
+    async def resolveIPAsync(self, ipaddr):
+        """Async version of resolveIP().
+
+        Args:
+            ipaddr (str): IP address to reverse resolve
+
+        Returns:
+            list: list of domain names
+        """
+
+        if not self.validIP(ipaddr) and not self.validIP6(ipaddr):
+            self.error(f"Unable to reverse resolve {ipaddr} (Invalid IP address)")
+            return list()
+
+        if self._getAsyncResolver() is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.resolveIP, ipaddr)
+
+        self.debug(f"Performing reverse resolve of {ipaddr}")
+
+        try:
+            answer = await self._getAsyncResolver().resolve(dns.reversename.from_address(ipaddr), 'PTR')
+            # Like gethostbyaddr(), include the address itself
+            addrs = self.normalizeDNS([[rdata.target for rdata in answer], ipaddr])
+        except Exception as e:
+            self.debug(f"Unable to reverse resolve IP address: {ipaddr} ({e})")
+            return list()
+
+        if not addrs:
+            self.debug(f"Unable to reverse resolve IP address: {ipaddr}")
+            return list()
+
+        self.debug(f"Reverse resolved {ipaddr} to: {addrs}")
+
+        return list(set(addrs))
+
     def checkDnsWildcard(self, target):
         """Check if wildcard DNS is enabled by looking up a random hostname
 
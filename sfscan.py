@@ -9,19 +9,67 @@
 # Copyright:    (c) Steve Micallef 2013
 # License:      GPL
 # -----------------------------------------------------------------
+import asyncio
+import atexit
+import multiprocessing as mp
+import os
 import socket
 import sys
+import threading
 import time
 import queue
 import traceback
-from time import sleep
 from copy import deepcopy
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import dns.resolver
+import publicsuffixlist
 
 from sflib import SpiderFoot
-from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootPlugin, SpiderFootTarget, SpiderFootHelpers
+from spiderfoot import SpiderFootAsyncEventQueue, SpiderFootAsyncModuleQueue, SpiderFootBlobStore, SpiderFootDb, SpiderFootDbWriter, SpiderFootDedupe, SpiderFootEventArena, SpiderFootEventQueue, SpiderFootEvent, SpiderFootHttpCache, SpiderFootPlugin, SpiderFootRateLimiter, SpiderFootSessionPool, SpiderFootTarget, SpiderFootHelpers
+
+
+def startSpiderFootScanner(scanName, scanId, targetValue, targetType, moduleList, globalOpts):
+    """Start a scan in a new process.
+
+    The scan process isn't daemonic, as isolated modules run in worker
+    processes of its own, which daemonic processes can't have. Rather, it
+    is terminated when the process which started it exits, as a daemonic
+    process would be, and its worker processes exit along with it.
+
+    Args:
+        scanName (str): name of the scan
+        scanId (str): unique ID of the scan
+        targetValue (str): scan target
+        targetType (str): scan target type
+        moduleList (list): list of modules to run
+        globalOpts (dict): scan options
+
+    Returns:
+        multiprocessing.Process: scan process
+    """
+    p = mp.Process(target=SpiderFootScanner, args=(scanName, scanId, targetValue, targetType, moduleList, globalOpts),
+                   name=f"SpiderFoot scan {scanId}")
+    p.start()
+
+    # registered after multiprocessing's own exit handler, so that it runs
+    # first, as the latter waits for processes which aren't daemonic
+    atexit.register(stopSpiderFootScanner, p)
+    return p
+
+
+def stopSpiderFootScanner(p, timeout=5):
+    """Terminate a scan process started with startSpiderFootScanner(), if
+    it is still running.
+
+    Args:
+        p (multiprocessing.Process): scan process
+        timeout (int): seconds to wait for it to exit
+    """
+    if p.is_alive():
+        p.terminate()
+        p.join(timeout)
 
 
 class SpiderFootScanner():
@@ -42,8 +90,28 @@ class SpiderFootScanner():
     __moduleList = list()
     __target = None
     __moduleInstances = dict()
+    __eventRouting = dict()
+    __wildcardModules = list()
+    __routedModules = list()
     __modconfig = dict()
     __scanName = None
+    __loop = None
+    __maxQueueSize = 0
+    __queuePolicy = "block"
+    __dedupe = None
+    __eventWindow = 0
+    __arena = None
+    __blobThreshold = 0
+    __blobStore = None
+    __dbBatchSize = 0
+    __logSample = 0
+    __dbWriter = None
+    __httpMaxPerHost = 0
+    __httpIdleTimeout = 0
+    __sessionPool = None
+    __httpCache = None
+    # Seconds between queue status log messages and abort request checks
+    __statusInterval = 5
 
     def __init__(self, scanName, scanId, targetValue, targetType, moduleList, globalOpts, start=True):
         """Initialize SpiderFootScanner object.
@@ -181,6 +249,101 @@ class SpiderFootScanner():
         else:
             self.__sf.socksProxy = None
 
+        # Check the module event queue limits
+        try:
+            self.__maxQueueSize = int(self.__config.get('_maxqueuesize', 0) or 0)
+        except ValueError:
+            self.__maxQueueSize = -1
+
+        if self.__maxQueueSize < 0:
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid queue size: {self.__config.get('_maxqueuesize')}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid queue size: {self.__config.get('_maxqueuesize')}")
+
+        self.__queuePolicy = self.__config.get('_queuefullpolicy') or "block"
+
+        if self.__queuePolicy not in SpiderFootEventQueue.policies:
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid queue policy: {self.__queuePolicy}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid queue policy: {self.__queuePolicy}")
+
+        # Check the number of recent events kept in memory
+        try:
+            self.__eventWindow = int(self.__config.get('_eventwindow', 0) or 0)
+        except ValueError:
+            self.__eventWindow = -1
+
+        if self.__eventWindow < 0:
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid event window: {self.__config.get('_eventwindow')}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid event window: {self.__config.get('_eventwindow')}")
+
+        # Check the length from which event data is kept on disk
+        try:
+            self.__blobThreshold = int(self.__config.get('_blobthreshold', 0) or 0)
+        except ValueError:
+            self.__blobThreshold = -1
+
+        if self.__blobThreshold < 0:
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid blob threshold: {self.__config.get('_blobthreshold')}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid blob threshold: {self.__config.get('_blobthreshold')}")
+
+        # Check the number of rows written to the database at once
+        try:
+            self.__dbBatchSize = int(self.__config.get('_dbbatchsize', 0) or 0)
+        except ValueError:
+            self.__dbBatchSize = -1
+
+        if self.__dbBatchSize < 0:
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid database batch size: {self.__config.get('_dbbatchsize')}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid database batch size: {self.__config.get('_dbbatchsize')}")
+
+        # Check how often repeated log messages are logged
+        try:
+            self.__logSample = int(self.__config.get('_logsample', 0) or 0)
+        except ValueError:
+            self.__logSample = -1
+
+        if self.__logSample < 0:
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid log sampling: {self.__config.get('_logsample')}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid log sampling: {self.__config.get('_logsample')}")
+
+        # Check the limits of the pool of keep-alive HTTP sessions
+        try:
+            self.__httpMaxPerHost = int(self.__config.get('_httpmaxperhost', 0) or 0)
+            self.__httpIdleTimeout = float(self.__config.get('_httpidletimeout', 60) or 0)
+        except ValueError:
+            self.__httpMaxPerHost = -1
+
+        if self.__httpMaxPerHost < 0 or (self.__httpMaxPerHost and self.__httpIdleTimeout <= 0):
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid HTTP session pool limits: {self.__config.get('_httpmaxperhost')}, {self.__config.get('_httpidletimeout')}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid HTTP session pool limits: {self.__config.get('_httpmaxperhost')}, {self.__config.get('_httpidletimeout')}")
+
+        # Check how long HTTP responses are cached for
+        try:
+            self.__httpCacheTtl = float(self.__config.get('_httpcache', 0) or 0)
+            self.__httpCacheModules = SpiderFootHttpCache.parseTtls(self.__config.get('_httpcachemodules', ''))
+            self.__httpCacheSize = int(self.__config.get('_httpcachesize', 500) or 0)
+        except ValueError:
+            self.__httpCacheTtl = -1
+
+        if self.__httpCacheTtl < 0 or self.__httpCacheSize < 1:
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid HTTP cache settings: {self.__config.get('_httpcache')}, {self.__config.get('_httpcachemodules')}, {self.__config.get('_httpcachesize')}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid HTTP cache settings: {self.__config.get('_httpcache')}, {self.__config.get('_httpcachemodules')}, {self.__config.get('_httpcachesize')}")
+
+        # Set up the record of data already seen by modules
+        try:
+            self.__dedupe = SpiderFootDedupe(int(self.__config.get('_dedupebloom', 0) or 0))
+        except (TypeError, ValueError):
+            self.__sf.status(f"Scan [{self.__scanId}] failed: Invalid bloom filter capacity: {self.__config.get('_dedupebloom')}")
+            self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+            raise ValueError(f"Invalid bloom filter capacity: {self.__config.get('_dedupebloom')}")
+
         # Override the default DNS server
         if self.__config['_dnsserver']:
             res = dns.resolver.Resolver()
@@ -193,14 +356,7 @@ class SpiderFootScanner():
         self.__config['_useragent'] = self.__sf.optValueToData(self.__config['_useragent'])
 
         # Get internet TLDs
-        tlddata = self.__sf.cacheGet("internet_tlds", self.__config['_internettlds_cache'])
-
-        # If it wasn't loadable from cache, load it from scratch
-        if tlddata is None:
-            self.__config['_internettlds'] = self.__sf.optValueToData(self.__config['_internettlds'])
-            self.__sf.cachePut("internet_tlds", self.__config['_internettlds'])
-        else:
-            self.__config["_internettlds"] = tlddata.splitlines()
+        self.__config['_internettlds'] = self.__loadInternetTlds(self.__config['_internettlds'])
 
         self.__setStatus("INITIALIZING", time.time() * 1000, None)
 
@@ -249,6 +405,67 @@ class SpiderFootScanner():
         self.__status = status
         self.__dbh.scanInstanceSet(self.__scanId, started, ended, status)
 
+    def __loadInternetTlds(self, source):
+        """Load the internet TLD list, from the cache if it is recent enough.
+
+        Downloading the list doesn't hold up the scan: a stale copy from the
+        cache, or else the snapshot bundled with publicsuffixlist, is used
+        while the cache is refreshed in the background, for later scans.
+
+        The list is kept as a single string, which module options share
+        rather than copy.
+
+        Args:
+            source (str): TLD list option value: URL, @file or the list itself
+
+        Returns:
+            str: TLD list
+        """
+        tlddata = self.__sf.cacheGet("internet_tlds", self.__config['_internettlds_cache'])
+        if tlddata is not None:
+            return tlddata
+
+        if not source.lower().startswith(('http://', 'https://')):
+            tlddata = self.__sf.optValueToData(source)
+            if tlddata:
+                self.__sf.cachePut("internet_tlds", tlddata)
+            return tlddata
+
+        tlddata = self.__sf.cacheGet("internet_tlds", 0)
+        if tlddata is None:
+            try:
+                with open(publicsuffixlist.PSLFILE, "r", encoding="utf-8") as f:
+                    tlddata = f.read()
+            except (AttributeError, OSError):
+                tlddata = None
+
+        # nothing to fall back on
+        if tlddata is None:
+            tlddata = self.__sf.optValueToData(source)
+            if tlddata:
+                self.__sf.cachePut("internet_tlds", tlddata)
+            return tlddata
+
+        threading.Thread(target=self.__refreshInternetTlds, args=(source,), name="SpiderFootTldRefresh", daemon=True).start()
+
+        return tlddata
+
+    def __refreshInternetTlds(self, source):
+        """Download the internet TLD list and replace the cached copy.
+
+        Args:
+            source (str): TLD list URL
+        """
+        tlddata = self.__sf.optValueToData(source)
+        if not tlddata or "// ===BEGIN ICANN DOMAINS===" not in tlddata:
+            self.__sf.error(f"Unable to refresh the internet TLD list from {source}; using the previous copy")
+            return
+
+        try:
+            self.__sf.cachePut("internet_tlds", tlddata)
+        except OSError as e:
+            self.__sf.error(f"Unable to cache the internet TLD list: {e}")
+
     def __startScan(self, threaded=True):
         """Start running a scan.
 
@@ -260,10 +477,44 @@ class SpiderFootScanner():
         self.__setStatus("STARTING", time.time() * 1000, None)
         self.__sf.status(f"Scan [{self.__scanId}] initiated.")
 
-        if threaded:
-            self.eventQueue = queue.Queue()
+        # Run the modules on a single event loop rather than in threads
+        asyncScan = threaded and bool(self.__config.get('_asyncscan', False))
+
+        if asyncScan:
+            self.__loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.__loop)
+            self.eventQueue = SpiderFootAsyncEventQueue(self.__loop)
+        elif threaded:
+            # Module threads must never block when producing events, as the
+            # dispatcher may itself be blocked waiting for room in their
+            # queue, so only the module queues are bounded.
+            self.eventQueue = SpiderFootEventQueue()
 
         try:
+            # Results and logs are written by a thread of their own, in batches
+            if self.__dbBatchSize:
+                self.__dbWriter = SpiderFootDbWriter(self.__config, self.__dbBatchSize, logSample=self.__logSample)
+                self.__dbh.setWriter(self.__dbWriter)
+
+            # HTTP connections are kept open and reused by every module
+            if self.__httpMaxPerHost:
+                self.__sessionPool = SpiderFootSessionPool(self.__httpMaxPerHost, self.__httpIdleTimeout)
+                self.__sf.sessionPool = self.__sessionPool
+
+            # HTTP responses are kept on disk and reused by later scans
+            if self.__httpCacheTtl or any(self.__httpCacheModules.values()):
+                self.__httpCache = SpiderFootHttpCache(
+                    os.path.join(self.__sf.cachePath(), "http"),
+                    self.__httpCacheTtl,
+                    self.__httpCacheSize * 1024 * 1024,
+                    self.__httpCacheModules
+                )
+                self.__sf.httpCache = self.__httpCache
+
+            # Large event data is kept on disk for the duration of the scan
+            if self.__blobThreshold:
+                self.__blobStore = SpiderFootBlobStore(self.__blobThreshold)
+
             # moduleList = list of modules the user wants to run
             for modName in self.__moduleList:
                 if modName == '':
@@ -290,8 +541,19 @@ class SpiderFootScanner():
 
                 mod.clearListeners()  # clear any listener relationships from the past
                 mod.setup(self.__sf, self.__modconfig[modName])
+
+                # Limit the rate of requests to the APIs the module queries
+                for host, limits in mod.rateLimits().items():
+                    try:
+                        SpiderFootRateLimiter.forHost(host, **limits)
+                    except (TypeError, ValueError) as e:
+                        self.__sf.error(f"Invalid rate limit for {host} in {modName}: {e}")
+
                 mod.setDbh(self.__dbh)
                 mod.setScanId(self.__scanId)
+                mod.setDedupe(self.__dedupe)
+                if self.__blobStore is not None:
+                    mod.setBlobStore(self.__blobStore)
 
                 # Give modules a chance to 'enrich' the original target with
                 # aliases of that target.
@@ -315,13 +577,22 @@ class SpiderFootScanner():
                 if threaded:
                     # Set up the outgoing event queue
                     mod.outgoingEventQueue = self.eventQueue
-                    mod.incomingEventQueue = queue.Queue()
+                    # isolated modules are fed by a thread, even in async mode
+                    priority = mod.eventPriority if self.__config.get('_eventpriority') else None
+                    if asyncScan and not mod._isolated:
+                        mod.incomingEventQueue = SpiderFootAsyncModuleQueue(self.__maxQueueSize, self.__queuePolicy, priority)
+                    else:
+                        mod.incomingEventQueue = SpiderFootEventQueue(self.__maxQueueSize, self.__queuePolicy, priority)
 
                 self.__sf.status(modName + " module loaded.")
 
             # sort modules by priority
             self.__moduleInstances = OrderedDict(sorted(self.__moduleInstances.items(), key=lambda m: m[-1]._priority))
 
+            if threaded:
+                self.__buildEventRouting()
+                self.__setUpArena()
+
             if not threaded:
                 # Register listener modules and then start all modules sequentially
                 for module in list(self.__moduleInstances.values()):
@@ -345,9 +616,11 @@ class SpiderFootScanner():
             psMod.setTarget(self.__target)
             psMod.setDbh(self.__dbh)
             psMod.clearListeners()
+            if self.__blobStore is not None:
+                psMod.setBlobStore(self.__blobStore)
             if threaded:
                 psMod.outgoingEventQueue = self.eventQueue
-                psMod.incomingEventQueue = queue.Queue()
+                psMod.incomingEventQueue = asyncio.Queue() if asyncScan else queue.Queue()
             else:
                 for mod in list(self.__moduleInstances.values()):
                     if mod.watchedEvents() is not None:
@@ -380,9 +653,36 @@ class SpiderFootScanner():
                     break
 
             # start threads
-            if threaded and not aborted:
+            if asyncScan and not aborted:
+                self.__loop.run_until_complete(self.waitForTasks())
+            elif threaded and not aborted:
                 self.waitForThreads()
 
+            # the scan's results are all in the database before it is
+            # shown as finished
+            if self.__dbWriter is not None:
+                # worker processes write their own logs
+                for mod in self.__moduleInstances.values():
+                    if mod._isolated:
+                        mod._isolatedReceiver.join(self.__statusInterval)
+                self.__dbWriter.flush()
+                stats = self.dbWriterStats()
+                self.__sf.info(f"Database writes: {stats['rows']:,} rows in {stats['commits']:,} transactions")
+                if stats['failed']:
+                    self.__sf.error(f"{stats['failed']:,} rows could not be written to the database")
+                if stats['dropped'] or stats['sampled']:
+                    self.__sf.info(f"Log lines not written: {stats['dropped']:,} dropped as the writer was behind, {stats['sampled']:,} repeated messages sampled out")
+
+            if self.__sessionPool is not None:
+                stats = self.__sessionPool.stats()
+                if stats['created']:
+                    self.__sf.info(f"HTTP sessions: {stats['created']:,} opened, reused {stats['reused']:,} times")
+
+            if self.__httpCache is not None:
+                stats = self.__httpCache.stats()
+                if stats['hits'] or stats['revalidated'] or stats['misses']:
+                    self.__sf.info(f"HTTP cache: {stats['hits']:,} responses reused, {stats['revalidated']:,} revalidated, {stats['misses']:,} requests sent, {stats['bytes'] / 1024 / 1024:,.1f} MiB on disk")
+
             if aborted:
                 self.__sf.status(f"Scan [{self.__scanId}] aborted.")
                 self.__setStatus("ABORTED", None, time.time() * 1000)
@@ -396,88 +696,480 @@ class SpiderFootScanner():
                             + repr(traceback.format_exception(exc_type, exc_value, exc_traceback)))
             self.__sf.status(f"Scan [{self.__scanId}] failed: {e}")
             self.__setStatus("ERROR-FAILED", None, time.time() * 1000)
+        finally:
+            if self.__loop is not None:
+                asyncio.set_event_loop(None)
+                self.__loop.close()
+            if self.__blobStore is not None:
+                self.__blobStore.close()
+            if self.__sessionPool is not None:
+                self.__sf.sessionPool = None
+                self.__sessionPool.close()
+            if self.__dbWriter is not None:
+                self.__dbWriter.close()
 
         self.__dbh.close()
 
     def waitForThreads(self):
-        counter = 0
+        """Start a thread for each module and dispatch events from the shared
+        event queue to the modules watching them until the scan completes.
 
-        try:
-            if not self.eventQueue:
-                return
+        The dispatcher blocks on the event queue rather than polling it. Modules
+        put None on the event queue when they go idle, which wakes the dispatcher
+        to check whether every module has finished. Once the scan is complete
+        (or aborted) each module is sent the shutdown sentinel (None).
+        """
+        if not self.eventQueue:
+            return
+
+        completed = False
 
-            # start one thread for each module
+        try:
+            # start the worker thread(s) for each module
             for mod in self.__moduleInstances.values():
                 mod.start()
+                if mod._isolated:
+                    self.__sf.debug(f"Started worker process for {mod.__name__}")
+                elif len(mod.threads) > 1:
+                    self.__sf.debug(f"Started {len(mod.threads)} threads for {mod.__name__}")
+
+            lastStatus = time.time()
 
             # watch for newly-generated events
             while True:
-
-                # log status of threads every 100 iterations
-                log_status = counter % 100 == 0
-                counter += 1
-
                 try:
-                    sfEvent = self.eventQueue.get_nowait()
-                    self.__sf.debug(f"waitForThreads() got event, {sfEvent.eventType}, from eventQueue.")
+                    sfEvent = self.eventQueue.get(timeout=self.__statusInterval)
                 except queue.Empty:
-                    # check if we're finished
+                    sfEvent = None
+
+                # log status of threads and check for abort requests periodically
+                log_status = time.time() - lastStatus >= self.__statusInterval
+                if log_status:
+                    lastStatus = time.time()
+                    if self.__abortRequested():
+                        raise AssertionError("abort requested")
+
+                    for mod in self.__moduleInstances.values():
+                        if mod._stopScanning:
+                            raise AssertionError(f"{mod.__name__} requested stop")
+
+                    # stop routing events to modules which have failed
+                    if any(mod.errorState for mod in self.__routedModules):
+                        self.__buildEventRouting()
+
+                # None is a wakeup from a module which has just gone idle
+                if sfEvent is None:
                     if self.threadsFinished(log_status):
-                        sleep(.1)
-                        # but are we really?
-                        if self.threadsFinished(log_status):
-                            break
-                    else:
-                        # save on CPU
-                        sleep(.01)
+                        completed = True
+                        break
                     continue
 
                 if not isinstance(sfEvent, SpiderFootEvent):
                     raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent")
 
-                # for every module
-                for mod in self.__moduleInstances.values():
+                self.__sf.debug(f"waitForThreads() got event, {sfEvent.eventType}, from eventQueue.")
+
+                if self.__arena is not None:
+                    self.__arena.add(sfEvent)
+
+                # send the new event to every module watching for it; events are
+                # frozen once emitted, so all modules share the same instance
+                for mod in self.__eventRouting.get(sfEvent.eventType, self.__wildcardModules):
                     # if it's been aborted
                     if mod._stopScanning:
                         # break out of the while loop
                         raise AssertionError(f"{mod.__name__} requested stop")
 
-                    # send it the new event if applicable
-                    watchedEvents = mod.watchedEvents()
-                    if sfEvent.eventType in watchedEvents or "*" in watchedEvents:
-                        mod.incomingEventQueue.put(deepcopy(sfEvent))
+                    # with the block policy, wait for the module to make room
+                    while True:
+                        try:
+                            mod.incomingEventQueue.put(sfEvent, timeout=self.__statusInterval)
+                            break
+                        except queue.Full:
+                            self.__sf.debug(f"Waiting for room in the event queue of {mod.__name__}")
+                            if self.__abortRequested():
+                                raise AssertionError("abort requested")
+                            if mod._stopScanning:
+                                raise AssertionError(f"{mod.__name__} requested stop")
 
         except (KeyboardInterrupt, AssertionError) as e:
             self.__sf.status(f"Scan [{self.__scanId}] aborted, {e}.")
 
         finally:
-            # tell the modules to stop
+            # tell the modules to stop, sending a sentinel to each module
+            # thread; the events still queued when a scan is aborted are
+            # dropped rather than handed out (or read back from disk) first
             for mod in self.__moduleInstances.values():
                 mod._stopScanning = True
+                self.__stopWorkers(mod, len(mod.threads), not completed)
+
+            self.__logQueueStats()
+            self.__logMemoryStats()
+
+    async def waitForTasks(self):
+        """Async counterpart of waitForThreads(), used when the _asyncscan
+        option is set.
+
+        Every module gets worker tasks on the scanner's event loop instead of
+        threads. Modules with a coroutine handleEvent() are awaited directly,
+        up to their maxTasks() events at a time, while synchronous modules
+        are run in a shared thread pool, up to their maxThreads() events at a
+        time. Events are dispatched and completion is detected the same way
+        as in threaded mode.
+        """
+        if not self.eventQueue:
+            return
+
+        loop = asyncio.get_running_loop()
+
+        # Synchronous handlers, and the blocking calls made by the async
+        # helpers of async modules, run in this pool. Its threads are only
+        # created as needed.
+        executor = ThreadPoolExecutor(
+            max_workers=sum(mod.maxTasks() for mod in self.__moduleInstances.values()),
+            thread_name_prefix="SpiderFootScanner"
+        )
+        loop.set_default_executor(executor)
+
+        tasks = list()
+        ticker = asyncio.ensure_future(self.__statusTicker())
+        completed = False
+
+        try:
+            # start the worker task(s) for each module
+            for mod in self.__moduleInstances.values():
+                tasks.extend(mod.startAsync())
+                if len(mod.tasks) > 1:
+                    self.__sf.debug(f"Started {len(mod.tasks)} tasks for {mod.__name__}")
+
+            lastStatus = time.time()
+
+            # watch for newly-generated events
+            while True:
+                sfEvent = await self.eventQueue.get()
+
+                # log status of modules and check for abort requests periodically
+                log_status = time.time() - lastStatus >= self.__statusInterval
+                if log_status:
+                    lastStatus = time.time()
+                    if await loop.run_in_executor(None, self.__abortRequested):
+                        raise AssertionError("abort requested")
+
+                    for mod in self.__moduleInstances.values():
+                        if mod._stopScanning:
+                            raise AssertionError(f"{mod.__name__} requested stop")
+
+                    # stop routing events to modules which have failed
+                    if any(mod.errorState for mod in self.__routedModules):
+                        self.__buildEventRouting()
+
+                # None is a wakeup from a module which has just gone idle,
+                # or from the status ticker
+                if sfEvent is None:
+                    if self.threadsFinished(log_status):
+                        completed = True
+                        break
+                    continue
+
+                if not isinstance(sfEvent, SpiderFootEvent):
+                    raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent")
+
+                self.__sf.debug(f"waitForTasks() got event, {sfEvent.eventType}, from eventQueue.")
+
+                if self.__arena is not None:
+                    self.__arena.add(sfEvent)
+
+                for mod in self.__eventRouting.get(sfEvent.eventType, self.__wildcardModules):
+                    # if it's been aborted
+                    if mod._stopScanning:
+                        raise AssertionError(f"{mod.__name__} requested stop")
+
+                    try:
+                        mod.incomingEventQueue.put_nowait(sfEvent)
+                    except (asyncio.QueueFull, queue.Full):
+                        await self.__waitForRoom(mod, sfEvent)
+
+        except (KeyboardInterrupt, AssertionError) as e:
+            self.__sf.status(f"Scan [{self.__scanId}] aborted, {e}.")
+
+        finally:
+            ticker.cancel()
+
+            # tell the modules to stop, sending a sentinel to each module task
+            # (or thread, for isolated modules)
+            for mod in self.__moduleInstances.values():
+                mod._stopScanning = True
+                self.__stopWorkers(mod, len(mod.tasks) + len(mod.threads), not completed)
+
+            # give the modules a moment to wind down before the loop is closed
+            if tasks:
+                done, pending = await asyncio.wait(tasks, timeout=self.__statusInterval)
+                for task in pending:
+                    task.cancel()
+
+            executor.shutdown(wait=False)
+
+            self.__logQueueStats()
+            self.__logMemoryStats()
+
+    def __stopWorkers(self, mod, workers, discard):
+        """Send the shutdown sentinel to each of a module's workers, without
+        waiting for room in its event queue.
+
+        Args:
+            mod (SpiderFootPlugin): module
+            workers (int): number of worker threads or tasks
+            discard (bool): drop the events still queued for the module
+        """
+        discarded = mod.incomingEventQueue.stopWorkers(workers, discard)
+        if discarded:
+            self.__sf.debug(f"Dropped {discarded} events queued for {mod.__name__}")
+
+    async def __waitForRoom(self, mod, sfEvent):
+        """Wait for room in a module's full event queue, with the block policy,
+        checking for abort requests while waiting.
+
+        Args:
+            mod (SpiderFootPlugin): module
+            sfEvent (SpiderFootEvent): event to queue for the module
+
+        Raises:
+            AssertionError: scan abort was requested
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            self.__sf.debug(f"Waiting for room in the event queue of {mod.__name__}")
+
+            try:
+                if isinstance(mod.incomingEventQueue, asyncio.Queue):
+                    await asyncio.wait_for(mod.incomingEventQueue.put(sfEvent), timeout=self.__statusInterval)
+                else:
+                    await loop.run_in_executor(None, lambda: mod.incomingEventQueue.put(sfEvent, timeout=self.__statusInterval))
+                return
+            except (asyncio.TimeoutError, queue.Full):
+                pass
+
+            if await loop.run_in_executor(None, self.__abortRequested):
+                raise AssertionError("abort requested")
+            if mod._stopScanning:
+                raise AssertionError(f"{mod.__name__} requested stop")
+
+    async def __statusTicker(self):
+        """Wake the dispatcher up every status interval, so that the scan
+        status is logged and abort requests are noticed while no events are
+        being produced."""
+        while True:
+            await asyncio.sleep(self.__statusInterval)
+            self.eventQueue.put(None)
+
+    def __buildEventRouting(self):
+        """Index the module instances by the event types they watch.
+
+        Each event type maps to the modules watching it plus the modules
+        watching all events ("*"), in module priority order, so that the
+        dispatcher can fan out an event with a single lookup. Event types
+        nobody explicitly watches are routed to the wildcard modules only.
+
+        Must be called again whenever modules are added, removed or fail,
+        as modules in an error state are left out of the index.
+        """
+        routedModules = list()
+        watched = dict()
+
+        for mod in self.__moduleInstances.values():
+            if mod.errorState:
+                continue
+
+            eventTypes = mod.watchedEvents()
+            if not eventTypes:
+                continue
+
+            routedModules.append(mod)
+            watched[mod] = set(eventTypes)
+
+        wildcardModules = [mod for mod in routedModules if "*" in watched[mod]]
+
+        eventRouting = dict()
+        for eventType in set().union(*watched.values()) - {"*"}:
+            eventRouting[eventType] = [mod for mod in routedModules if eventType in watched[mod] or "*" in watched[mod]]
+
+        self.__eventRouting = eventRouting
+        self.__wildcardModules = wildcardModules
+        self.__routedModules = routedModules
+
+    def __abortRequested(self):
+        """Check whether the user has asked for this scan to be aborted.
+
+        Returns:
+            bool: scan abort was requested
+        """
+        scanstatus = self.__dbh.scanInstanceGet(self.__scanId)
+
+        if not scanstatus:
+            return False
+
+        return scanstatus[5] == "ABORT-REQUESTED"
 
     def threadsFinished(self, log_status=False):
+        """Check whether every module has finished processing its events.
+
+        A module's in-flight count is the number of events queued for it plus
+        the event it is currently handling. Events a module produces reach the
+        event queue before its in-flight count drops, so the scan is complete
+        once every in-flight count is zero and the event queue is still empty.
+
+        Args:
+            log_status (bool): log the modules with the most queued events
+
+        Returns:
+            bool: all modules are idle and no events are waiting
+        """
         if self.eventQueue is None:
             return True
 
-        modules_waiting = {m.__name__: m.incomingEventQueue.qsize() for m in self.__moduleInstances.values()}
+        modules_waiting = {m.__name__: m.eventsInFlight() for m in self.__moduleInstances.values()}
         modules_waiting = sorted(modules_waiting.items(), key=lambda x: x[-1], reverse=True)
-        modules_running = [m.__name__ for m in self.__moduleInstances.values() if m.running]
-        queues_empty = [qsize == 0 for m, qsize in modules_waiting]
 
-        if not modules_running and not queues_empty:
-            self.__sf.debug("Clearing queues for stalled/aborted modules.")
-            for mod in self.__moduleInstances.values():
-                try:
-                    while True:
-                        mod.incomingEventQueue.get_nowait()
-                except Exception:
-                    pass
-
-        if log_status and modules_running:
-            events_queued = ", ".join([f"{mod}: {qsize:,}" for mod, qsize in modules_waiting[:5] if qsize > 0])
+        if log_status:
+            highWaterMarks = {mod: stats['highWaterMark'] for mod, stats in self.queueStats().items()}
+            events_queued = ", ".join([f"{mod}: {inflight:,} (peak {highWaterMarks.get(mod, 0):,})" for mod, inflight in modules_waiting[:5] if inflight > 0])
             if events_queued:
                 self.__sf.info(f"Events queued: {events_queued}")
 
-        if all(queues_empty) and not modules_running:
-            return True
-        return False
+        if any(inflight for mod, inflight in modules_waiting):
+            return False
+
+        return self.eventQueue.empty()
+
+    def queueStats(self):
+        """Statistics of the scan's event queues.
+
+        Returns:
+            dict: for the shared event queue ("eventQueue") and each module's
+                queue, the number of events queued, the most events queued
+                at once (high-water mark) and the number of events dropped
+                or spilled to disk because the queue was full
+        """
+        queues = dict()
+        if self.eventQueue is not None:
+            queues['eventQueue'] = self.eventQueue
+        for mod in self.__moduleInstances.values():
+            if mod.incomingEventQueue is not None:
+                queues[mod.__name__] = mod.incomingEventQueue
+
+        stats = dict()
+        for name, q in queues.items():
+            stats[name] = {
+                'queued': q.qsize(),
+                'highWaterMark': getattr(q, 'highWaterMark', 0),
+                'dropped': getattr(q, 'dropped', 0),
+                'spilled': getattr(q, 'spilled', 0)
+            }
+
+        return stats
+
+    def __logQueueStats(self):
+        """Log the high-water marks of the event queues, and any events
+        dropped or spilled to disk, once the scan is over."""
+        stats = sorted(self.queueStats().items(), key=lambda x: x[-1]['highWaterMark'], reverse=True)
+
+        highWaterMarks = ", ".join([f"{name}: {s['highWaterMark']:,}" for name, s in stats[:5] if s['highWaterMark'] > 0])
+        if highWaterMarks:
+            self.__sf.info(f"Event queue high-water marks: {highWaterMarks}")
+
+        for name, s in stats:
+            if s['spilled']:
+                self.__sf.info(f"{s['spilled']:,} events for {name} were spilled to disk")
+            if s['dropped']:
+                self.__sf.error(f"{s['dropped']:,} events for {name} were dropped, as its event queue was full")
+
+    def __setUpArena(self):
+        """Bound the memory used by events with an event arena, if the
+        _eventwindow option is set. Events out of the window are loaded
+        back from the database when needed, so this requires the events
+        to be stored by sfp__stor_db."""
+        if not self.__eventWindow:
+            return
+
+        storDb = self.__moduleInstances.get('sfp__stor_db')
+        if storDb is None or not storDb.opts.get('_store', True):
+            self.__sf.info("Not bounding the events kept in memory, as events are not stored in the database")
+            return
+
+        self.__arena = SpiderFootEventArena(self.__eventWindow, self.__dbh, self.__scanId)
+        for mod in self.__moduleInstances.values():
+            mod.setArena(self.__arena)
+
+    def arenaStats(self):
+        """Statistics of the events kept in memory.
+
+        Returns:
+            dict: events in the window, out of the window but not stored yet,
+                in memory in total, and loaded back from the database, or an
+                empty dict if the memory used by events isn't bounded
+        """
+        if self.__arena is None:
+            return dict()
+
+        return self.__arena.stats()
+
+    def dedupeStats(self):
+        """Statistics of the record of data already seen by modules.
+
+        Returns:
+            dict: mode ("exact" or "bloom"), number of keys and approximate bytes used
+        """
+        if self.__dedupe is None:
+            return dict()
+
+        return self.__dedupe.stats()
+
+    def blobStats(self):
+        """Statistics of the event data kept on disk.
+
+        Returns:
+            dict: number of distinct blobs, bytes on disk and handles given
+                out, or an empty dict if no event data is kept on disk
+        """
+        if self.__blobStore is None:
+            return dict()
+
+        return self.__blobStore.stats()
+
+    def dbWriterStats(self):
+        """Statistics of the database writer thread.
+
+        Worker processes of isolated modules have writers of their own,
+        which are counted in once the worker process has exited.
+
+        Returns:
+            dict: rows written, transactions committed, rows which could not
+                be written, and log rows dropped or left out by sampling, or
+                an empty dict if rows are written directly
+        """
+        if self.__dbWriter is None:
+            return dict()
+
+        stats = self.__dbWriter.stats()
+        for mod in self.__moduleInstances.values():
+            if mod._isolated:
+                for k, v in mod._isolatedWriterStats.items():
+                    stats[k] = stats.get(k, 0) + v
+
+        return stats
+
+    def __logMemoryStats(self):
+        """Log the size of the record of data already seen by modules, and
+        how many events were kept out of memory, once the scan is over."""
+        stats = self.dedupeStats()
+        if stats.get('keys'):
+            self.__sf.info(f"Data seen by modules: {stats['keys']:,} keys ({stats['mode']}, {stats['bytes'] / 1024:,.0f} KiB)")
+
+        stats = self.arenaStats()
+        if stats:
+            self.__sf.info(f"Events in memory: {stats['live']:,} ({stats['window']:,} in the window), {stats['loaded']:,} loaded back from the database")
+
+        stats = self.blobStats()
+        if stats.get('refs'):
+            self.__sf.info(f"Event data kept on disk: {stats['refs']:,} events, {stats['blobs']:,} distinct ({stats['bytes'] / 1024:,.0f} KiB)")
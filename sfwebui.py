@@ -27,10 +27,11 @@ from mako.lookup import TemplateLookup
 from mako.template import Template
 
 from spiderfoot import SpiderFootDb
+from spiderfoot import SpiderFootDbPool
 from spiderfoot import SpiderFootHelpers
 from spiderfoot import __version__
 from sflib import SpiderFoot
-from sfscan import SpiderFootScanner
+from sfscan import startSpiderFootScanner
 
 mp.set_start_method("spawn", force=True)
 
@@ -76,6 +77,9 @@ class SpiderFootWebUi:
         sf = SpiderFoot(self.defaultConfig)
         self.config = sf.configUnserialize(dbh.configGet(), self.defaultConfig)
 
+        # read-only database handles reused by the request threads
+        self.dbPool = SpiderFootDbPool(self.defaultConfig)
+
         cherrypy.config.update({
             'error_page.401': self.error_page_401,
             'error_page.404': self.error_page_404,
@@ -236,7 +240,7 @@ class SpiderFootWebUi:
             value = "%"
             regex = ""
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         criteria = {
             'scan_id': id or '',
             'type': eventType or '',
@@ -276,7 +280,7 @@ class SpiderFootWebUi:
             string: results in CSV format
         """
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         data = dbh.scanResultEvent(id, type)
         fileobj = StringIO()
         parser = csv.writer(fileobj, dialect=dialect)
@@ -304,7 +308,7 @@ class SpiderFootWebUi:
             string: results in CSV format
         """
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         scaninfo = dict()
         data = list()
         for id in ids.split(','):
@@ -367,7 +371,7 @@ class SpiderFootWebUi:
             string: results in CSV format
         """
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         scaninfo = list()
         scan_name = ""
 
@@ -426,7 +430,7 @@ class SpiderFootWebUi:
         if not id:
             return None
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         data = dbh.scanResultEvent(id, filterFp=True)
         scan = dbh.scanInstanceGet(id)
 
@@ -454,7 +458,7 @@ class SpiderFootWebUi:
         Returns:
             string: GEXF data
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         data = list()
         roots = list()
 
@@ -487,7 +491,7 @@ class SpiderFootWebUi:
         Returns:
             str: options as JSON string
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         ret = dict()
 
         meta = dbh.scanInstanceGet(id)
@@ -571,9 +575,7 @@ class SpiderFootWebUi:
         # Start running a new scan
         scanId = SpiderFootHelpers.genScanInstanceId()
         try:
-            p = mp.Process(target=SpiderFootScanner, args=(scanname, scanId, scantarget, targetType, modlist, cfg))
-            p.daemon = True
-            p.start()
+            p = startSpiderFootScanner(scanname, scanId, scantarget, targetType, modlist, cfg)
         except Exception as e:
             self.log.error(f"[-] Scan [{scanId}] failed: {e}")
             return self.error(f"[-] Scan [{scanId}] failed: {e}")
@@ -626,9 +628,7 @@ class SpiderFootWebUi:
             # Start running a new scan
             scanId = SpiderFootHelpers.genScanInstanceId()
             try:
-                p = mp.Process(target=SpiderFootScanner, args=(scanname, scanId, scantarget, targetType, modlist, cfg))
-                p.daemon = True
-                p.start()
+                p = startSpiderFootScanner(scanname, scanId, scantarget, targetType, modlist, cfg)
             except Exception as e:
                 self.log.error(f"[-] Scan [{scanId}] failed: {e}")
                 return self.error(f"[-] Scan [{scanId}] failed: {e}")
@@ -649,7 +649,7 @@ class SpiderFootWebUi:
             None
         """
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         types = dbh.eventTypes()
         templ = Template(filename='spiderfoot/templates/newscan.tmpl', lookup=self.lookup)
         return templ.render(pageid='NEWSCAN', types=types, docroot=self.docroot,
@@ -668,7 +668,7 @@ class SpiderFootWebUi:
             None
         """
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         types = dbh.eventTypes()
         info = dbh.scanInstanceGet(id)
 
@@ -718,7 +718,7 @@ class SpiderFootWebUi:
             None
         """
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         res = dbh.scanInstanceGet(id)
         if res is None:
             return self.error("Scan ID not found.")
@@ -1021,7 +1021,7 @@ class SpiderFootWebUi:
 
         cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         types = dbh.eventTypes()
         ret = list()
 
@@ -1072,7 +1072,7 @@ class SpiderFootWebUi:
         Returns:
             str: query results as JSON
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
 
         if not query:
             return self.jsonify_error('400', "Invalid query.")
@@ -1201,9 +1201,7 @@ class SpiderFootWebUi:
         # Start running a new scan
         scanId = SpiderFootHelpers.genScanInstanceId()
         try:
-            p = mp.Process(target=SpiderFootScanner, args=(scanname, scanId, scantarget, targetType, modlist, cfg))
-            p.daemon = True
-            p.start()
+            p = startSpiderFootScanner(scanname, scanId, scantarget, targetType, modlist, cfg)
         except Exception as e:
             self.log.error(f"[-] Scan [{scanId}] failed: {e}")
             return self.error(f"[-] Scan [{scanId}] failed: {e}")
@@ -1276,7 +1274,7 @@ class SpiderFootWebUi:
         Returns:
             str: JSON
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         retdata = []
 
         try:
@@ -1302,7 +1300,7 @@ class SpiderFootWebUi:
         Returns:
             str: scan errors as JSON
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         retdata = []
 
         try:
@@ -1324,7 +1322,7 @@ class SpiderFootWebUi:
         Returns:
             str: scan list as JSON
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         data = dbh.scanInstanceList()
         retdata = []
 
@@ -1356,7 +1354,7 @@ class SpiderFootWebUi:
         Returns:
             str: scan status as JSON
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         data = dbh.scanInstanceGet(id)
 
         if not data:
@@ -1382,7 +1380,7 @@ class SpiderFootWebUi:
         """
         retdata = []
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
 
         try:
             scandata = dbh.scanResultSummary(id, by)
@@ -1417,7 +1415,7 @@ class SpiderFootWebUi:
         """
         retdata = []
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
 
         try:
             data = dbh.scanResultEvent(id, eventType, filterfp)
@@ -1455,7 +1453,7 @@ class SpiderFootWebUi:
         Returns:
             str: unique search results as JSON
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         retdata = []
 
         try:
@@ -1501,7 +1499,7 @@ class SpiderFootWebUi:
         if not id:
             return self.jsonify_error('404', "No scan specified")
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
 
         try:
             return dbh.scanResultHistory(id)
@@ -1520,7 +1518,7 @@ class SpiderFootWebUi:
         Returns:
             str: JSON
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbPool.get()
         pc = dict()
         datamap = dict()
         retdata = dict()
@@ -1,6 +1,16 @@
+from .blobstore import SpiderFootBlob, SpiderFootBlobStore
 from .db import SpiderFootDb
+from .dbpool import SpiderFootDbPool
+from .dbwriter import SpiderFootDbWriter
+from .dedupe import SpiderFootDedupe
 from .event import SpiderFootEvent
+from .eventarena import SpiderFootEventArena
+from .eventqueue import SpiderFootAsyncEventQueue, SpiderFootAsyncModuleQueue, SpiderFootEventBuffer, SpiderFootEventQueue, SpiderFootPackedEventQueue
+from .httpcache import SpiderFootHttpCache
+from .httpstream import SpiderFootHttpStream
 from .plugin import SpiderFootPlugin
+from .ratelimit import SpiderFootRateLimitedAdapter, SpiderFootRateLimiter
+from .sessionpool import SpiderFootSessionPool
 from .target import SpiderFootTarget
 from .helpers import SpiderFootHelpers
 from spiderfoot.__version__ import __version__
@@ -0,0 +1,191 @@
+import codecs
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+
+
+class SpiderFootBlob():
+    """Handle on event data kept in a SpiderFootBlobStore.
+
+    The data is read from disk each time it is needed, so only the handle
+    stays in memory. Handles are small and can be pickled, so they are also
+    what is passed to worker processes and written to spilled queues.
+
+    Attributes:
+        path (str): file holding the data, UTF-8 encoded
+        length (int): length of the data, in characters
+        size (int): size of the file, in bytes
+    """
+
+    __slots__ = ('path', 'length', 'size')
+
+    def __init__(self, path, length, size):
+        """Initialize the handle.
+
+        Args:
+            path (str): file holding the data, UTF-8 encoded
+            length (int): length of the data, in characters
+            size (int): size of the file, in bytes
+        """
+        self.path = path
+        self.length = length
+        self.size = size
+
+    def __len__(self):
+        return self.length
+
+    def read(self, limit=None):
+        """Read the data.
+
+        Args:
+            limit (int): number of characters to read, or None for all of it
+
+        Returns:
+            str: data
+
+        Raises:
+            IOError: the data could not be read
+        """
+        with open(self.path, 'rb') as f:
+            if limit is None or limit >= self.length:
+                return f.read().decode('utf-8', 'surrogatepass')
+
+            # a character is at most four bytes, so only map what is needed
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                decoder = codecs.getincrementaldecoder('utf-8')('surrogatepass')
+                return decoder.decode(m[:limit * 4])[:limit]
+
+    def __str__(self):
+        return self.read()
+
+    def __repr__(self):
+        return f"<SpiderFootBlob {self.path} ({self.length:,} characters)>"
+
+# end of SpiderFootBlob class
+
+
+class SpiderFootBlobStore():
+    """Content addressed store on disk for large event data.
+
+    Data at least as long as the threshold is written to a file named after
+    its hash, so the same data is only stored once, and events hold a
+    SpiderFootBlob handle on it instead of the data itself. The store
+    lives in a directory of its own, removed by close().
+
+    All methods are thread safe. A store passed to a worker process adds
+    to the same directory.
+
+    Attributes:
+        threshold (int): length from which data is kept on disk, in characters
+        path (str): directory holding the data
+    """
+
+    def __init__(self, threshold, path=None):
+        """Initialize the blob store.
+
+        Args:
+            threshold (int): length from which data is kept on disk, in characters
+            path (str): directory holding the data, or None for a new
+                temporary directory
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(threshold, int):
+            raise TypeError(f"threshold is {type(threshold)}; expected int()")
+        if threshold < 1:
+            raise ValueError(f"threshold value is {threshold}; expected 1 or more")
+
+        if path is None:
+            path = tempfile.mkdtemp(prefix="spiderfoot-blobs-")
+        else:
+            os.makedirs(path, exist_ok=True)
+
+        self.threshold = threshold
+        self.path = path
+        self._lock = threading.Lock()
+        self._blobs = dict()
+        self._bytes = 0
+        self._refs = 0
+
+    def __getstate__(self):
+        return {'threshold': self.threshold, 'path': self.path}
+
+    def __setstate__(self, state):
+        self.threshold = state['threshold']
+        self.path = state['path']
+        self._lock = threading.Lock()
+        self._blobs = dict()
+        self._bytes = 0
+        self._refs = 0
+
+    def put(self, data):
+        """Keep data on disk.
+
+        Args:
+            data (str): data
+
+        Returns:
+            SpiderFootBlob: handle on the data
+
+        Raises:
+            TypeError: data type was invalid
+            IOError: the data could not be written
+        """
+        if not isinstance(data, str):
+            raise TypeError(f"data is {type(data)}; expected str()")
+
+        raw = data.encode('utf-8', 'surrogatepass')
+        digest = hashlib.blake2b(raw, digest_size=20).hexdigest()
+
+        with self._lock:
+            self._refs += 1
+            blob = self._blobs.get(digest)
+            if blob is not None:
+                return blob
+
+            path = os.path.join(self.path, digest)
+            # written in full before it can be seen, as it may be read by
+            # another process sharing the store
+            if not os.path.exists(path):
+                fd, tmpPath = tempfile.mkstemp(dir=self.path)
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(raw)
+                    os.replace(tmpPath, path)
+                except OSError as e:
+                    try:
+                        os.unlink(tmpPath)
+                    except OSError:
+                        pass
+                    raise IOError(f"Could not write event data to {path}: {e}")
+                self._bytes += len(raw)
+
+            blob = self._blobs[digest] = SpiderFootBlob(path, len(data), len(raw))
+
+        return blob
+
+    def stats(self):
+        """Statistics of the blob store.
+
+        Returns:
+            dict: number of distinct blobs, bytes on disk, and handles given out
+        """
+        with self._lock:
+            return {
+                'blobs': len(self._blobs),
+                'bytes': self._bytes,
+                'refs': self._refs
+            }
+
+    def close(self):
+        """Remove the stored data. Handles given out can no longer be read."""
+        with self._lock:
+            self._blobs.clear()
+            shutil.rmtree(self.path, ignore_errors=True)
+
+# end of SpiderFootBlobStore class
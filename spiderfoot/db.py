@@ -3,6 +3,7 @@ import sqlite3
 import threading
 import time
 import hashlib
+from urllib.request import pathname2url
 
 
 class SpiderFootDb:
@@ -12,13 +13,22 @@ class SpiderFootDb:
         conn: SQLite connect() connection
         dbh: SQLite cursor() database handle
         dbhLock (_thread.RLock): thread lock on database handle
+        writer (SpiderFootDbWriter): writer thread for result and log rows, if any
     """
 
     dbh = None    # SQLite游标, 数据库句柄
     conn = None   # 数据库句柄，保存数据库连接
-
-    # Prevent multithread access to sqlite database
-    dbhLock = threading.RLock()    # RLock(可重入锁),可递归acquire，当释放锁时调用release()需要相同次数
+    writer = None  # 写入线程，批量写入扫描结果和日志
+    readOnly = False  # 只读连接
+
+    # Connection settings. WAL lets readers (e.g. the web UI) run while a
+    # scan is writing, and makes synchronous=NORMAL safe from corruption.
+    pragmas = [
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-16384",     # KiB
+        "PRAGMA mmap_size=268435456",   # bytes
+        "PRAGMA temp_store=MEMORY"
+    ]
 
     # Queries for creating the SpiderFoot database
     # 创建数据库字段
@@ -79,6 +89,12 @@ class SpiderFootDb:
 
     ]
 
+    # Indexes added since, also created when opening an existing database
+    upgradeSchemaQueries = [
+        # the web UI shows the latest log lines of a scan as it runs
+        "CREATE INDEX IF NOT EXISTS idx_scan_logs_generated ON tbl_scan_log (scan_instance_id, generated)"
+    ]
+
     # 创建要搜集的信息实体，包括IP、域名等等信息
     eventDetails = [
         ['ROOT', '内部SpiderFoot Root事件', 1, 'INTERNAL'],
@@ -142,7 +158,7 @@ class SpiderFootDb:
     ]
 
     # 初始化数据库各种信息，创建
-    def __init__(self, opts, init=False):
+    def __init__(self, opts, init=False, readOnly=False):
         """Initialize database and create handle to the SQLite database file.
         Creates the database file if it does not exist.
         Creates database schema if it does not exist.
@@ -150,6 +166,8 @@ class SpiderFootDb:
         Args:
             opts (dict): 必须在'__database'键中指定数据库文件路径
             init (bool): 初始化数据库
+            readOnly (bool): open a read-only connection to an existing
+                database (see SpiderFootDbPool)
 
         Raises:
             TypeError: arg type was invalid
@@ -169,8 +187,17 @@ class SpiderFootDb:
         # connect() will create the database file if it doesn't exist, but
         # at least we can use this opportunity to ensure we have permissions to
         # read and write to such a file.
+        # The handle may be shared by a module's worker threads; all access
+        # is serialised through dbhLock. Other handles have locks of their
+        # own, and SQLite takes care of access to the file between them.
+        self.dbhLock = threading.RLock()
+        self.readOnly = readOnly
+
         try:
-            dbh = sqlite3.connect(database_path)
+            if readOnly:
+                dbh = sqlite3.connect(f"file:{pathname2url(database_path)}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                dbh = sqlite3.connect(database_path, check_same_thread=False)
         except Exception as e:
             raise IOError(f"Error connecting to internal database {database_path}: {e}")
 
@@ -184,6 +211,17 @@ class SpiderFootDb:
         self.conn = dbh
         self.dbh = dbh.cursor()
 
+        # 设置连接参数
+        try:
+            if not readOnly:
+                # only changes the database file the first time
+                self.dbh.execute("PRAGMA journal_mode=WAL")
+            for pragma in self.pragmas:
+                self.dbh.execute(pragma)
+        except sqlite3.Error:
+            # e.g. locked by another connection; the defaults still work
+            pass
+
         # SQLite doesn't support regex queries, so we create
         # a custom function to do so..
         # 正则匹配数据库查询信息
@@ -202,7 +240,12 @@ class SpiderFootDb:
             try:
                 self.dbh.execute('SELECT COUNT(*) FROM tbl_scan_config')
                 self.conn.create_function("REGEXP", 2, __dbregex__)
-            except sqlite3.Error:
+                if not readOnly:
+                    self.__upgrade()
+            except sqlite3.Error as e:
+                if readOnly:
+                    raise IOError(f"Could not read the SpiderFoot database schema: {e.args[0]}")
+
                 # .. If not set up, we set it up.
                 try:
                     self.create()
@@ -242,7 +285,7 @@ class SpiderFootDb:
 
         with self.dbhLock:
             try:
-                for qry in self.createSchemaQueries:
+                for qry in self.createSchemaQueries + self.upgradeSchemaQueries:
                     self.dbh.execute(qry)
                 self.conn.commit()
                 for row in self.eventDetails:
@@ -259,6 +302,27 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError(f"SQL error encountered when setting up database: {e.args[0]}")
 
+    # 升级数据库结构
+    def __upgrade(self):
+        """Add what is missing from the schema of an existing database."""
+        try:
+            for qry in self.upgradeSchemaQueries:
+                self.dbh.execute(qry)
+            self.conn.commit()
+        except sqlite3.Error:
+            # e.g. locked by a running scan; tried again next time
+            pass
+
+    # 设置写入线程
+    def setWriter(self, writer):
+        """Write result and log rows through a writer thread, committing
+        in batches, instead of in a transaction of their own.
+
+        Args:
+            writer (SpiderFootDbWriter): writer thread, or None to write directly
+        """
+        self.writer = writer
+
     # 关闭数据库句柄
     def close(self):
         """Close the database handle."""
@@ -403,11 +467,18 @@ class SpiderFootDb:
             (scan_instance_id, generated, component, type, message) \
             VALUES (?, ?, ?, ?, ?)"
 
+        qvals = (instanceId, time.time() * 1000, component, classification, message)
+
+        # log lines may be dropped rather than hold up the scan, but not
+        # those the user most needs to see
+        if self.writer is not None:
+            important = classification in ("ERROR", "FATAL", "STATUS")
+            if self.writer.putLog(qry, qvals, (component, classification, message), important):
+                return
+
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, (
-                    instanceId, time.time() * 1000, component, classification, message
-                ))
+                self.dbh.execute(qry, qvals)
                 self.conn.commit()
             except sqlite3.Error as e:
                 if "locked" in e.args[0] or "thread" in e.args[0]:
@@ -995,13 +1066,18 @@ class SpiderFootDb:
                 raise IOError(f"SQL error encountered when fetching configuration: {e.args[0]}")
 
     # 存储一个事件到表中
-    def scanEventStore(self, instanceId, sfEvent, truncateSize=0):
+    def scanEventStore(self, instanceId, sfEvent, truncateSize=0, onStored=None):
         """Store an event in the database.
 
+        With a writer thread (see setWriter()), the event is only queued to
+        be stored when this returns.
+
         Args:
             instanceId (str): scan instance ID
             sfEvent (SpiderFootEvent): event to be stored in the database
             truncateSize (int): truncate size for event data
+            onStored (function): called with the event once it has been
+                committed, possibly from the writer thread
 
         Raises:
             TypeError: arg type was invalid
@@ -1062,7 +1138,8 @@ class SpiderFootDb:
         if not 0 <= sfEvent.risk <= 100:
             raise ValueError(f"sfEvent.risk value is {type(sfEvent.risk)}; expected 0 - 100")
 
-        if not isinstance(sfEvent.sourceEvent, SpiderFootEvent):
+        # events in an event arena find their source event on demand
+        if sfEvent.arena is None and not isinstance(sfEvent.sourceEvent, SpiderFootEvent):
             if sfEvent.eventType != "ROOT":
                 raise TypeError(f"sfEvent.sourceEvent is {type(sfEvent.sourceEvent)}; expected str()")
 
@@ -1072,12 +1149,14 @@ class SpiderFootDb:
         if not sfEvent.sourceEventHash:
             raise ValueError("sfEvent.sourceEventHash is empty")
 
-        storeData = sfEvent.data
-
-        # truncate if required
-        if isinstance(truncateSize, int):
-            if truncateSize > 0:
-                storeData = storeData[0:truncateSize]
+        # truncate if required; data kept on disk is only read as far as needed
+        if isinstance(truncateSize, int) and truncateSize > 0:
+            if sfEvent.blob is not None:
+                storeData = sfEvent.blob.read(truncateSize)
+            else:
+                storeData = sfEvent.data[0:truncateSize]
+        else:
+            storeData = sfEvent.data
 
         # retrieve scan results
         qry = "INSERT INTO tbl_scan_results \
@@ -1089,6 +1168,11 @@ class SpiderFootDb:
                  sfEvent.confidence, sfEvent.visibility, sfEvent.risk,
                  sfEvent.module, storeData, sfEvent.sourceEventHash]
 
+        if self.writer is not None:
+            callback = (lambda: onStored(sfEvent)) if onStored is not None else None
+            if self.writer.put(qry, qvals, callback):
+                return
+
         with self.dbhLock:
             try:
                 self.dbh.execute(qry, qvals)
@@ -1096,6 +1180,9 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError(f"SQL error encountered when storing event data ({self.dbh}): {e.args[0]}")
 
+        if onStored is not None:
+            onStored(sfEvent)
+
     # 列出扫描实例
     def scanInstanceList(self):
         """List all previously run scans.
@@ -1158,6 +1245,41 @@ class SpiderFootDb:
             except sqlite3.Error as e:
                 raise IOError(f"SQL error encountered when fetching scan history: {e.args[0]}")
 
+    # 按哈希获取一个已存储的事件
+    def scanEventGet(self, instanceId, eventHash):
+        """Get a stored event.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventHash (str): event hash
+
+        Returns:
+            list: hash, type, generated, confidence, visibility, risk, module,
+                data and source event hash of the event, or None if it was not found
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+        if not isinstance(instanceId, str):
+            raise TypeError(f"instanceId is {type(instanceId)}; expected str()")
+
+        if not isinstance(eventHash, str):
+            raise TypeError(f"eventHash is {type(eventHash)}; expected str()")
+
+        qry = "SELECT hash, type, generated, confidence, visibility, risk, \
+            module, data, source_event_hash \
+            FROM tbl_scan_results \
+            WHERE scan_instance_id = ? AND hash = ?"
+        qvars = [instanceId, eventHash]
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                return self.dbh.fetchone()
+            except sqlite3.Error as e:
+                raise IOError(f"SQL error encountered when getting event: {e.args[0]}")
+
     # 获取一组ID的源ID、类型和数据
     def scanElementSourcesDirect(self, instanceId, elementIdList):
         """Get the source IDs, types and data for a set of IDs.
@@ -0,0 +1,65 @@
+import threading
+
+from .db import SpiderFootDb
+
+
+class SpiderFootDbPool():
+    """Pool of read-only database handles, one per thread.
+
+    Opening a SpiderFootDb connects to the database and checks its schema,
+    which is wasted work for every request of a threaded server such as the
+    web UI. Each thread instead reuses a read-only handle of its own, so the
+    number of connections is bounded by the number of threads. As the
+    database uses WAL, these handles read while a scan is writing.
+
+    Attributes:
+        opts (dict): SpiderFoot options, with the database path in '__database'
+    """
+
+    def __init__(self, opts):
+        """Initialize the pool.
+
+        Args:
+            opts (dict): SpiderFoot options, with the database path in '__database'
+
+        Raises:
+            TypeError: opts type was invalid
+            ValueError: opts value was invalid
+        """
+        if not isinstance(opts, dict):
+            raise TypeError(f"opts is {type(opts)}; expected dict()")
+        if not opts.get('__database'):
+            raise ValueError("opts['__database'] is empty")
+
+        self.opts = {'__database': opts['__database']}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._handles = list()
+
+    def get(self):
+        """Read-only database handle of the calling thread.
+
+        Returns:
+            SpiderFootDb: read-only database handle
+
+        Raises:
+            IOError: database I/O failed
+        """
+        dbh = getattr(self._local, 'dbh', None)
+        if dbh is None:
+            dbh = SpiderFootDb(self.opts, readOnly=True)
+            self._local.dbh = dbh
+            with self._lock:
+                self._handles.append(dbh)
+        return dbh
+
+    def close(self):
+        """Close every handle of the pool."""
+        with self._lock:
+            for dbh in self._handles:
+                dbh.close()
+                dbh.conn.close()
+            self._handles = list()
+        self._local = threading.local()
+
+# end of SpiderFootDbPool class
@@ -0,0 +1,396 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from .db import SpiderFootDb
+
+
+class SpiderFootDbWriter():
+    """Writer thread owning the scan's database writes.
+
+    Result and log rows are queued by SpiderFootDb (see
+    SpiderFootDb.setWriter()) and written by a single thread on a
+    connection of its own, committing in batches of up to batchSize rows,
+    or every interval seconds, rather than once per row. A full queue
+    makes callers wait for the writer, so it can't grow without bound.
+
+    Log rows (see putLog()) never make callers wait: when the queue is
+    full they are dropped and counted instead, unless they are important.
+    Messages logged over and over again can also be sampled.
+
+    Rows queued after close() are written directly by the caller, as
+    before. So are rows queued once the writer thread has died of an
+    unexpected error, which flush() then raises.
+
+    Attributes:
+        batchSize (int): most rows written in a single transaction
+        interval (float): longest time in seconds a row waits to be written
+        logSample (int): number of times the same message is logged before
+            only one in logSample is, or 0 to log every message
+        rows (int): number of rows written
+        commits (int): number of transactions committed
+        failed (int): number of rows which could not be written
+        dropped (int): number of log rows dropped as the queue was full
+        sampled (int): number of repeated log rows left out by sampling
+        error (Exception): error the writer thread died of, if any
+    """
+
+    log = logging.getLogger(__name__)
+
+    # rows queued, per batch size, before callers have to wait
+    queueBatches = 20
+
+    # distinct messages counted for sampling before the counts start over
+    maxSampleKeys = 100000
+
+    # seconds between checks that the writer thread is still running, while
+    # waiting for it
+    waitInterval = 1
+
+    def __init__(self, opts, batchSize=500, interval=0.25, logSample=0):
+        """Initialize the writer and start its thread.
+
+        Args:
+            opts (dict): SpiderFoot options, with the database path in '__database'
+            batchSize (int): most rows written in a single transaction
+            interval (float): longest time in seconds a row waits to be written
+            logSample (int): number of times the same message is logged
+                before only one in logSample is, or 0 to log every message
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+        if not isinstance(batchSize, int):
+            raise TypeError(f"batchSize is {type(batchSize)}; expected int()")
+        if batchSize < 1:
+            raise ValueError(f"batchSize value is {batchSize}; expected 1 or more")
+        if not isinstance(interval, (int, float)):
+            raise TypeError(f"interval is {type(interval)}; expected float()")
+        if interval <= 0:
+            raise ValueError(f"interval value is {interval}; expected more than 0")
+        if not isinstance(logSample, int):
+            raise TypeError(f"logSample is {type(logSample)}; expected int()")
+        if logSample < 0:
+            raise ValueError(f"logSample value is {logSample}; expected 0 or more")
+
+        self.batchSize = batchSize
+        self.interval = interval
+        self.logSample = logSample
+        self.rows = 0
+        self.commits = 0
+        self.failed = 0
+        self.dropped = 0
+        self.sampled = 0
+        self.error = None
+        self._repeats = dict()
+        self.closed = False
+        # held only to check closed and count the callers about to queue an
+        # item, never while waiting for room in the queue; close() waits for
+        # those callers, so that nothing is queued after the stop sentinel
+        self._closeLock = threading.Condition()
+        self._producers = 0
+        self._dbh = SpiderFootDb(opts)
+        self._queue = queue.Queue(batchSize * self.queueBatches)
+        self._thread = threading.Thread(target=self._run, name="SpiderFootDbWriter", daemon=True)
+        self._thread.start()
+
+    def put(self, qry, values, callback=None):
+        """Queue a row to be written.
+
+        Args:
+            qry (str): INSERT statement
+            values (tuple): row values
+            callback (function): called without arguments, from the writer
+                thread, once the row has been committed
+
+        Returns:
+            bool: row was queued; False once the writer is closed
+        """
+        if not self._reserve():
+            return False
+        try:
+            return self._enqueue((qry, values, callback))
+        finally:
+            self._release()
+
+    def putLog(self, qry, values, key, important=False):
+        """Queue a log row to be written, without waiting for the writer.
+
+        Args:
+            qry (str): INSERT statement
+            values (tuple): row values
+            key (tuple): what makes the message the same as another, for sampling
+            important (bool): never drop or sample the row, waiting for room
+                in the queue if needed
+
+        Returns:
+            bool: row was queued, dropped or sampled out; False once the
+                writer is closed
+        """
+        with self._closeLock:
+            if self.closed or self.error is not None:
+                return False
+
+            if self.logSample and not important:
+                if len(self._repeats) >= self.maxSampleKeys:
+                    self._repeats.clear()
+                count = self._repeats[key] = self._repeats.get(key, 0) + 1
+                if count > self.logSample and count % self.logSample:
+                    self.sampled += 1
+                    return True
+
+            if not important:
+                try:
+                    self._queue.put((qry, values, None), block=False)
+                except queue.Full:
+                    self.dropped += 1
+                return True
+
+            self._producers += 1
+
+        try:
+            return self._enqueue((qry, values, None))
+        finally:
+            self._release()
+
+    def flush(self):
+        """Wait until every row queued so far has been committed.
+
+        Raises:
+            IOError: the writer thread died, and the rows it had left were lost
+        """
+        self._checkError()
+        if not self._reserve():
+            return
+        done = threading.Event()
+        try:
+            self._enqueue(done)
+        finally:
+            self._release()
+        while not done.wait(self.waitInterval):
+            if not self._thread.is_alive():
+                break
+        self._checkError()
+
+    def close(self):
+        """Write the remaining rows, then stop the writer thread and close
+        its database connection."""
+        with self._closeLock:
+            if self.closed:
+                return
+            self.closed = True
+            while self._producers:
+                self._closeLock.wait()
+        self._enqueue(None)
+        self._thread.join()
+        self._dbh.close()
+
+    def _reserve(self):
+        """Count the caller as about to queue an item, unless the writer
+        is closed. The caller calls _release() once the item is queued.
+
+        Returns:
+            bool: item can be queued
+        """
+        with self._closeLock:
+            if self.closed or self.error is not None:
+                return False
+            self._producers += 1
+            return True
+
+    def _release(self):
+        """Count the caller as done queueing its item."""
+        with self._closeLock:
+            self._producers -= 1
+            if not self._producers:
+                self._closeLock.notify_all()
+
+    def _enqueue(self, item):
+        """Queue an item for the writer thread, waiting for room for as
+        long as the thread is running. Called from the writer thread itself,
+        as by a callback storing another row, it never waits, as nothing
+        would make room.
+
+        Args:
+            item (tuple): row, or an Event to set or None to stop the thread
+
+        Returns:
+            bool: item was queued; False if the writer thread died, or if
+                the queue is full and the caller is the writer thread
+        """
+        if threading.current_thread() is self._thread:
+            try:
+                self._queue.put(item, block=False)
+                return True
+            except queue.Full:
+                return False
+
+        while self._thread.is_alive():
+            try:
+                self._queue.put(item, timeout=self.waitInterval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _checkError(self):
+        """Raise the error the writer thread died of, if any.
+
+        Raises:
+            IOError: the writer thread died
+        """
+        if self.error is not None:
+            raise IOError(f"Database writer thread failed: {self.error}") from self.error
+
+    def stats(self):
+        """Statistics of the writer.
+
+        Returns:
+            dict: rows written, transactions committed, rows which could not
+                be written, and log rows dropped or left out by sampling
+        """
+        return {
+            'rows': self.rows,
+            'commits': self.commits,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'sampled': self.sampled
+        }
+
+    def _run(self):
+        try:
+            self._process()
+        except BaseException as e:
+            self.error = e
+            self.log.exception(f"Database writer thread failed: {e}")
+            self._discard()
+
+    def _discard(self):
+        """Empty the queue once the writer thread has died, counting the
+        rows left as failed and waking up callers of flush()."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not None:
+                self.failed += 1
+
+    def _process(self):
+        """Write the queued rows in batches until the stop sentinel (None)."""
+        while True:
+            item = self._queue.get()
+            batch = list()
+            deadline = time.monotonic() + self.interval
+
+            # gather rows until the batch is full or the oldest row has
+            # waited long enough, stopping early to flush or shut down
+            while True:
+                if item is None or isinstance(item, threading.Event):
+                    break
+                batch.append(item)
+                if len(batch) >= self.batchSize:
+                    item = False
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    item = False
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = False
+                    break
+
+            if batch:
+                self._write(batch)
+
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write(self, batch):
+        """Write a batch of rows in a single transaction, grouping rows for
+        the same statement. If the transaction fails for another reason
+        than the database being locked, rows are written one by one, so
+        that a bad row doesn't lose the others.
+
+        Args:
+            batch (list): (qry, values, callback) tuples
+        """
+        statements = dict()
+        for qry, values, callback in batch:
+            statements.setdefault(qry, list()).append(values)
+
+        for attempt in range(5):
+            try:
+                self._execute(statements.items())
+                break
+            except sqlite3.Error as e:
+                if "locked" not in e.args[0] and "busy" not in e.args[0]:
+                    batch = self._writeRows(batch)
+                    break
+                error = e
+            # another process may hold the database lock for a moment
+            time.sleep(0.1 * (attempt + 1))
+        else:
+            self.failed += len(batch)
+            self.log.error(f"Unable to write {len(batch)} rows to the database: {error.args[0]}")
+            return
+
+        self.rows += len(batch)
+        self.commits += 1
+
+        for qry, values, callback in batch:
+            if callback is None:
+                continue
+            try:
+                callback()
+            except Exception as e:
+                self.log.exception(f"Error after writing a row to the database: {e}")
+
+    def _writeRows(self, batch):
+        """Write rows one by one.
+
+        Args:
+            batch (list): (qry, values, callback) tuples
+
+        Returns:
+            list: rows written
+        """
+        written = list()
+        for row in batch:
+            try:
+                self._execute([(row[0], [row[1]])])
+                written.append(row)
+            except sqlite3.Error as e:
+                self.failed += 1
+                self.log.error(f"Unable to write a row to the database: {e.args[0]}")
+        return written
+
+    def _execute(self, statements):
+        """Execute statements in a single transaction.
+
+        Args:
+            statements (list): (qry, rows) pairs
+
+        Raises:
+            sqlite3.Error: the transaction failed and was rolled back
+        """
+        with self._dbh.dbhLock:
+            try:
+                for qry, rows in statements:
+                    self._dbh.dbh.executemany(qry, rows)
+                self._dbh.conn.commit()
+            except sqlite3.Error:
+                self._dbh.conn.rollback()
+                raise
+
+# end of SpiderFootDbWriter class
@@ -0,0 +1,175 @@
+import hashlib
+import math
+import sys
+import threading
+
+
+class SpiderFootDedupe():
+    """Scan wide record of data already seen by modules.
+
+    Keys are (module, event type, data) and are stored as 64 bit blake2b
+    digests rather than as strings, so the same host names are not kept
+    once per module and dict. Alternatively, keys can be stored in a bloom
+    filter, which uses a fraction of the memory at the cost of sometimes
+    reporting unseen data as seen (at the given error rate). The filter
+    grows as needed, so the capacity is not a limit.
+
+    All methods are thread safe.
+
+    Attributes:
+        bloomCapacity (int): number of keys the first bloom filter is sized
+            for, or 0 to store exact digests
+        errorRate (float): bloom filter false positive rate
+        count (int): number of keys added
+    """
+
+    # size of a stored exact digest, as a Python int
+    _digestSize = sys.getsizeof(2 ** 63)
+
+    def __init__(self, bloomCapacity=0, errorRate=0.001):
+        """Initialize the dedupe store.
+
+        Args:
+            bloomCapacity (int): number of keys the first bloom filter is
+                sized for, or 0 to store exact digests
+            errorRate (float): bloom filter false positive rate
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(bloomCapacity, int):
+            raise TypeError(f"bloomCapacity is {type(bloomCapacity)}; expected int()")
+        if bloomCapacity < 0:
+            raise ValueError(f"bloomCapacity value is {bloomCapacity}; expected 0 or more")
+        if not isinstance(errorRate, float):
+            raise TypeError(f"errorRate is {type(errorRate)}; expected float()")
+        if not 0 < errorRate < 1:
+            raise ValueError(f"errorRate value is {errorRate}; expected a value between 0 and 1")
+
+        self.bloomCapacity = bloomCapacity
+        self.errorRate = errorRate
+        self.count = 0
+        self._lock = threading.Lock()
+        self._digests = set()
+        # bloom filters as [bits, number of bits, number of hashes, capacity, count]
+        self._filters = list()
+
+    @staticmethod
+    def _digest(module, eventType, data):
+        """Hash a key.
+
+        Args:
+            module (str): module name
+            eventType (str): event type, or another label keeping sets of keys apart
+            data (str|bytes|tuple): data, or a tuple of strings
+
+        Returns:
+            bytes: 16 byte digest
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(module.encode('utf-8'))
+        h.update(b"\0")
+        h.update(eventType.encode('utf-8'))
+
+        for item in data if isinstance(data, tuple) else (data,):
+            if not isinstance(item, bytes):
+                item = str(item).encode('utf-8', 'surrogatepass')
+            h.update(b"\0")
+            h.update(item)
+
+        return h.digest()
+
+    def _addFilter(self):
+        if self._filters:
+            capacity = self._filters[-1][3] * 2
+            errorRate = self.errorRate / (2 ** len(self._filters))
+        else:
+            capacity = self.bloomCapacity
+            errorRate = self.errorRate / 2
+
+        numBits = max(8, math.ceil(-capacity * math.log(errorRate) / (math.log(2) ** 2)))
+        numHashes = max(1, round(numBits / capacity * math.log(2)))
+        self._filters.append([bytearray((numBits + 7) // 8), numBits, numHashes, capacity, 0])
+
+    @staticmethod
+    def _inFilter(bloom, h1, h2):
+        bits, numBits, numHashes = bloom[0], bloom[1], bloom[2]
+        for i in range(numHashes):
+            b = (h1 + i * h2) % numBits
+            if not bits[b >> 3] & (1 << (b & 7)):
+                return False
+        return True
+
+    def seen(self, module, eventType, data, add=True):
+        """Check whether a key has been seen before, and remember it.
+
+        Args:
+            module (str): module name
+            eventType (str): event type, or another label keeping sets of keys apart
+            data (str|bytes|tuple): data, or a tuple of strings
+            add (bool): remember the key if it has not been seen
+
+        Returns:
+            bool: key was seen before
+        """
+        digest = self._digest(module, eventType, data)
+
+        if not self.bloomCapacity:
+            key = int.from_bytes(digest[:8], 'little')
+            with self._lock:
+                if key in self._digests:
+                    return True
+                if add:
+                    self._digests.add(key)
+                    self.count += 1
+            return False
+
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+
+        with self._lock:
+            for bloom in self._filters:
+                if self._inFilter(bloom, h1, h2):
+                    return True
+
+            if not add:
+                return False
+
+            if not self._filters or self._filters[-1][4] >= self._filters[-1][3]:
+                self._addFilter()
+
+            bloom = self._filters[-1]
+            bits, numBits = bloom[0], bloom[1]
+            for i in range(bloom[2]):
+                b = (h1 + i * h2) % numBits
+                bits[b >> 3] |= 1 << (b & 7)
+            bloom[4] += 1
+            self.count += 1
+
+        return False
+
+    def memoryUsage(self):
+        """Approximate memory used to store the keys.
+
+        Returns:
+            int: bytes
+        """
+        with self._lock:
+            if not self.bloomCapacity:
+                return sys.getsizeof(self._digests) + len(self._digests) * self._digestSize
+            return sum(sys.getsizeof(f[0]) for f in self._filters)
+
+    def stats(self):
+        """Statistics of the dedupe store.
+
+        Returns:
+            dict: mode ("exact" or "bloom"), keys and bytes
+        """
+        return {
+            'mode': "bloom" if self.bloomCapacity else "exact",
+            'keys': self.count,
+            'bytes': self.memoryUsage()
+        }
+
+# end of SpiderFootDedupe class
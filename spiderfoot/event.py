@@ -1,6 +1,32 @@
 import hashlib
-import random
+import itertools
+import os
+import sys
 import time
+import weakref
+
+from .blobstore import SpiderFootBlob
+
+
+def _newIdPrefix():
+    """Per-process part of event IDs, so that events created in different
+    processes (e.g. isolated module workers) can't share an ID."""
+    return f"{os.getpid()}.{os.urandom(4).hex()}."
+
+
+# Events are told apart by a per-process prefix and a counter, rather than
+# a random number from the OS for every event.
+_idPrefix = _newIdPrefix()
+_idCounter = itertools.count()
+
+
+def _resetIdPrefix():
+    global _idPrefix
+    _idPrefix = _newIdPrefix()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_resetIdPrefix)
 
 
 class SpiderFootEvent():
@@ -19,21 +45,38 @@ class SpiderFootEvent():
         hash (str): unique SHA256 hash of the event, or "ROOT"
         moduleDataSource (str): module data source
         actualSource (str): source data of parent event
-        __id: unique ID of the event, generated using eventType, generated, module, and a random integer
+        frozen (bool): event has been emitted and can no longer be modified
+        ancestryKey (int): compact key of the event's type and data, ignoring case
+        ancestry (frozenset): ancestryKey of every ancestor of the event
+        depth (int): number of hops from the ROOT event
+        arena (SpiderFootEventArena): arena the event belongs to, if any
+        blob (SpiderFootBlob): handle on the data, if it is kept on disk
+        _id: unique ID of the event, generated using eventType, generated, module, and a per-process counter
+
+    Note:
+        Once an event has been passed to notifyListeners() it is frozen and
+        shared by every module receiving it. A module wanting to modify an
+        event it received must work on a copy (copy.copy(event)), which is
+        mutable and keeps the same hash and source event.
+
+        Events use __slots__ to keep them small, so no other attributes can
+        be set on them.
+
+        Once added to a SpiderFootEventArena, an event only holds a weak
+        reference to its source event, and sourceEvent is looked up through
+        the arena if the source is no longer in memory.
+
+        Large data may be moved to a SpiderFootBlobStore (see moveDataTo()),
+        in which case data reads it back from disk on each access.
     """
 
-    _generated = None
-    _eventType = None
-    _confidence = None
-    _visibility = None
-    _risk = None
-    _module = None
-    _data = None
-    _sourceEvent = None
-    _sourceEventHash = None
-    _moduleDataSource = None
-    _actualSource = None
-    __id = None
+    __slots__ = (
+        '_generated', '_eventType', '_confidence', '_visibility', '_risk',
+        '_module', '_data', '_sourceEvent', '_sourceEventHash',
+        '_moduleDataSource', '_actualSource', '_frozen', '_ancestryKey',
+        '_ancestry', '_lineage', '_depth', '_hash', '_id', '_arena',
+        '__weakref__'
+    )
 
     def __init__(self, eventType, data, module, sourceEvent, confidence=100, visibility=100, risk=0):
         """Initialize SpiderFoot event object.
@@ -48,15 +91,26 @@ class SpiderFootEvent():
             risk (int): how much risk does this data represent, 0-100
         """
 
+        # Events are created in large numbers, so set the fields directly
+        # rather than through the property setters, which also check
+        # whether the event is frozen.
+        self._frozen = False
+        self._moduleDataSource = None
+        self._actualSource = None
+        self._ancestryKey = None
+        self._lineage = None
+        self._hash = None
+        self._arena = None
         self._generated = time.time()
-        self.data = data
-        self.eventType = eventType
-        self.module = module
-        self.confidence = confidence
-        self.visibility = visibility
-        self.risk = risk
-        self.sourceEvent = sourceEvent
-        self.__id = f"{self.eventType}{self.generated}{self.module}{random.SystemRandom().randint(0, 99999999)}"
+        self._data = self._checkData(data)
+        self._eventType = self._checkEventType(eventType)
+        self._module = self._checkModule(module, self._eventType)
+        self._confidence = self._checkPercent("confidence", confidence)
+        self._visibility = self._checkPercent("visibility", visibility)
+        self._risk = self._checkPercent("risk", risk)
+        self.__setSource(sourceEvent)
+        # formatted into a string only once needed, see __idString()
+        self._id = (self._eventType, self._generated, self._module, _idPrefix, next(_idCounter))
 
     @property
     def generated(self):
@@ -100,11 +154,32 @@ class SpiderFootEvent():
 
     @property
     def data(self):
-        return self._data
+        data = self._data
+        if data.__class__ is SpiderFootBlob:
+            return data.read()
+        return data
+
+    @property
+    def blob(self):
+        """
+        Returns:
+            SpiderFootBlob: handle on the data if it is kept on disk, or None
+        """
+        data = self._data
+        if data.__class__ is SpiderFootBlob:
+            return data
+        return None
 
     @property
     def sourceEvent(self):
-        return self._sourceEvent
+        source = self._sourceEvent
+        if source.__class__ is weakref.ref:
+            source = source()
+            if source is None:
+                source = self._arena.get(self._sourceEventHash)
+                if source is not None:
+                    self._sourceEvent = weakref.ref(source)
+        return source
 
     @property
     def sourceEventHash(self):
@@ -118,18 +193,75 @@ class SpiderFootEvent():
     def moduleDataSource(self):
         return self._moduleDataSource
 
+    @property
+    def ancestryKey(self):
+        """
+        Returns:
+            int: compact key of the event's type and data, ignoring case
+        """
+        if self._ancestryKey is None:
+            key = f"{self._eventType}\0{self.data.lower()}".encode('utf-8', 'surrogatepass')
+            self._ancestryKey = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+        return self._ancestryKey
+
+    @property
+    def ancestry(self):
+        """Keys of the event's ancestors, so that finding whether an ancestor
+        has the same type and data as another event doesn't require walking
+        the chain of source events.
+
+        Returns:
+            frozenset: ancestryKey of the source event and each of its ancestors
+        """
+        return self._ancestry
+
+    @property
+    def depth(self):
+        """
+        Returns:
+            int: number of hops from the ROOT event
+        """
+        return self._depth
+
+    @property
+    def arena(self):
+        """
+        Returns:
+            SpiderFootEventArena: arena the event belongs to, or None
+        """
+        return self._arena
+
+    @property
+    def frozen(self):
+        """
+        Returns:
+            bool: event has been emitted and can no longer be modified
+        """
+        return self._frozen
+
     @property
     def hash(self):
-        """Unique hash of this event.
+        """Unique hash of this event, computed once.
 
         Returns:
             str: unique SHA256 hash of the event, or "ROOT"
         """
-        if self.eventType == "ROOT":
+        if self._eventType == "ROOT":
             return "ROOT"
 
-        digestStr = self.__id.encode('raw_unicode_escape')
-        return hashlib.sha256(digestStr).hexdigest()
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.__idString().encode('utf-8', 'surrogatepass')).hexdigest()
+        return self._hash
+
+    def __idString(self):
+        """
+        Returns:
+            str: unique ID of the event
+        """
+        if isinstance(self._id, tuple):
+            eventType, generated, module, prefix, counter = self._id
+            self._id = f"{eventType}{generated}{module}{prefix}{counter}"
+        return self._id
 
     @eventType.setter
     def eventType(self, eventType):
@@ -142,13 +274,10 @@ class SpiderFootEvent():
             ValueError: confidence value was invalid
         """
 
-        if not isinstance(eventType, str):
-            raise TypeError(f"eventType is {type(eventType)}; expected str()")
-
-        if not eventType:
-            raise ValueError("eventType is empty")
-
-        self._eventType = eventType
+        self.__checkFrozen("eventType")
+        self._eventType = self._checkEventType(eventType)
+        self._ancestryKey = None
+        self._lineage = None
 
     @confidence.setter
     def confidence(self, confidence):
@@ -161,13 +290,8 @@ class SpiderFootEvent():
             ValueError: confidence value was invalid
         """
 
-        if not isinstance(confidence, int):
-            raise TypeError(f"confidence is {type(confidence)}; expected int()")
-
-        if not 0 <= confidence <= 100:
-            raise ValueError(f"confidence value is {confidence}; expected 0 - 100")
-
-        self._confidence = confidence
+        self.__checkFrozen("confidence")
+        self._confidence = self._checkPercent("confidence", confidence)
 
     @visibility.setter
     def visibility(self, visibility):
@@ -180,13 +304,8 @@ class SpiderFootEvent():
             ValueError: visibility value was invalid
         """
 
-        if not isinstance(visibility, int):
-            raise TypeError(f"visibility is {type(visibility)}; expected int()")
-
-        if not 0 <= visibility <= 100:
-            raise ValueError(f"visibility value is {visibility}; expected 0 - 100")
-
-        self._visibility = visibility
+        self.__checkFrozen("visibility")
+        self._visibility = self._checkPercent("visibility", visibility)
 
     @risk.setter
     def risk(self, risk):
@@ -199,13 +318,8 @@ class SpiderFootEvent():
             ValueError: risk value was invalid
         """
 
-        if not isinstance(risk, int):
-            raise TypeError(f"risk is {type(risk)}; expected int()")
-
-        if not 0 <= risk <= 100:
-            raise ValueError(f"risk value is {risk}; expected 0 - 100")
-
-        self._risk = risk
+        self.__checkFrozen("risk")
+        self._risk = self._checkPercent("risk", risk)
 
     @module.setter
     def module(self, module):
@@ -218,14 +332,8 @@ class SpiderFootEvent():
             ValueError: module value was invalid
         """
 
-        if not isinstance(module, str):
-            raise TypeError(f"module is {type(module )}; expected str()")
-
-        if not module:
-            if self.eventType != "ROOT":
-                raise ValueError("module is empty")
-
-        self._module = module
+        self.__checkFrozen("module")
+        self._module = self._checkModule(module, self._eventType)
 
     @data.setter
     def data(self, data):
@@ -239,13 +347,10 @@ class SpiderFootEvent():
             ValueError: data value was invalid
         """
 
-        if not isinstance(data, str):
-            raise TypeError(f"data is {type(data)}; expected str()")
-
-        if not data:
-            raise ValueError(f"data is empty: '{str(data)}'")
-
-        self._data = data
+        self.__checkFrozen("data")
+        self._data = self._checkData(data)
+        self._ancestryKey = None
+        self._lineage = None
 
     @sourceEvent.setter
     def sourceEvent(self, sourceEvent):
@@ -258,27 +363,284 @@ class SpiderFootEvent():
             TypeError: sourceEvent type was invalid
         """
 
+        self.__checkFrozen("sourceEvent")
+        self.__setSource(sourceEvent)
+
+    def __setSource(self, sourceEvent):
+        """Link the event to its source event.
+
+        Args:
+            sourceEvent (SpiderFootEvent): source event
+
+        Raises:
+            TypeError: sourceEvent type was invalid
+        """
         # "ROOT" is a special "hash" reserved for elements with no parent,
         # such as targets provided via the web UI or CLI.
-        if self.eventType == "ROOT":
+        if self._eventType == "ROOT":
             self._sourceEvent = None
             self._sourceEventHash = "ROOT"
+            self.__setAncestry(None)
             return
 
         if not isinstance(sourceEvent, SpiderFootEvent):
             raise TypeError(f"sourceEvent is {type(sourceEvent)}; expected SpiderFootEvent()")
 
         self._sourceEvent = sourceEvent
-        self._sourceEventHash = self.sourceEvent.hash
+        self._sourceEventHash = sourceEvent.hash
+        self.__setAncestry(sourceEvent)
+
+    def __setAncestry(self, sourceEvent):
+        """Derive the ancestry and depth of the event from its source event.
+
+        Args:
+            sourceEvent (SpiderFootEvent): source event, or None for the ROOT event
+        """
+        if sourceEvent is None:
+            self._ancestry = frozenset()
+            self._depth = 0
+            return
+
+        # The set is built once per source event and shared by its children
+        if sourceEvent._lineage is None:
+            key = sourceEvent.ancestryKey
+            ancestry = sourceEvent._ancestry
+            sourceEvent._lineage = ancestry if key in ancestry else ancestry | {key}
+
+        self._ancestry = sourceEvent._lineage
+        self._depth = sourceEvent._depth + 1
+
+    @staticmethod
+    def _checkEventType(eventType):
+        """
+        Args:
+            eventType (str): type of data for this event
+
+        Returns:
+            str: interned event type
+
+        Raises:
+            TypeError: eventType type was invalid
+            ValueError: eventType value was invalid
+        """
+        if not isinstance(eventType, str):
+            raise TypeError(f"eventType is {type(eventType)}; expected str()")
+
+        if not eventType:
+            raise ValueError("eventType is empty")
+
+        return sys.intern(eventType)
+
+    @staticmethod
+    def _checkPercent(name, value):
+        """
+        Args:
+            name (str): name of the field
+            value (int): value from 0 to 100
+
+        Returns:
+            int: value
+
+        Raises:
+            TypeError: value type was invalid
+            ValueError: value was invalid
+        """
+        if not isinstance(value, int):
+            raise TypeError(f"{name} is {type(value)}; expected int()")
+
+        if not 0 <= value <= 100:
+            raise ValueError(f"{name} value is {value}; expected 0 - 100")
+
+        return value
+
+    @staticmethod
+    def _checkModule(module, eventType):
+        """
+        Args:
+            module (str): module
+            eventType (str): event type; only ROOT events may have no module
+
+        Returns:
+            str: interned module name
+
+        Raises:
+            TypeError: module type was invalid
+            ValueError: module value was invalid
+        """
+        if not isinstance(module, str):
+            raise TypeError(f"module is {type(module )}; expected str()")
+
+        if not module:
+            if eventType != "ROOT":
+                raise ValueError("module is empty")
+
+        return sys.intern(module)
+
+    @staticmethod
+    def _checkData(data):
+        """
+        Args:
+            data (str): data
+
+        Returns:
+            str: data
+
+        Raises:
+            TypeError: data type was invalid
+            ValueError: data value was invalid
+        """
+        if not isinstance(data, str):
+            raise TypeError(f"data is {type(data)}; expected str()")
+
+        if not data:
+            raise ValueError(f"data is empty: '{str(data)}'")
+
+        return data
 
     @actualSource.setter
     def actualSource(self, actualSource):
+        self.__checkFrozen("actualSource")
         self._actualSource = actualSource
 
     @moduleDataSource.setter
     def moduleDataSource(self, moduleDataSource):
+        self.__checkFrozen("moduleDataSource")
         self._moduleDataSource = moduleDataSource
 
+    def __checkFrozen(self, attribute):
+        """Refuse to modify an event which has already been emitted.
+
+        Args:
+            attribute (str): name of the attribute being set
+
+        Raises:
+            AttributeError: event is frozen
+        """
+        if self._frozen:
+            raise AttributeError(f"Cannot set {attribute} on {self.eventType} event; the event has been emitted and is shared by other modules")
+
+    def freeze(self):
+        """Make the event immutable.
+
+        Called by notifyListeners() before the event is passed to other modules,
+        so that every listener can share the same instance.
+        """
+        self._frozen = True
+
+    def moveDataTo(self, blobStore):
+        """Keep the event's data on disk if it is at least as long as the
+        blob store's threshold. Called by notifyListeners() before the event
+        is passed to other modules.
+
+        Args:
+            blobStore (SpiderFootBlobStore): blob store
+        """
+        data = self._data
+        if data.__class__ is not str or len(data) < blobStore.threshold:
+            return
+
+        # derived from the data, so computed while it is still in memory
+        self._ancestryKey = self.ancestryKey
+        self._data = blobStore.put(data)
+
+    def attachArena(self, arena):
+        """Let the event reference its source event through an arena rather
+        than keep it alive. Called by SpiderFootEventArena.add().
+
+        Args:
+            arena (SpiderFootEventArena): arena
+        """
+        self._arena = arena
+        if isinstance(self._sourceEvent, SpiderFootEvent):
+            self._sourceEvent = weakref.ref(self._sourceEvent)
+
+    def __copy__(self):
+        """Create a mutable shallow copy of the event.
+
+        The copy has the same hash and source event as the original.
+
+        Returns:
+            SpiderFootEvent: unfrozen copy of the event
+        """
+        evt = self.__class__.__new__(self.__class__)
+        for attr in self.__slots__:
+            if attr != '__weakref__':
+                setattr(evt, attr, getattr(self, attr))
+        evt._frozen = False
+        return evt
+
+    def pack(self):
+        """Compact, picklable form of the event, without its source event.
+
+        Used to pass events between processes. The receiving side rebuilds
+        the event with unpack(), given the events it already knows, so each
+        event only needs to be sent once. Data kept on disk is passed as its
+        SpiderFootBlob handle.
+
+        Returns:
+            tuple: packed event
+        """
+        return (
+            self.hash,
+            self._generated,
+            self._eventType,
+            self._data,
+            self._module,
+            self._sourceEventHash,
+            self._confidence,
+            self._visibility,
+            self._risk,
+            self._moduleDataSource,
+            self._actualSource
+        )
+
+    @classmethod
+    def unpack(cls, packed, events):
+        """Rebuild an event packed with pack().
+
+        The event keeps its hash, and is linked to its source event.
+
+        Args:
+            packed (tuple): packed event
+            events (dict): known events, keyed by hash, including the source
+                event, or a SpiderFootEventArena
+
+        Returns:
+            SpiderFootEvent: event
+
+        Raises:
+            ValueError: source event is unknown
+        """
+        evt = cls.__new__(cls)
+        evt._frozen = False
+        evt._ancestryKey = None
+        evt._lineage = None
+        evt._id = None
+        evt._arena = None
+        evt._sourceEvent = None
+        (
+            evt._hash,
+            evt._generated,
+            evt._eventType,
+            evt._data,
+            evt._module,
+            evt._sourceEventHash,
+            evt._confidence,
+            evt._visibility,
+            evt._risk,
+            evt._moduleDataSource,
+            evt._actualSource
+        ) = packed
+
+        if evt._eventType != "ROOT":
+            evt._sourceEvent = events.get(evt._sourceEventHash)
+            if evt._sourceEvent is None:
+                raise ValueError(f"Unknown source event {evt._sourceEventHash} for {evt._eventType} event")
+
+        evt.__setAncestry(evt._sourceEvent)
+
+        return evt
+
     def asDict(self):
         """
         Returns:
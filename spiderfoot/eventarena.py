@@ -0,0 +1,200 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+from .event import SpiderFootEvent
+
+
+class SpiderFootEventArena():
+    """Scan wide register of events, bounding the memory they use.
+
+    Events added to the arena reference their source event by hash instead
+    of keeping it alive, so that a retained event no longer pins its whole
+    ancestry. The arena keeps the most recently added events (the window)
+    in memory. Older events stay available as long as anything else uses
+    them, and are otherwise loaded back from tbl_scan_results when needed.
+
+    Events are only let go of once they are both out of the window and
+    stored in the database (see stored()), so a source event can always be
+    found.
+
+    Note:
+        Events loaded back from the database hold the data as it was
+        stored, which may have been truncated (see the maxstorage option of
+        sfp__stor_db).
+
+    Attributes:
+        window (int): number of recent events kept in memory
+        loaded (int): number of events loaded back from the database
+    """
+
+    def __init__(self, window, dbh, scanId):
+        """Initialize the event arena.
+
+        Args:
+            window (int): number of recent events kept in memory
+            dbh (SpiderFootDb): database handle, for events no longer in memory
+            scanId (str): scan instance ID
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(window, int):
+            raise TypeError(f"window is {type(window)}; expected int()")
+        if window < 1:
+            raise ValueError(f"window value is {window}; expected 1 or more")
+        if not isinstance(scanId, str):
+            raise TypeError(f"scanId is {type(scanId)}; expected str()")
+
+        self.window = window
+        self.loaded = 0
+        self._dbh = dbh
+        self._scanId = scanId
+        self._lock = threading.RLock()
+        # recent events, oldest first
+        self._recent = OrderedDict()
+        # events out of the window but not stored yet
+        self._unstored = dict()
+        # hashes of events not stored yet
+        self._pending = set()
+        # every event still in memory
+        self._live = weakref.WeakValueDictionary()
+        self._root = None
+
+    def add(self, sfEvent):
+        """Add an event to the arena.
+
+        From here on, the event references its source event through the
+        arena. Adding an event again only refreshes its place in the window.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+
+        Raises:
+            TypeError: sfEvent type was invalid
+        """
+        if not isinstance(sfEvent, SpiderFootEvent):
+            raise TypeError(f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent()")
+
+        eventHash = sfEvent.hash
+
+        with self._lock:
+            if eventHash in self._recent:
+                self._recent.move_to_end(eventHash)
+                return
+
+            if sfEvent.eventType == "ROOT":
+                self._root = sfEvent
+            elif eventHash not in self._live:
+                self._pending.add(eventHash)
+
+            sfEvent.attachArena(self)
+            self._live[eventHash] = sfEvent
+            self._keep(eventHash, sfEvent)
+
+    def _keep(self, eventHash, sfEvent):
+        """Keep an event in the window, letting go of the oldest event if the
+        window is full, unless that one isn't stored yet.
+
+        Args:
+            eventHash (str): event hash
+            sfEvent (SpiderFootEvent): event
+        """
+        self._recent[eventHash] = sfEvent
+
+        while len(self._recent) > self.window:
+            oldHash, oldEvent = self._recent.popitem(last=False)
+            if oldHash in self._pending:
+                self._unstored[oldHash] = oldEvent
+
+    def stored(self, eventHash):
+        """Note that an event has been stored in the database, so it can be
+        loaded back once it is no longer in memory.
+
+        Args:
+            eventHash (str): event hash
+        """
+        with self._lock:
+            self._pending.discard(eventHash)
+            self._unstored.pop(eventHash, None)
+
+    def get(self, eventHash):
+        """Find an event, loading it from the database if needed.
+
+        Args:
+            eventHash (str): event hash
+
+        Returns:
+            SpiderFootEvent: event, or None if it is unknown
+        """
+        with self._lock:
+            if eventHash == "ROOT":
+                return self._root
+
+            sfEvent = self._live.get(eventHash)
+            if sfEvent is not None:
+                return sfEvent
+
+            return self._load(eventHash)
+
+    def _load(self, eventHash):
+        """Load an event from the database, along with those of its source
+        events which are no longer in memory.
+
+        Args:
+            eventHash (str): event hash
+
+        Returns:
+            SpiderFootEvent: event, or None if it is unknown
+        """
+        rows = list()
+        source = None
+        while True:
+            row = self._dbh.scanEventGet(self._scanId, eventHash)
+            if row is None:
+                return None
+
+            rows.append(row)
+            eventHash = row[8]
+            if eventHash == "ROOT":
+                source = self._root
+                break
+
+            source = self._live.get(eventHash)
+            if source is not None:
+                break
+
+        # Rebuild from the oldest ancestor down. Loaded events are not
+        # attached to the arena, so they keep their sources alive, and only
+        # the requested event is kept in the window.
+        for row in reversed(rows):
+            sfEvent = SpiderFootEvent.unpack(
+                (row[0], float(row[2]), row[1], row[7], row[6], row[8], row[3], row[4], row[5], None, None),
+                {source.hash: source} if source is not None else dict()
+            )
+            sfEvent.freeze()
+            self._live[sfEvent.hash] = sfEvent
+            self.loaded += 1
+            source = sfEvent
+
+        self._keep(source.hash, source)
+
+        return source
+
+    def stats(self):
+        """Statistics of the arena.
+
+        Returns:
+            dict: events in the window, out of the window but not stored yet,
+                in memory in total, and loaded back from the database
+        """
+        with self._lock:
+            return {
+                'window': len(self._recent),
+                'unstored': len(self._unstored),
+                'live': len(self._live),
+                'loaded': self.loaded
+            }
+
+# end of SpiderFootEventArena class
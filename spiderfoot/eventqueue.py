@@ -0,0 +1,493 @@
+import asyncio
+import os
+import pickle
+import queue
+import tempfile
+from collections import deque
+
+from .event import SpiderFootEvent
+
+
+class SpiderFootAsyncEventQueue():
+    """Scanner event queue for the asyncio scan mode.
+
+    Events are consumed by the scanner's dispatcher coroutine on the event
+    loop, but are produced both by async modules running on the loop and by
+    synchronous modules running in the loop's executor threads, so put() may
+    be called from any thread.
+    """
+
+    def __init__(self, loop):
+        """Initialize the event queue.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): event loop the queue is consumed on
+
+        Raises:
+            TypeError: loop type was invalid
+        """
+        if not isinstance(loop, asyncio.AbstractEventLoop):
+            raise TypeError(f"loop is {type(loop)}; expected asyncio.AbstractEventLoop()")
+
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self.highWaterMark = 0
+
+    def put(self, item):
+        """Put an item on the queue.
+
+        Items put from the event loop's own thread, or before the loop has
+        started, are queued immediately. Items put from any other thread are
+        handed over to the loop thread, in order.
+
+        Args:
+            item (SpiderFootEvent): event, or None to wake up the dispatcher
+        """
+        try:
+            running = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            running = False
+
+        if running or not self._loop.is_running():
+            self._putNow(item)
+        else:
+            self._loop.call_soon_threadsafe(self._putNow, item)
+
+    def _putNow(self, item):
+        self._queue.put_nowait(item)
+        self.highWaterMark = max(self.highWaterMark, self._queue.qsize())
+
+    async def get(self):
+        """Remove and return an item from the queue, waiting until one is available.
+
+        Returns:
+            SpiderFootEvent: event, or None
+        """
+        return await self._queue.get()
+
+    def empty(self):
+        """
+        Returns:
+            bool: queue is empty
+        """
+        return self._queue.empty()
+
+    def qsize(self):
+        """
+        Returns:
+            int: number of items in the queue
+        """
+        return self._queue.qsize()
+
+# end of SpiderFootAsyncEventQueue class
+
+
+class SpiderFootPackedEventQueue():
+    """Outgoing event queue of a module running in a worker process.
+
+    Events put on the queue are sent to the scanner process in packed form
+    (see SpiderFootEvent.pack()), as ("event", packed) messages on a
+    multiprocessing queue, and remembered so that later events received from
+    the scanner can be linked to them.
+    """
+
+    def __init__(self, queue, events):
+        """Initialize the event queue.
+
+        Args:
+            queue (multiprocessing.Queue): queue to the scanner process
+            events (dict): events known to the worker process, keyed by hash
+        """
+        self._queue = queue
+        self._events = events
+
+    def put(self, item):
+        """Send an event to the scanner process.
+
+        Args:
+            item (SpiderFootEvent): event; wakeups (None) are not forwarded
+        """
+        if item is None:
+            return
+
+        self._events[item.hash] = item
+        self._queue.put(("event", item.pack()))
+
+# end of SpiderFootPackedEventQueue class
+
+
+class SpiderFootEventBuffer():
+    """Storage behind SpiderFootEventQueue and SpiderFootAsyncModuleQueue.
+
+    Events are returned in order of priority, if a priority function is
+    given, and in the order they were added within the same priority.
+    Beyond a limit, events overflow to a temporary file instead of memory.
+    Only the packed event is written out (see SpiderFootEvent.pack()). The
+    source event, needed to rebuild the event, is looked up through the
+    event's arena if it has one, and otherwise stays referenced in memory.
+
+    Attributes:
+        highWaterMark (int): largest number of items held at once
+        spilled (int): number of events written to disk
+    """
+
+    def __init__(self, limit=0, priority=None):
+        """Initialize the buffer.
+
+        Args:
+            limit (int): number of items kept in memory, or 0 to never spill to disk
+            priority (function): returns the priority of an event, smaller
+                numbers first, or None to return events in the order they were added
+        """
+        self._limit = limit
+        self._priority = priority
+        # queued events by priority; spilled events are held as
+        # (file offset, source event or its hash, arena) tuples
+        self._levels = dict()
+        self._sentinels = deque()
+        self._count = 0
+        self._inMemory = 0
+        self._spillFile = None
+        self._spillQueued = 0
+        self.highWaterMark = 0
+        self.spilled = 0
+
+    def __len__(self):
+        return self._count + len(self._sentinels)
+
+    def append(self, item):
+        """Add an item to the buffer.
+
+        The shutdown sentinel (None) is always kept in memory, and only
+        returned once no events are left.
+
+        Args:
+            item (SpiderFootEvent): event, or None
+        """
+        if item is None:
+            self._sentinels.append(item)
+            self.highWaterMark = max(self.highWaterMark, len(self))
+            return
+
+        level = self._priority(item) if self._priority else 0
+        entries = self._levels.get(level)
+        if entries is None:
+            entries = self._levels[level] = deque()
+
+        if self._limit and self._inMemory >= self._limit:
+            if self._spillFile is None:
+                self._spillFile = tempfile.TemporaryFile(prefix="spiderfoot-")
+            self._spillFile.seek(0, os.SEEK_END)
+            offset = self._spillFile.tell()
+            pickle.dump(item.pack(), self._spillFile, pickle.HIGHEST_PROTOCOL)
+            if item.arena is not None:
+                entries.append((offset, item.sourceEventHash, item.arena))
+            else:
+                entries.append((offset, item.sourceEvent, None))
+            self._spillQueued += 1
+            self.spilled += 1
+        else:
+            entries.append(item)
+            self._inMemory += 1
+
+        self._count += 1
+        self.highWaterMark = max(self.highWaterMark, len(self))
+
+    def popleft(self):
+        """Remove and return the first item of the highest priority.
+
+        Returns:
+            SpiderFootEvent: event, or None
+
+        Raises:
+            IndexError: buffer is empty
+        """
+        if not self._count:
+            if not self._sentinels:
+                raise IndexError("pop from an empty buffer")
+            return self._sentinels.popleft()
+
+        level = min(self._levels) if len(self._levels) > 1 else next(iter(self._levels))
+        entries = self._levels[level]
+        entry = entries.popleft()
+        if not entries:
+            del self._levels[level]
+        self._count -= 1
+
+        if not isinstance(entry, tuple):
+            self._inMemory -= 1
+            return entry
+
+        offset, source, arena = entry
+        self._spillFile.seek(offset)
+        packed = pickle.load(self._spillFile)
+
+        if arena is not None:
+            item = SpiderFootEvent.unpack(packed, arena)
+            item.attachArena(arena)
+        else:
+            item = SpiderFootEvent.unpack(packed, {source.hash: source} if source is not None else dict())
+        item.freeze()
+
+        # reclaim the disk space once everything has been read back
+        self._spillQueued -= 1
+        if not self._spillQueued:
+            self._spillFile.seek(0)
+            self._spillFile.truncate()
+
+        return item
+
+    def clear(self):
+        """Remove every event, keeping the shutdown sentinels, and delete
+        the events written to disk without reading them back.
+
+        Returns:
+            int: number of events removed
+        """
+        count = self._count
+        self._levels = dict()
+        self._count = 0
+        self._inMemory = 0
+        self._spillQueued = 0
+        if self._spillFile is not None:
+            self._spillFile.close()
+            self._spillFile = None
+        return count
+
+# end of SpiderFootEventBuffer class
+
+
+class SpiderFootEventQueue(queue.Queue):
+    """Bounded event queue with a policy for when it is full, optionally
+    returning events in order of priority.
+
+    Policies:
+        block: put() blocks until there is room, as with queue.Queue
+        spill: events beyond maxsize are written to disk; put() never blocks
+        drop: events which don't fit are discarded and counted
+
+    The shutdown sentinel (None) is never dropped, and is only returned
+    once no events are left. stopWorkers() sends sentinels without waiting
+    for room, and can discard the events left first.
+
+    Attributes:
+        policy (str): policy for when the queue is full
+        dropped (int): number of events dropped
+        highWaterMark (int): largest number of items queued at once
+        spilled (int): number of events written to disk
+    """
+
+    policies = ["block", "spill", "drop"]
+
+    def __init__(self, maxsize=0, policy="block", priority=None):
+        """Initialize the event queue.
+
+        Args:
+            maxsize (int): maximum number of events queued (or kept in memory,
+                with the spill policy), or 0 for no limit
+            policy (str): policy for when the queue is full
+            priority (function): returns the priority of an event, smaller
+                numbers first, or None for a FIFO queue
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(maxsize, int):
+            raise TypeError(f"maxsize is {type(maxsize)}; expected int()")
+        if maxsize < 0:
+            raise ValueError(f"maxsize value is {maxsize}; expected 0 or more")
+        if policy not in self.policies:
+            raise ValueError(f"Invalid queue policy {policy}; expected one of {self.policies}")
+
+        self.policy = policy
+        self.dropped = 0
+        self._limit = maxsize
+        self._priorityFunc = priority
+        super().__init__(0 if policy == "spill" else maxsize)
+
+    def _init(self, maxsize):
+        self.queue = SpiderFootEventBuffer(self._limit if self.policy == "spill" else 0, self._priorityFunc)
+
+    @property
+    def highWaterMark(self):
+        return self.queue.highWaterMark
+
+    @property
+    def spilled(self):
+        return self.queue.spilled
+
+    def put(self, item, block=True, timeout=None):
+        """Put an event on the queue, applying the queue's policy if it is full.
+
+        Args:
+            item (SpiderFootEvent): event, or None
+            block (bool): block until there is room (block policy only)
+            timeout (float): seconds to block for
+
+        Raises:
+            queue.Full: no room (block policy only)
+        """
+        if self.policy == "drop" and item is not None:
+            try:
+                super().put(item, block=False)
+            except queue.Full:
+                with self.mutex:
+                    self.dropped += 1
+            return
+
+        super().put(item, block, timeout)
+
+    def stopWorkers(self, workers, discard=False):
+        """Send the shutdown sentinel (None) to each of the module's
+        workers, without waiting for room in the queue.
+
+        Args:
+            workers (int): number of sentinels to send
+            discard (bool): remove the queued events first, so that the
+                sentinels are returned next, as when the scan is aborted
+
+        Returns:
+            int: number of events removed
+        """
+        with self.mutex:
+            discarded = self.queue.clear() if discard else 0
+            self.unfinished_tasks -= discarded
+            for i in range(workers):
+                self._put(None)
+            self.unfinished_tasks += workers
+            if not self.unfinished_tasks:
+                self.all_tasks_done.notify_all()
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+        return discarded
+
+# end of SpiderFootEventQueue class
+
+
+class SpiderFootAsyncModuleQueue(asyncio.Queue):
+    """Bounded module event queue for the asyncio scan mode, with the same
+    policies and priority ordering as SpiderFootEventQueue.
+
+    Attributes:
+        policy (str): policy for when the queue is full
+        dropped (int): number of events dropped
+        highWaterMark (int): largest number of items queued at once
+        spilled (int): number of events written to disk
+    """
+
+    def __init__(self, maxsize=0, policy="block", priority=None):
+        """Initialize the event queue.
+
+        Args:
+            maxsize (int): maximum number of events queued (or kept in memory,
+                with the spill policy), or 0 for no limit
+            policy (str): policy for when the queue is full
+            priority (function): returns the priority of an event, smaller
+                numbers first, or None for a FIFO queue
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(maxsize, int):
+            raise TypeError(f"maxsize is {type(maxsize)}; expected int()")
+        if maxsize < 0:
+            raise ValueError(f"maxsize value is {maxsize}; expected 0 or more")
+        if policy not in SpiderFootEventQueue.policies:
+            raise ValueError(f"Invalid queue policy {policy}; expected one of {SpiderFootEventQueue.policies}")
+
+        self.policy = policy
+        self.dropped = 0
+        self._limit = maxsize
+        self._priorityFunc = priority
+        super().__init__(0 if policy == "spill" else maxsize)
+        # shutdown sentinels still to be returned by get(), kept apart from
+        # the events so that they never wait for room
+        self._sentinels = 0
+        self._stopping = asyncio.Event()
+
+    def _init(self, maxsize):
+        self._queue = SpiderFootEventBuffer(self._limit if self.policy == "spill" else 0, self._priorityFunc)
+
+    @property
+    def highWaterMark(self):
+        return self._queue.highWaterMark
+
+    @property
+    def spilled(self):
+        return self._queue.spilled
+
+    def put_nowait(self, item):
+        """Put an event on the queue without blocking, applying the queue's
+        policy if it is full.
+
+        Args:
+            item (SpiderFootEvent): event, or None
+
+        Raises:
+            asyncio.QueueFull: no room (block policy only)
+        """
+        if self.policy == "drop" and item is not None:
+            try:
+                super().put_nowait(item)
+            except asyncio.QueueFull:
+                self.dropped += 1
+            return
+
+        super().put_nowait(item)
+
+    async def get(self):
+        """Remove and return an event, waiting for one if the queue is
+        empty. Once stopWorkers() has been called and no events are left,
+        the shutdown sentinel (None) is returned instead, which isn't to be
+        marked done with task_done().
+
+        Returns:
+            SpiderFootEvent: event, or None
+        """
+        while True:
+            if not self.empty():
+                return self.get_nowait()
+
+            if self._sentinels:
+                self._sentinels -= 1
+                if not self._sentinels:
+                    self._stopping.clear()
+                return None
+
+            getter = asyncio.ensure_future(super().get())
+            stopping = asyncio.ensure_future(self._stopping.wait())
+            try:
+                await asyncio.wait((getter, stopping), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                stopping.cancel()
+                getter.cancel()
+
+            if getter.done() and not getter.cancelled():
+                return getter.result()
+
+    def stopWorkers(self, workers, discard=False):
+        """Send the shutdown sentinel (None) to each of the module's
+        workers, without waiting for room in the queue.
+
+        Args:
+            workers (int): number of sentinels to send
+            discard (bool): remove the queued events first, so that the
+                sentinels are returned next, as when the scan is aborted
+
+        Returns:
+            int: number of events removed
+        """
+        # spilled events are dropped along with the spill file, rather than
+        # read back only to be thrown away
+        discarded = self._queue.clear() if discard else 0
+        for i in range(discarded):
+            self.task_done()
+
+        self._sentinels += workers
+        if self._sentinels:
+            self._stopping.set()
+        return discarded
+
+# end of SpiderFootAsyncModuleQueue class
@@ -0,0 +1,465 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class SpiderFootHttpCache():
+    """Persistent cache of HTTP responses, shared by scans.
+
+    Responses to GET and HEAD requests are stored compressed on disk, one
+    file per request, named after a hash of the request: its method, URL,
+    body, cookies and headers (but ignoredHeaders). Requests sent with
+    different credentials, whether in the URL or in a header such as
+    Authorization, so never share a response. Only the hash of a request
+    is stored, never its credentials.
+
+    A response is reused for ttl hours, whatever caching headers the
+    server sent, as the cache is meant to spare scans of the same target
+    from fetching the same data day after day. Responses the server marks
+    no-store or private are not stored, and neither are JSON bodies
+    reporting an error (see isError()), which APIs often send with a 200
+    status. Once stale, a response with an ETag or Last-Modified header is
+    revalidated with a conditional request, and reused if unchanged. The
+    least recently used responses are removed once the cache grows past
+    maxSize bytes.
+
+    All methods are thread safe, and several processes can share the same
+    directory.
+
+    Attributes:
+        path (str): directory holding the responses
+        ttl (float): hours a response is reused for, unless set by module
+        maxSize (int): most bytes kept on disk
+        moduleTtls (dict): hours a response is reused for, by module name
+        hits (int): number of responses reused
+        revalidated (int): number of stale responses reused once revalidated
+        misses (int): number of requests sent
+        stored (int): number of responses stored
+        evicted (int): number of responses removed to make room
+    """
+
+    log = logging.getLogger(__name__)
+
+    # methods of the requests cached
+    cacheableMethods = ('GET', 'HEAD')
+
+    # request headers left out of the key, as they don't change the
+    # response; the user agent may be picked at random for each request
+    ignoredHeaders = ('user-agent',)
+
+    # Cache-Control directives of the responses never stored
+    noStoreDirectives = ('no-store', 'private')
+
+    # largest JSON body checked for an error (see isError())
+    errorCheckSize = 65536
+
+    # response headers not kept, as they no longer apply or may hold secrets
+    dropHeaders = ('content-encoding', 'content-length', 'transfer-encoding', 'set-cookie')
+
+    # status codes of the responses stored
+    cacheableStatus = (200, 203, 204, 404, 410)
+
+    # share of maxSize left in use once least recently used responses are removed
+    evictTo = 0.9
+
+    def __init__(self, path, ttl, maxSize, moduleTtls=None):
+        """Initialize the cache.
+
+        Args:
+            path (str): directory holding the responses, created if needed
+            ttl (float): hours a response is reused for, unless set by module
+            maxSize (int): most bytes kept on disk
+            moduleTtls (dict): hours a response is reused for, by module
+                name, 0 to not cache the requests of a module
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: the directory could not be created
+        """
+        if not isinstance(path, str):
+            raise TypeError(f"path is {type(path)}; expected str()")
+        if not isinstance(ttl, (int, float)):
+            raise TypeError(f"ttl is {type(ttl)}; expected float()")
+        if ttl < 0:
+            raise ValueError(f"ttl value is {ttl}; expected 0 or more")
+        if not isinstance(maxSize, int):
+            raise TypeError(f"maxSize is {type(maxSize)}; expected int()")
+        if maxSize < 1:
+            raise ValueError(f"maxSize value is {maxSize}; expected 1 or more")
+        if moduleTtls is None:
+            moduleTtls = dict()
+        if not isinstance(moduleTtls, dict):
+            raise TypeError(f"moduleTtls is {type(moduleTtls)}; expected dict()")
+
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            raise IOError(f"Could not create HTTP cache directory {path}: {e}")
+
+        self.path = path
+        self.ttl = ttl
+        self.maxSize = maxSize
+        self.moduleTtls = moduleTtls
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._bytes = sum(size for name, mtime, size in self._entries())
+
+    @staticmethod
+    def parseTtls(ttls):
+        """Parse hours responses are reused for, by module.
+
+        Args:
+            ttls (str): comma separated module=hours pairs, such as
+                "sfp_crt=24,sfp_commoncrawl=168"
+
+        Returns:
+            dict: hours, by module name
+
+        Raises:
+            ValueError: ttls was not valid
+        """
+        parsed = dict()
+        for pair in (ttls or "").split(","):
+            if not pair.strip():
+                continue
+            module, sep, hours = pair.partition("=")
+            if not sep or not module.strip():
+                raise ValueError(f"Invalid module HTTP cache time: {pair}")
+            hours = float(hours)
+            if hours < 0:
+                raise ValueError(f"Invalid module HTTP cache time: {pair}")
+            parsed[module.strip()] = hours
+        return parsed
+
+    def ttlFor(self, module):
+        """Hours the responses to a module's requests are reused for.
+
+        Args:
+            module (str): module name, such as sfp_crt or modules.sfp_crt,
+                or None for requests not made by a module
+
+        Returns:
+            float: hours, 0 to not cache the requests
+        """
+        if module:
+            return self.moduleTtls.get(module.rsplit(".", 1)[-1], self.ttl)
+        return self.ttl
+
+    def key(self, method, url, body=None, headers=None, cookies=None):
+        """Key of a request.
+
+        Args:
+            method (str): HTTP method
+            url (str): URL
+            body (str): request body, a dict of form fields or a string;
+                JSON bodies are normalized, so that the order of their keys
+                doesn't matter
+            headers (dict): request headers, all but ignoredHeaders of
+                which are used
+            cookies (dict): request cookies
+
+        Returns:
+            str: key
+        """
+        selected = dict()
+        for name, value in (headers or dict()).items():
+            if str(name).lower() not in self.ignoredHeaders:
+                selected[str(name).lower()] = str(value)
+
+        material = json.dumps([
+            method.upper(),
+            url,
+            self._digest(body),
+            sorted(selected.items()),
+            self._digest(cookies)
+        ])
+
+        return hashlib.sha256(material.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    @staticmethod
+    def _digest(data):
+        """Hash of a request body or cookies, so that secrets they may hold
+        are not part of the key as is.
+
+        Args:
+            data (str): form fields, string or bytes
+
+        Returns:
+            str: hash, or None if there is no data
+        """
+        if data is None:
+            return None
+
+        if isinstance(data, dict):
+            data = urllib.parse.urlencode(sorted(data.items()), doseq=True)
+
+        if isinstance(data, str):
+            try:
+                data = json.dumps(json.loads(data), sort_keys=True, separators=(',', ':'))
+            except ValueError:
+                pass
+            data = data.encode('utf-8', 'surrogatepass')
+        elif not isinstance(data, bytes):
+            data = str(data).encode('utf-8', 'surrogatepass')
+
+        return hashlib.sha256(data).hexdigest()
+
+    def fetch(self, key, ttl, url, send):
+        """Response to a request, from the cache if it holds a fresh one,
+        or else sent with send() and stored.
+
+        Args:
+            key (str): key of the request, see key()
+            ttl (float): hours a response is reused for
+            url (str): URL of the request
+            send (function): sends the request and returns the
+                requests.Response, given a dict of headers to add to it
+
+        Returns:
+            requests.Response: response
+        """
+        entry = self._load(key)
+
+        if entry is not None and time.time() - entry['time'] < ttl * 3600:
+            with self._lock:
+                self.hits += 1
+            return self._response(entry, url)
+
+        validators = dict()
+        if entry is not None:
+            if entry['headers'].get('etag'):
+                validators['If-None-Match'] = entry['headers']['etag']
+            if entry['headers'].get('last-modified'):
+                validators['If-Modified-Since'] = entry['headers']['last-modified']
+
+        res = send(validators)
+
+        if validators and res.status_code == 304:
+            entry['time'] = time.time()
+            self._store(key, entry)
+            with self._lock:
+                self.revalidated += 1
+            return self._response(entry, url)
+
+        with self._lock:
+            self.misses += 1
+
+        # a redirected response would be stored as the answer to the URL it
+        # was redirected to, rather than to the request made
+        if self.isStorable(res):
+            headers = {k.lower(): v for k, v in res.headers.items() if k.lower() not in self.dropHeaders}
+            self._store(key, {
+                'time': time.time(),
+                'status': res.status_code,
+                'headers': headers,
+                'encoding': res.encoding,
+                'content': res.content
+            })
+
+        return res
+
+    def isStorable(self, res):
+        """Check whether a response may be stored, from its status,
+        Cache-Control header and body.
+
+        Args:
+            res (requests.Response): response, with its content read, or
+                None if cut short at a size limit
+
+        Returns:
+            bool: response may be stored
+        """
+        if res.content is None or res.status_code not in self.cacheableStatus or res.history:
+            return False
+
+        directives = [d.strip().split("=")[0].lower() for d in res.headers.get('cache-control', '').split(",")]
+        if any(d in self.noStoreDirectives for d in directives):
+            return False
+
+        return not self.isError(res)
+
+    def isError(self, res):
+        """Check whether a response body is a JSON object reporting an
+        error, such as {"error": "Invalid API key"}, or with "success" set
+        to false. Bodies larger than errorCheckSize aren't checked.
+
+        Args:
+            res (requests.Response): response, with its content read
+
+        Returns:
+            bool: body reports an error
+        """
+        if 'json' not in res.headers.get('content-type', '').lower():
+            return False
+
+        content = res.content
+        if not content or len(content) > self.errorCheckSize or not content.lstrip().startswith(b"{"):
+            return False
+
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return False
+
+        if not isinstance(data, dict):
+            return False
+
+        return bool(data.get('error') or data.get('errors')) or data.get('success') is False
+
+    def _response(self, entry, url):
+        """Response rebuilt from a cache entry.
+
+        Args:
+            entry (dict): cache entry
+            url (str): URL of the request
+
+        Returns:
+            requests.Response: response
+        """
+        res = requests.Response()
+        res.status_code = entry['status']
+        res.headers = CaseInsensitiveDict(entry['headers'])
+        res.encoding = entry['encoding']
+        res.url = url
+        res._content = entry['content']
+        res._content_consumed = True
+        return res
+
+    def _load(self, key):
+        """Read a cache entry, marking it as recently used.
+
+        Args:
+            key (str): key of the request
+
+        Returns:
+            dict: cache entry, or None if there is none
+        """
+        path = os.path.join(self.path, key)
+        try:
+            with open(path, 'rb') as f:
+                raw = zlib.decompress(f.read())
+            os.utime(path)
+        except (OSError, zlib.error):
+            return None
+
+        meta, sep, content = raw.partition(b"\n")
+        try:
+            entry = json.loads(meta)
+        except ValueError:
+            return None
+
+        entry['content'] = content
+        return entry
+
+    def _store(self, key, entry):
+        """Write a cache entry, removing the least recently used ones if
+        the cache grows too large.
+
+        Args:
+            key (str): key of the request
+            entry (dict): cache entry
+        """
+        meta = {k: v for k, v in entry.items() if k != 'content'}
+        raw = zlib.compress(json.dumps(meta).encode('utf-8') + b"\n" + entry['content'])
+        if len(raw) > self.maxSize * self.evictTo:
+            return
+
+        path = os.path.join(self.path, key)
+        try:
+            oldSize = os.path.getsize(path)
+        except OSError:
+            oldSize = 0
+
+        # written in full before it can be seen, as other scans may be
+        # reading the cache
+        try:
+            fd, tmpPath = tempfile.mkstemp(dir=self.path, prefix=".")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(raw)
+                os.replace(tmpPath, path)
+            except OSError:
+                os.unlink(tmpPath)
+                raise
+        except OSError as e:
+            self.log.debug(f"Could not write HTTP response to the cache: {e}")
+            return
+
+        with self._lock:
+            self.stored += 1
+            self._bytes += len(raw) - oldSize
+            if self._bytes > self.maxSize:
+                self._evict()
+
+    def _entries(self):
+        """Responses on disk.
+
+        Returns:
+            list: (file name, last use time, size) tuples
+        """
+        entries = list()
+        try:
+            with os.scandir(self.path) as it:
+                for f in it:
+                    if f.name.startswith("."):
+                        continue
+                    try:
+                        st = f.stat()
+                    except OSError:
+                        continue
+                    entries.append((f.name, st.st_mtime, st.st_size))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self):
+        """Remove the least recently used responses until the cache is back
+        under its size limit. The caller holds the lock."""
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for name, mtime, size in entries)
+
+        for name, mtime, size in entries:
+            if total <= self.maxSize * self.evictTo:
+                break
+            try:
+                os.unlink(os.path.join(self.path, name))
+            except OSError:
+                continue
+            total -= size
+            self.evicted += 1
+
+        self._bytes = total
+
+    def stats(self):
+        """Statistics of the cache.
+
+        Returns:
+            dict: responses reused, reused once revalidated, requests sent,
+                responses stored, responses removed to make room, and bytes
+                on disk
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'stored': self.stored,
+                'evicted': self.evicted,
+                'bytes': self._bytes
+            }
+
+# end of SpiderFootHttpCache class
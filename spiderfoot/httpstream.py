@@ -0,0 +1,147 @@
+import codecs
+
+
+class SpiderFootHttpStream():
+    """Body of an HTTP response, read as it is downloaded.
+
+    fetchUrl() returns one in place of the content when asked to stream,
+    and uses one itself to enforce its size limit. At most sizeLimit bytes
+    are read: past that, reading stops and exceeded is set, so that a large
+    body is never held in memory. The connection is given back once the
+    body has been read in full or the stream is closed, along with the
+    pooled session it was received on, so callers should use the stream as
+    a context manager.
+
+    Attributes:
+        sizeLimit (int): most bytes read, or None for no limit
+        size (int): bytes read so far
+        exceeded (bool): the body was larger than sizeLimit
+    """
+
+    # bytes read from the connection at a time
+    chunkSize = 65536
+
+    def __init__(self, response, sizeLimit=None):
+        """Initialize the stream.
+
+        Args:
+            response (requests.Response): response, requested with stream=True
+            sizeLimit (int): most bytes read, or None for no limit
+        """
+        self.sizeLimit = sizeLimit
+        self.size = 0
+        self.exceeded = False
+        self._response = response
+        self._chunks = response.iter_content(self.chunkSize)
+        self._buffer = b""
+        self._done = False
+
+    def _next(self):
+        """Next chunk of the body.
+
+        Returns:
+            bytes: chunk, or b"" once the body has been read
+        """
+        if self._done:
+            return b""
+
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+
+            if self.sizeLimit is not None and self.size + len(chunk) > self.sizeLimit:
+                chunk = chunk[:self.sizeLimit - self.size]
+                self.exceeded = True
+                self.close()
+
+            self.size += len(chunk)
+            return chunk
+
+        self.close()
+        return b""
+
+    def read(self, size=-1):
+        """Read from the body.
+
+        Args:
+            size (int): most bytes to read, or -1 for the rest of the body
+
+        Returns:
+            bytes: data, b"" once the body has been read
+        """
+        data = [self._buffer]
+        length = len(self._buffer)
+
+        while size < 0 or length < size:
+            chunk = self._next()
+            if not chunk:
+                break
+            data.append(chunk)
+            length += len(chunk)
+
+        data = b"".join(data)
+        if size < 0:
+            self._buffer = b""
+            return data
+
+        self._buffer = data[size:]
+        return data[:size]
+
+    def __iter__(self):
+        """Chunks of the body, as they are downloaded.
+
+        Yields:
+            bytes: chunk
+        """
+        if self._buffer:
+            chunk, self._buffer = self._buffer, b""
+            yield chunk
+
+        while True:
+            chunk = self._next()
+            if not chunk:
+                return
+            yield chunk
+
+    def lines(self, encoding='utf-8'):
+        """Lines of the body, as they are downloaded, such as the records
+        of an NDJSON response. If the body was cut short at the size limit,
+        its last, incomplete line is left out.
+
+        Args:
+            encoding (str): character encoding of the body
+
+        Yields:
+            str: line, without its line break
+        """
+        decoder = codecs.getincrementaldecoder(encoding)('replace')
+        pending = ""
+
+        for chunk in self:
+            pending += decoder.decode(chunk)
+            lines = pending.split("\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip("\r")
+
+        pending += decoder.decode(b"", final=True)
+        if pending and not self.exceeded:
+            yield pending.rstrip("\r")
+
+    def close(self):
+        """Stop reading, giving the connection back."""
+        if self._done:
+            return
+        self._done = True
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return f"<SpiderFootHttpStream {self._response.url} ({self.size:,} bytes read)>"
+
+# end of SpiderFootHttpStream class
@@ -1,9 +1,14 @@
+import asyncio
 import logging
-import threading
+import multiprocessing as mp
+import os
 import queue
-from time import sleep
+import threading
+from collections import deque
 from copy import copy
 
+from .dedupe import SpiderFootDedupe
+
 
 class SpiderFootPlugin():
     """SpiderFootPlugin module object
@@ -22,6 +27,47 @@ class SpiderFootPlugin():
         _priority (int): Priority, smaller numbers should run first
         errorState (bool): error state of the module
         socksProxy (str): SOCKS proxy
+        _threadSafe (bool): handleEvent() may be called by several threads at once
+        _maxThreads (int): default number of worker threads for a thread safe module
+        _maxTasks (int): default number of events an async module handles at once in async scan mode
+        _isolated (bool): run the module in a worker process of its own
+        lock (threading.RLock): lock guarding module state shared between worker threads
+        running (bool): module is currently handling an event
+        _dedupe (SpiderFootDedupe): record of data already seen, shared by the scan
+        _arena (SpiderFootEventArena): register of the scan's events, if any
+        _blobStore (SpiderFootBlobStore): store on disk for large event data, if any
+
+    Note:
+        Modules run in a single worker thread unless they set _threadSafe to
+        True, in which case up to _maxThreads threads (or the _maxthreads
+        module option) drain the module's incomingEventQueue concurrently.
+
+        A thread safe module must not keep per-event state on self, and must
+        hold self.lock around any check-then-update of shared state, such as
+        the "if eventData in self.results: return; self.results[eventData] = True"
+        pattern used with tempStorage() dicts. Single dict reads and writes
+        are atomic and do not need the lock.
+
+        A module may define handleEvent() as a coroutine ("async def") and use
+        the async helpers of SpiderFoot, such as fetchUrlAsync() and
+        resolveHostAsync(). In async scan mode (the _asyncscan option) up to
+        _maxTasks (or the _maxtasks module option) events are handled at once
+        on the scanner's event loop, while synchronous modules are run in the
+        loop's thread pool. In threaded mode each worker thread runs the
+        coroutine on its own event loop.
+
+        CPU bound modules may set _isolated to True to run in a worker process
+        of their own, so that they don't hold the GIL of the scan process.
+        The module is set up again in the worker process, so it must not rely
+        on state set up elsewhere, and events are passed to and from it in
+        packed form (see SpiderFootEvent.pack()).
+
+        With the _eventpriority option, events queued for a module are handled
+        in the order of eventPriority() rather than in the order they arrived.
+
+        Modules should use seen() rather than tempStorage() dicts to skip data
+        they have already handled. Keys are kept compactly in a store shared
+        by all modules of the scan, and the check is thread safe.
     """
 
     log = logging.getLogger(__name__)
@@ -55,14 +101,65 @@ class SpiderFootPlugin():
     incomingEventQueue = None
     # Queue for produced events
     outgoingEventQueue = None
+    # Whether handleEvent() may run in several threads at once
+    _threadSafe = False
+    # Default number of worker threads, if the module is thread safe
+    _maxThreads = 1
+    # Default number of events handled at once, if handleEvent() is a coroutine
+    _maxTasks = 100
+    # Whether to run the module in a worker process
+    _isolated = False
+    # Record of data already seen, shared by the scan
+    _dedupe = None
+    # Register of the scan's events, if any
+    _arena = None
+    # Store on disk for large event data, if any
+    _blobStore = None
+    # Event types describing the target, handled first if they match it
+    _targetEventTypes = [
+        "ROOT", "DOMAIN_NAME", "INTERNET_NAME", "IP_ADDRESS", "IPV6_ADDRESS",
+        "NETBLOCK_OWNER", "NETBLOCKV6_OWNER", "NETBLOCK_MEMBER", "NETBLOCKV6_MEMBER"
+    ]
+    # Prefixes of low value bulk event types, handled last
+    _lowPriorityEventTypes = ("AFFILIATE_", "RAW_")
 
     def __init__(self):
         """Not really needed in most cases."""
 
-        # Whether the module is currently executing
-        self.running = False
-        # Holds the thread object when module threading is enabled
-        self.thread = None
+        # Number of worker threads currently handling an event
+        self._runningThreads = 0
+        # Holds the thread objects when module threading is enabled
+        self.threads = list()
+        # Holds the worker tasks in async scan mode
+        self.tasks = list()
+        # Guards module state shared between worker threads
+        self.lock = threading.RLock()
+
+    @property
+    def running(self):
+        """Whether the module is currently handling an event.
+
+        Returns:
+            bool: module is handling an event
+        """
+        return self._runningThreads > 0
+
+    def __getstate__(self):
+        """Module instances are deep copied along with the config, so leave
+        out the lock, threads, tasks, dedupe store, event arena and blob
+        store, which cannot be copied."""
+        state = self.__dict__.copy()
+        state.pop('lock', None)
+        state.pop('_dedupe', None)
+        state.pop('_arena', None)
+        state.pop('_blobStore', None)
+        state['threads'] = list()
+        state['tasks'] = list()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
 
     def _updateSocket(self, socksProxy):
         """Hack to override module's use of socket, replacing it with
@@ -124,6 +221,57 @@ class SpiderFootPlugin():
         """
         self.__sfdb__ = dbh
 
+    def setDedupe(self, dedupe):
+        """Set the record of data already seen, shared by the scan.
+
+        Args:
+            dedupe (SpiderFootDedupe): dedupe store
+
+        Raises:
+            TypeError: dedupe argument was invalid type
+        """
+        if not isinstance(dedupe, SpiderFootDedupe):
+            raise TypeError(f"dedupe is {type(dedupe)}; expected SpiderFootDedupe()")
+
+        self._dedupe = dedupe
+
+    def setArena(self, arena):
+        """Set the register of the scan's events, through which events
+        received from a worker process (see _isolated) find their source.
+
+        Args:
+            arena (SpiderFootEventArena): event arena
+        """
+        self._arena = arena
+
+    def setBlobStore(self, blobStore):
+        """Set the store on disk for large data of the events this module
+        produces, shared by the scan.
+
+        Args:
+            blobStore (SpiderFootBlobStore): blob store
+        """
+        self._blobStore = blobStore
+
+    def seen(self, data, eventType="", add=True):
+        """Check whether this module has already seen some data, and
+        remember it if not. Thread safe.
+
+        Args:
+            data (str|bytes|tuple): data, or a tuple of strings
+            eventType (str): event type, or another label keeping sets of keys apart
+            add (bool): remember the data if it has not been seen
+
+        Returns:
+            bool: data was seen before
+        """
+        if self._dedupe is None:
+            with self.lock:
+                if self._dedupe is None:
+                    self._dedupe = SpiderFootDedupe()
+
+        return self._dedupe.seen(self.__name__, eventType, data, add)
+
     def setScanId(self, scanId):
         """Set the scan ID.
 
@@ -222,41 +370,42 @@ class SpiderFootPlugin():
                 if eventName not in self.__outputFilter__:
                     return
 
-        storeOnly = False  # Under some conditions, only store and don't notify
-
         if not eventData:
             return
 
         if self.checkForStop():
             return
 
-        # Look back to ensure the original notification for an element
-        # is what's linked to children. For instance, sfp_dns may find
-        # xyz.abc.com, and then sfp_ripe obtains some raw data for the
-        # same, and then sfp_dns finds xyz.abc.com in there, we should
-        # suppress the notification of that to other modules, as the
-        # original xyz.abc.com notification from sfp_dns will trigger
-        # those modules anyway. This also avoids messy iterations that
-        # traverse many many levels.
-
-        # storeOnly is used in this case so that the source to dest
-        # relationship is made, but no further events are triggered
-        # from dest, as we are already operating on dest's original
-        # notification from one of the upstream events.
-
-        prevEvent = sfEvent.sourceEvent
-        while prevEvent is not None:
-            if prevEvent.sourceEvent is not None:
-                if prevEvent.sourceEvent.eventType == sfEvent.eventType and prevEvent.sourceEvent.data.lower() == eventData.lower():
-                    storeOnly = True
-                    break
-            prevEvent = prevEvent.sourceEvent
+        # Large data is read back from disk by whoever needs it, rather
+        # than held in memory for as long as the event is queued
+        if self._blobStore is not None:
+            sfEvent.moveDataTo(self._blobStore)
+
+        # The event is shared with every listener from here on
+        sfEvent.freeze()
 
         # output to queue if applicable
         if self.outgoingEventQueue is not None:
             self.outgoingEventQueue.put(sfEvent)
         # otherwise, call other modules directly
         else:
+            # Look back to ensure the original notification for an element
+            # is what's linked to children. For instance, sfp_dns may find
+            # xyz.abc.com, and then sfp_ripe obtains some raw data for the
+            # same, and then sfp_dns finds xyz.abc.com in there, we should
+            # suppress the notification of that to other modules, as the
+            # original xyz.abc.com notification from sfp_dns will trigger
+            # those modules anyway. This also avoids messy iterations that
+            # traverse many many levels.
+
+            # storeOnly is used in this case so that the source to dest
+            # relationship is made, but no further events are triggered
+            # from dest, as we are already operating on dest's original
+            # notification from one of the upstream events. The source
+            # event's ancestry holds the keys of every event above it,
+            # so this doesn't need to walk the chain.
+            storeOnly = sfEvent.sourceEvent is not None and sfEvent.ancestryKey in sfEvent.sourceEvent.ancestry
+
             self._listenerModules.sort(key=lambda m: m._priority)
 
             for listener in self._listenerModules:
@@ -334,41 +483,571 @@ class SpiderFootPlugin():
 
         return
 
-    def start(self):
-        self.thread = threading.Thread(target=self.threadWorker)
-        self.thread.start()
+    def eventPriority(self, sfEvent):
+        """Priority of an event queued for this module, if the _eventpriority
+        option is enabled. Events with smaller numbers are handled first.
 
-    def threadWorker(self):
+        Events are ranked by type first: events about the target itself
+        (matching SpiderFootTarget), then other events, then low value bulk
+        events such as AFFILIATE_* and RAW_* events. Within a rank, events
+        fewer hops away from the ROOT event come first.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+
+        Returns:
+            int: priority
+        """
+        eventType = sfEvent.eventType
+
+        if eventType.startswith(self._lowPriorityEventTypes):
+            rank = 2
+        elif eventType == "ROOT":
+            rank = 0
+        elif eventType in self._targetEventTypes and self._currentTarget and self._currentTarget.matches(sfEvent.data):
+            rank = 0
+        else:
+            rank = 1
+
+        return rank * 100 + min(sfEvent.depth, 99)
+
+    def maxThreads(self):
+        """Number of worker threads to run for this module.
+
+        Returns:
+            int: 1 unless the module is thread safe, otherwise the _maxthreads
+                module option or the module's _maxThreads default
+        """
+        if not self._threadSafe:
+            return 1
+
+        try:
+            threads = int(getattr(self, 'opts', dict()).get('_maxthreads', self._maxThreads))
+        except (TypeError, ValueError):
+            threads = self._maxThreads
+
+        return max(1, threads)
+
+    def maxTasks(self):
+        """Number of events this module handles at once in async scan mode.
+
+        Returns:
+            int: the _maxtasks module option or the module's _maxTasks default
+                if handleEvent() is a coroutine, otherwise maxThreads()
+        """
+        if not asyncio.iscoroutinefunction(self.handleEvent):
+            return self.maxThreads()
+
+        try:
+            tasks = int(getattr(self, 'opts', dict()).get('_maxtasks', self._maxTasks))
+        except (TypeError, ValueError):
+            tasks = self._maxTasks
+
+        return max(1, tasks)
+
+    def rateLimits(self):
+        """Limits on the rate of requests to the hosts this module queries.
+        The scanner sets them up before the scan starts, and they are then
+        enforced for every request sent with fetchUrl() or httpSession() by
+        any module of any scan in the process (see SpiderFootRateLimiter).
+
+        Modules declare their limits in the 'rateLimits' entry of their
+        meta, and may override this method to derive them from options.
+
+        Returns:
+            dict: limits by host name, each a dict of 'rate' (requests per
+                second), and optionally 'burst' (requests let through at
+                once) and 'jitter' (most seconds of random delay added to
+                requests held back)
+        """
+        return getattr(self, 'meta', dict()).get('rateLimits', dict())
+
+    def eventsInFlight(self):
+        """Number of events queued for this module or being handled by it.
+
+        Returns:
+            int: events in flight
+        """
+        if self.incomingEventQueue is None:
+            return 0
+
+        # The async scan mode's queues are only used on the event loop
+        # thread, where an event can't be taken off the queue without
+        # being counted as running before anything else gets to run.
+        if isinstance(self.incomingEventQueue, asyncio.Queue):
+            return self.incomingEventQueue.qsize() + self._runningThreads
+
+        return self.incomingEventQueue.unfinished_tasks
+
+    def _setupWorkers(self):
+        """Create the database handle and SpiderFoot object copy shared by
+        the module's worker threads or tasks."""
         try:
-            # create new database handle since we're in our own thread
+            # create new database handle for our own threads, writing
+            # through the scan's writer thread, if any
             from spiderfoot import SpiderFootDb
-            self.setDbh(SpiderFootDb(self.opts))
+            dbh = SpiderFootDb(self.opts)
+            if self.__sfdb__ is not None:
+                dbh.setWriter(self.__sfdb__.writer)
+            self.setDbh(dbh)
             self.sf = copy(self.sf)
             self.sf._dbh = self.__sfdb__
+            self.sf.component = self.__module__
+        except Exception as e:
+            import traceback
+            self.log.error(f"Exception ({e.__class__.__name__}) in module {self.__name__}."
+                           + traceback.format_exc())
+            self.errorState = True
+
+    def start(self):
+        """Start the module's worker threads, which all share one database
+        handle and one copy of the SpiderFoot object."""
 
-            if not (self.incomingEventQueue and self.outgoingEventQueue):
-                self.log.error("Please set up queues before starting module as thread")
+        if not (self.incomingEventQueue and self.outgoingEventQueue):
+            self.log.error("Please set up queues before starting module as thread")
+            return
+
+        if self._isolated:
+            self._startIsolated()
+            return
+
+        self._setupWorkers()
+
+        self.threads = list()
+        for i in range(self.maxThreads()):
+            thread = threading.Thread(target=self.threadWorker, name=f"{self.__name__}-{i}")
+            thread.start()
+            self.threads.append(thread)
+
+    def startAsync(self):
+        """Start the module's worker tasks on the running event loop, for the
+        async scan mode.
+
+        Returns:
+            list: the worker tasks; the scanner sends one shutdown sentinel
+                for each of them
+        """
+        if not (self.incomingEventQueue and self.outgoingEventQueue):
+            self.log.error("Please set up queues before starting module as task")
+            return list()
+
+        # isolated modules are fed by threads, from a regular queue
+        if self._isolated:
+            self._startIsolated()
+            return list()
+
+        self._setupWorkers()
+
+        self.tasks = [asyncio.ensure_future(self.asyncWorker()) for i in range(self.maxTasks())]
+        return self.tasks
+
+    def _startIsolated(self):
+        """Start the module's worker process, along with a thread feeding it
+        events from incomingEventQueue and a thread relaying its results to
+        outgoingEventQueue."""
+        ctx = mp.get_context("spawn")
+        self._isolatedQueue = ctx.Queue()
+        self._isolatedStop = ctx.Event()
+        # hashes of the events the worker process already knows
+        self._isolatedSent = set()
+        # events which may be the source of events produced by the worker
+        # process; with an event arena, only those of the events in flight
+        # are kept here, and the others are looked up in the arena
+        self._isolatedEvents = dict()
+        # hashes of the events to let go of once each event in flight is done
+        self._isolatedInFlight = deque()
+        # statistics of the worker process's database writer, once it exits
+        self._isolatedWriterStats = dict()
+        resultQueue = ctx.Queue()
+
+        # the module list isn't needed to run a module and is expensive to send
+        modOpts = {k: v for k, v in self.opts.items() if k != '__modules__'}
+        sfOpts = {k: v for k, v in self.sf.opts.items() if k != '__modules__'}
+
+        self._isolatedProcess = ctx.Process(
+            target=SpiderFootPlugin.isolatedWorker,
+            args=(self.__name__, modOpts, sfOpts, self.sf.socksProxy, self.getTarget(), self.__scanId__,
+                  self.__outputFilter__, self._blobStore, os.getpid(), self._isolatedQueue, resultQueue, self._isolatedStop),
+            name=f"SpiderFoot {self.__name__}",
+            daemon=True
+        )
+
+        # The scan process isn't daemonic (see startSpiderFootScanner()), as
+        # daemonic processes can't have children. The worker process exits
+        # by itself once the scan process is gone.
+        try:
+            self._isolatedProcess.start()
+        except Exception as e:
+            self.log.error(f"Unable to start worker process for module {self.__name__}: {e}")
+            self.errorState = True
+
+        receiver = threading.Thread(target=self.isolatedReceiver, args=(resultQueue,), name=f"{self.__name__}-results", daemon=True)
+        receiver.start()
+        self._isolatedReceiver = receiver
+
+        thread = threading.Thread(target=self.isolatedFeeder, name=f"{self.__name__}-0")
+        thread.start()
+        self.threads = [thread]
+
+    def isolatedFeeder(self):
+        """Send events from incomingEventQueue to the module's worker process
+        until the scanner sends the shutdown sentinel (None).
+
+        Each event is sent along with those of its source events the worker
+        process doesn't know yet. Events are only marked done once the worker
+        process reports them handled (see isolatedReceiver()).
+        """
+        while True:
+            sfEvent = self.incomingEventQueue.get()
+
+            if sfEvent is None:
+                self.log.debug(f"{self.__name__}.isolatedFeeder() got shutdown sentinel from incomingEventQueue.")
+                self._isolatedStop.set()
+                self._isolatedQueue.put(None)
+                self.incomingEventQueue.task_done()
+                return
+
+            with self.lock:
+                if self.errorState or self.checkForStop():
+                    if self._stopScanning:
+                        self._isolatedStop.set()
+                    self._isolatedDone(running=False)
+                    continue
+
+                packed = list()
+                kept = list()
+                evt = sfEvent
+                while evt is not None and evt.hash not in self._isolatedSent:
+                    packed.append(evt.pack())
+                    self._isolatedSent.add(evt.hash)
+                    self._isolatedEvents[evt.hash] = evt
+                    kept.append(evt.hash)
+                    evt = evt.sourceEvent
+                packed.reverse()
+
+                # the event may have been sent before, as the source of another
+                if sfEvent.hash not in self._isolatedEvents:
+                    self._isolatedEvents[sfEvent.hash] = sfEvent
+                    kept.append(sfEvent.hash)
+
+                if self._arena is not None:
+                    self._isolatedInFlight.append(kept)
+
+                self._runningThreads += 1
+                self._isolatedQueue.put(packed)
+
+    def isolatedReceiver(self, resultQueue):
+        """Relay the results of the module's worker process to
+        outgoingEventQueue until the worker process exits.
+
+        Args:
+            resultQueue (multiprocessing.Queue): queue from the worker process
+        """
+        from spiderfoot import SpiderFootEvent
+
+        while True:
+            try:
+                msg = resultQueue.get(timeout=5)
+            except queue.Empty:
+                if self._isolatedProcess.is_alive():
+                    continue
+
+                self.log.error(f"Worker process for module {self.__name__} exited unexpectedly.")
+                with self.lock:
+                    self.errorState = True
+                    # release the events it will never report as done
+                    while self._runningThreads:
+                        self._isolatedDone()
                 return
 
-            while not self.checkForStop():
+            if msg[0] == "event":
+                # the source event hash, see SpiderFootEvent.pack()
+                events = self._isolatedEvents
+                if self._arena is not None and msg[1][5] not in events:
+                    events = self._arena
+
                 try:
-                    sfEvent = self.incomingEventQueue.get_nowait()
-                    self.log.debug(f"{self.__name__}.threadWorker() got event, {sfEvent.eventType}, from incomingEventQueue.")
-                    self.running = True
-                    self.handleEvent(sfEvent)
-                    self.running = False
-                except queue.Empty:
-                    sleep(.3)
+                    sfEvent = SpiderFootEvent.unpack(msg[1], events)
+                except ValueError as e:
+                    self.log.error(f"Invalid event from worker process for module {self.__name__}: {e}")
                     continue
-        except KeyboardInterrupt:
-            self.log.warning(f"Interrupted module {self.__name__}.")
-            self._stopScanning = True
+
+                if self._blobStore is not None:
+                    sfEvent.moveDataTo(self._blobStore)
+                sfEvent.freeze()
+                with self.lock:
+                    self._isolatedEvents[sfEvent.hash] = sfEvent
+                    self._isolatedSent.add(sfEvent.hash)
+                    # produced while handling the oldest event in flight
+                    if self._isolatedInFlight:
+                        self._isolatedInFlight[0].append(sfEvent.hash)
+                self.outgoingEventQueue.put(sfEvent)
+            elif msg[0] == "done":
+                with self.lock:
+                    self._isolatedDone()
+            elif msg[0] == "error":
+                self.log.error(msg[1])
+                self.errorState = True
+            elif msg[0] == "exit":
+                self._isolatedWriterStats = msg[1]
+                return
+
+    def _isolatedDone(self, running=True):
+        """Mark an event sent to the worker process as done.
+
+        With an event arena, the events kept as possible sources of the
+        worker process's results while it handled the event are let go of,
+        as the arena can find them from now on.
+
+        Args:
+            running (bool): the event had been sent to the worker process
+        """
+        if running:
+            self._runningThreads -= 1
+            if self._isolatedInFlight:
+                for eventHash in self._isolatedInFlight.popleft():
+                    self._isolatedEvents.pop(eventHash, None)
+        self.incomingEventQueue.task_done()
+        if not self.incomingEventQueue.unfinished_tasks:
+            self.outgoingEventQueue.put(None)
+
+    @staticmethod
+    def isolatedWorker(modName, modOpts, sfOpts, socksProxy, target, scanId, outputFilter, blobStore, parentPid, eventQueue, resultQueue, stopEvent):
+        """Entry point of an isolated module's worker process.
+
+        Sets the module up and handles the packed events received on
+        eventQueue until the shutdown sentinel (None) is received. Events
+        produced by the module are sent back on resultQueue, followed by a
+        ("done",) message once each received event has been handled.
+
+        Args:
+            modName (str): module name
+            modOpts (dict): module options
+            sfOpts (dict): scan options
+            socksProxy (str): SOCKS proxy
+            target (SpiderFootTarget): scan target
+            scanId (str): scan instance ID
+            outputFilter (list): event types to filter from the module's output
+            blobStore (SpiderFootBlobStore): store on disk for large event data, or None
+            parentPid (int): process ID of the scan process
+            eventQueue (multiprocessing.Queue): queue of packed events to handle
+            resultQueue (multiprocessing.Queue): queue of results
+            stopEvent (multiprocessing.Event): set when the scan is stopping
+        """
+        import signal
+        import traceback
+
+        from sflib import SpiderFoot
+        from spiderfoot import SpiderFootDb, SpiderFootDbWriter, SpiderFootEvent, SpiderFootHttpCache, SpiderFootPackedEventQueue, SpiderFootRateLimiter, SpiderFootSessionPool
+
+        # the scan process takes care of interruptions
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        events = dict()
+        mod = None
+        writer = None
+        sessionPool = None
+        httpCache = None
+
+        try:
+            dbh = SpiderFootDb(sfOpts)
+            if sfOpts.get('_dbbatchsize'):
+                writer = SpiderFootDbWriter(sfOpts, int(sfOpts['_dbbatchsize']), logSample=int(sfOpts.get('_logsample') or 0))
+                dbh.setWriter(writer)
+            sf = SpiderFoot(sfOpts)
+            sf.dbh = dbh
+            sf.scanId = scanId
+            sf.socksProxy = socksProxy
+            if sfOpts.get('_httpmaxperhost'):
+                sessionPool = SpiderFootSessionPool(int(sfOpts['_httpmaxperhost']), float(sfOpts.get('_httpidletimeout') or 60))
+                sf.sessionPool = sessionPool
+            httpCacheModules = SpiderFootHttpCache.parseTtls(sfOpts.get('_httpcachemodules'))
+            if sfOpts.get('_httpcache') or any(httpCacheModules.values()):
+                httpCache = SpiderFootHttpCache(
+                    os.path.join(sf.cachePath(), "http"),
+                    float(sfOpts.get('_httpcache') or 0),
+                    int(sfOpts.get('_httpcachesize') or 500) * 1024 * 1024,
+                    httpCacheModules
+                )
+                sf.httpCache = httpCache
+
+            module = __import__('modules.' + modName, globals(), locals(), [modName])
+            sf.component = module.__name__
+            mod = getattr(module, modName)()
+            mod.__name__ = modName
+            mod.clearListeners()
+            mod.setup(sf, modOpts)
+            for host, limits in mod.rateLimits().items():
+                SpiderFootRateLimiter.forHost(host, **limits)
+            mod.setDbh(dbh)
+            mod.setScanId(scanId)
+            mod.setTarget(target)
+
+            if sfOpts.get('_socks1type'):
+                import socket
+                mod._updateSocket(socket)
+
+            if outputFilter:
+                mod.setOutputFilter(outputFilter)
+
+            if blobStore is not None:
+                mod.setBlobStore(blobStore)
+
+            mod.incomingEventQueue = eventQueue
+            mod.outgoingEventQueue = SpiderFootPackedEventQueue(resultQueue, events)
         except Exception as e:
-            import traceback
-            self.log.error(f"Exception ({e.__class__.__name__}) in module {self.__name__}."
-                           + traceback.format_exc())
-            self.errorState = True
-        finally:
-            self.running = False
+            resultQueue.put(("error", f"Exception ({e.__class__.__name__}) setting up module {modName} in worker process."
+                             + traceback.format_exc()))
+            mod = None
+
+        while True:
+            try:
+                packed = eventQueue.get(timeout=5)
+            except queue.Empty:
+                # the scan process is gone
+                if os.getppid() != parentPid:
+                    return
+                continue
+
+            if packed is None:
+                break
+
+            try:
+                for p in packed:
+                    sfEvent = SpiderFootEvent.unpack(p, events)
+                    sfEvent.freeze()
+                    events[sfEvent.hash] = sfEvent
+
+                if mod is None or mod.errorState:
+                    continue
+
+                if stopEvent.is_set():
+                    mod._stopScanning = True
+                    continue
+
+                mod.handleEvent(sfEvent)
+            except Exception as e:
+                resultQueue.put(("error", f"Exception ({e.__class__.__name__}) in module {modName}."
+                                 + traceback.format_exc()))
+                if mod is not None:
+                    mod.errorState = True
+            finally:
+                resultQueue.put(("done",))
+
+        if sessionPool is not None:
+            sessionPool.close()
+
+        if httpCache is not None:
+            stats = httpCache.stats()
+            if stats['hits'] or stats['revalidated'] or stats['misses']:
+                sf.info(f"HTTP cache: {stats['hits']:,} responses reused, {stats['revalidated']:,} revalidated, {stats['misses']:,} requests sent")
+
+        stats = dict()
+        if writer is not None:
+            writer.close()
+            stats = writer.stats()
+        resultQueue.put(("exit", stats))
+
+    def threadWorker(self):
+        """Process events from incomingEventQueue until the scanner sends
+        the shutdown sentinel (None). The scanner sends one sentinel for each
+        of the module's threads.
+
+        Every event taken off the queue is marked done once handled, so the
+        queue's unfinished task count is the number of events this module
+        still has in flight. When that count drops to zero a wakeup (None)
+        is put on outgoingEventQueue so the scanner can re-check whether
+        the scan has finished.
+        """
+        # coroutine handlers get an event loop of their own in each thread
+        loop = None
+        if asyncio.iscoroutinefunction(self.handleEvent):
+            loop = asyncio.new_event_loop()
+
+        while True:
+            sfEvent = self.incomingEventQueue.get()
+            try:
+                if sfEvent is None:
+                    self.log.debug(f"{self.__name__}.threadWorker() got shutdown sentinel from incomingEventQueue.")
+                    if loop is not None:
+                        loop.close()
+                    return
+
+                # Keep draining the queue after a stop or a fatal error so
+                # the scanner's in-flight accounting still reaches zero.
+                if self.errorState or self.checkForStop():
+                    continue
+
+                self.log.debug(f"{self.__name__}.threadWorker() got event, {sfEvent.eventType}, from incomingEventQueue.")
+                with self.lock:
+                    self._runningThreads += 1
+                try:
+                    if loop is not None:
+                        loop.run_until_complete(self.handleEvent(sfEvent))
+                    else:
+                        self.handleEvent(sfEvent)
+                finally:
+                    with self.lock:
+                        self._runningThreads -= 1
+            except KeyboardInterrupt:
+                self.log.warning(f"Interrupted module {self.__name__}.")
+                self._stopScanning = True
+            except Exception as e:
+                import traceback
+                self.log.error(f"Exception ({e.__class__.__name__}) in module {self.__name__}."
+                               + traceback.format_exc())
+                self.errorState = True
+            finally:
+                self.incomingEventQueue.task_done()
+                if sfEvent is not None and not self.incomingEventQueue.unfinished_tasks:
+                    self.outgoingEventQueue.put(None)
+
+    async def asyncWorker(self):
+        """Async counterpart of threadWorker(), for the async scan mode.
+
+        Coroutine handlers are awaited on the event loop, while synchronous
+        handlers are run in the loop's thread pool. As with threadWorker(),
+        a wakeup (None) is put on outgoingEventQueue whenever the module has
+        no more events in flight.
+        """
+        loop = asyncio.get_running_loop()
+        isCoroutine = asyncio.iscoroutinefunction(self.handleEvent)
+
+        while True:
+            sfEvent = await self.incomingEventQueue.get()
+            try:
+                if sfEvent is None:
+                    self.log.debug(f"{self.__name__}.asyncWorker() got shutdown sentinel from incomingEventQueue.")
+                    return
+
+                # Keep draining the queue after a stop or a fatal error so
+                # the scanner's in-flight accounting still reaches zero.
+                if self.errorState or self.checkForStop():
+                    continue
+
+                self.log.debug(f"{self.__name__}.asyncWorker() got event, {sfEvent.eventType}, from incomingEventQueue.")
+                with self.lock:
+                    self._runningThreads += 1
+                try:
+                    if isCoroutine:
+                        await self.handleEvent(sfEvent)
+                    else:
+                        await loop.run_in_executor(None, self.handleEvent, sfEvent)
+                finally:
+                    with self.lock:
+                        self._runningThreads -= 1
+            except KeyboardInterrupt:
+                self.log.warning(f"Interrupted module {self.__name__}.")
+                self._stopScanning = True
+            except Exception as e:
+                import traceback
+                self.log.error(f"Exception ({e.__class__.__name__}) in module {self.__name__}."
+                               + traceback.format_exc())
+                self.errorState = True
+            finally:
+                if sfEvent is not None:
+                    self.incomingEventQueue.task_done()
+                    if not self.eventsInFlight():
+                        self.outgoingEventQueue.put(None)
 
 # end of SpiderFootPlugin class
@@ -0,0 +1,248 @@
+import contextlib
+import random
+import threading
+import time
+import urllib.parse
+
+import requests
+
+
+class SpiderFootRateLimiter():
+    """Token bucket limiting the rate of requests to a host.
+
+    Up to burst requests are let through at once, after which requests are
+    let through at rate requests per second, in the order they came. A
+    request held back also waits a random time of up to jitter seconds, so
+    that throttled requests don't come at a fixed pace. Requests are only
+    held back when the bucket is empty, so a host queried now and then is
+    never waited on.
+
+    Limiters are shared by host across the process (see forHost()), so
+    that the modules querying the same API, and concurrent scans, share
+    its limit. Requests sent by fetchUrl() and httpSession() wait for the
+    limiter of their host (see SpiderFootRateLimitedAdapter).
+
+    Attributes:
+        rate (float): requests let through per second
+        burst (int): requests let through at once
+        jitter (float): most seconds of random delay added to held back requests
+        requests (int): number of requests let through
+        throttled (int): number of requests held back
+        waited (float): seconds requests were held back, in total
+    """
+
+    # limiters, by host name
+    _limiters = dict()
+    _limitersLock = threading.Lock()
+
+    def __init__(self, rate, burst=1, jitter=0):
+        """Initialize the limiter, with a full bucket.
+
+        Args:
+            rate (float): requests let through per second
+            burst (int): requests let through at once
+            jitter (float): most seconds of random delay added to held back requests
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        self._lock = threading.Lock()
+        self.setLimits(rate, burst, jitter)
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def setLimits(self, rate, burst=1, jitter=0):
+        """Change the limits. Requests already let through still count
+        against the new limits.
+
+        Args:
+            rate (float): requests let through per second
+            burst (int): requests let through at once
+            jitter (float): most seconds of random delay added to held back requests
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(rate, (int, float)):
+            raise TypeError(f"rate is {type(rate)}; expected float()")
+        if rate <= 0:
+            raise ValueError(f"rate value is {rate}; expected more than 0")
+        if not isinstance(burst, int):
+            raise TypeError(f"burst is {type(burst)}; expected int()")
+        if burst < 1:
+            raise ValueError(f"burst value is {burst}; expected 1 or more")
+        if not isinstance(jitter, (int, float)):
+            raise TypeError(f"jitter is {type(jitter)}; expected float()")
+        if jitter < 0:
+            raise ValueError(f"jitter value is {jitter}; expected 0 or more")
+
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+            self.jitter = jitter
+
+    @classmethod
+    def forHost(cls, host, rate, burst=1, jitter=0):
+        """Set the limits of the requests to a host. The limiter of the host
+        is shared by the whole process; if there is one already, its limits
+        are changed, so the scan started last sets them.
+
+        Args:
+            host (str): host name
+            rate (float): requests let through per second
+            burst (int): requests let through at once
+            jitter (float): most seconds of random delay added to held back requests
+
+        Returns:
+            SpiderFootRateLimiter: limiter of the host
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(host, str):
+            raise TypeError(f"host is {type(host)}; expected str()")
+        if not host:
+            raise ValueError("host is empty")
+
+        host = host.lower()
+
+        with cls._limitersLock:
+            limiter = cls._limiters.get(host)
+            if limiter is None:
+                limiter = cls._limiters[host] = cls(rate, burst, jitter)
+            else:
+                limiter.setLimits(rate, burst, jitter)
+
+        return limiter
+
+    @classmethod
+    def forUrl(cls, url):
+        """Limiter of the host a URL points to.
+
+        Args:
+            url (str): URL
+
+        Returns:
+            SpiderFootRateLimiter: limiter, or None if the host has none
+        """
+        if not cls._limiters:
+            return None
+
+        host = urllib.parse.urlparse(url).hostname
+        if not host:
+            return None
+
+        return cls._limiters.get(host.lower())
+
+    def acquire(self):
+        """Wait for the limiter to let a request through.
+
+        Returns:
+            float: seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # a request taking the last token reserves the next one, so that
+            # requests held back are let through in order
+            self._tokens -= 1
+            wait = 0.0
+            if self._tokens < 0:
+                wait = -self._tokens / self.rate
+                if self.jitter:
+                    wait += random.uniform(0, self.jitter)
+                self.throttled += 1
+                self.waited += wait
+            self.requests += 1
+
+        if wait:
+            time.sleep(wait)
+
+        return wait
+
+    def stats(self):
+        """Statistics of the limiter.
+
+        Returns:
+            dict: requests let through, requests held back, and seconds they
+                were held back in total
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'waited': self.waited
+            }
+
+# end of SpiderFootRateLimiter class
+
+
+class SpiderFootRateLimitedAdapter(requests.adapters.HTTPAdapter):
+    """Transport adapter holding back requests to hosts with a rate limiter
+    (see SpiderFootRateLimiter.forHost()).
+
+    It is mounted on the sessions fetchUrl() and httpSession() use, so
+    that limits apply to every request sent, redirects included, but not
+    to responses from the HTTP cache. fetchUrl() waits for the limiter
+    before it takes a session from the session pool (see admit()), so that
+    a throttled request doesn't keep the session from other threads while
+    it waits, and the adapter then only holds back the redirects.
+    """
+
+    # requests already let through, by thread
+    _admitted = threading.local()
+
+    @classmethod
+    def mount(cls, session):
+        """Mount the adapter on a session, for HTTP and HTTPS URLs.
+
+        Args:
+            session (requests.Session): session
+
+        Returns:
+            requests.Session: session
+        """
+        session.mount("http://", cls())
+        session.mount("https://", cls())
+        return session
+
+    @classmethod
+    @contextlib.contextmanager
+    def admit(cls, url):
+        """Wait for the limiter of the host of a URL, if any, before taking a
+        session to request it with. The first request the thread then sends
+        within the block isn't held back again, while the redirects it
+        follows are.
+
+        Args:
+            url (str): URL about to be requested
+
+        Yields:
+            float: seconds waited
+        """
+        limiter = SpiderFootRateLimiter.forUrl(url)
+        waited = limiter.acquire() if limiter is not None else 0.0
+        cls._admitted.request = limiter is not None
+        try:
+            yield waited
+        finally:
+            cls._admitted.request = False
+
+    def send(self, request, **kwargs):
+        if getattr(self._admitted, 'request', False):
+            self._admitted.request = False
+        else:
+            limiter = SpiderFootRateLimiter.forUrl(request.url)
+            if limiter is not None:
+                limiter.acquire()
+        return super().send(request, **kwargs)
+
+# end of SpiderFootRateLimitedAdapter class
@@ -0,0 +1,219 @@
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+
+import requests
+
+from .ratelimit import SpiderFootRateLimitedAdapter
+
+
+class SpiderFootSessionPool():
+    """Pool of keep-alive HTTP sessions, shared by the threads of a scan.
+
+    Sessions are pooled by scheme, host and proxy, so that requests to the
+    same host reuse an open connection instead of paying for a new TCP and
+    TLS handshake each time. A session is only used by one thread at a
+    time, and at most maxPerHost sessions are open for the same host; past
+    that, threads wait for a session to be released. Sessions left unused
+    for idleTimeout seconds are closed.
+
+    Cookies are cleared when a session is released, so that requests never
+    see the cookies of an unrelated earlier request.
+
+    Attributes:
+        maxPerHost (int): most sessions open at once for the same host
+        idleTimeout (float): seconds after which an unused session is closed
+        created (int): number of sessions created
+        reused (int): number of times a session was reused
+        evicted (int): number of sessions closed after being left unused
+    """
+
+    # seconds between checks for sessions left unused
+    sweepInterval = 5
+
+    def __init__(self, maxPerHost=8, idleTimeout=60):
+        """Initialize the session pool.
+
+        Args:
+            maxPerHost (int): most sessions open at once for the same host
+            idleTimeout (float): seconds after which an unused session is closed
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
+        if not isinstance(maxPerHost, int):
+            raise TypeError(f"maxPerHost is {type(maxPerHost)}; expected int()")
+        if maxPerHost < 1:
+            raise ValueError(f"maxPerHost value is {maxPerHost}; expected 1 or more")
+        if not isinstance(idleTimeout, (int, float)):
+            raise TypeError(f"idleTimeout is {type(idleTimeout)}; expected float()")
+        if idleTimeout <= 0:
+            raise ValueError(f"idleTimeout value is {idleTimeout}; expected more than 0")
+
+        self.maxPerHost = maxPerHost
+        self.idleTimeout = idleTimeout
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.closed = False
+        self._cond = threading.Condition()
+        # unused sessions for each key, most recently used last
+        self._idle = dict()
+        # sessions open for each key, used or not
+        self._open = dict()
+        # key of each session handed out, by id(); None for overflow sessions
+        self._inUse = dict()
+        self._lastSweep = time.monotonic()
+
+    @staticmethod
+    def poolKey(url, proxy=None):
+        """Key of the sessions a URL can be fetched with.
+
+        Args:
+            url (str): URL
+            proxy (str): proxy URL, if any
+
+        Returns:
+            tuple: scheme, host (with port) and proxy
+        """
+        parsed = urllib.parse.urlparse(url)
+        return (parsed.scheme.lower(), parsed.netloc.lower(), proxy)
+
+    def acquire(self, url, proxy=None, timeout=None):
+        """Take a session to fetch a URL with, waiting if all the sessions
+        for its host are in use.
+
+        Args:
+            url (str): URL
+            proxy (str): proxy URL, if any
+            timeout (float): seconds to wait for a session to be released,
+                after which a session outside the pool is used, or None to
+                wait for as long as it takes
+
+        Returns:
+            requests.Session: session, to be given back with release()
+        """
+        key = self.poolKey(url, proxy)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            self._sweep()
+
+            while not self.closed:
+                idle = self._idle.get(key)
+                if idle:
+                    session, lastUsed = idle.pop()
+                    self._inUse[id(session)] = key
+                    self.reused += 1
+                    return session
+
+                if self._open.get(key, 0) < self.maxPerHost:
+                    self._open[key] = self._open.get(key, 0) + 1
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    key = None
+                    break
+                self._cond.wait(remaining)
+            else:
+                key = None
+
+            self.created += 1
+
+        session = SpiderFootRateLimitedAdapter.mount(requests.Session())
+        if proxy:
+            session.proxies = {
+                'http': proxy,
+                'https': proxy,
+            }
+
+        with self._cond:
+            self._inUse[id(session)] = key
+
+        return session
+
+    def release(self, session):
+        """Give back a session taken with acquire().
+
+        Args:
+            session (requests.Session): session
+        """
+        with self._cond:
+            key = self._inUse.pop(id(session), None)
+
+            if key is None or self.closed:
+                session.close()
+            else:
+                session.cookies.clear()
+                self._idle.setdefault(key, list()).append((session, time.monotonic()))
+
+            self._cond.notify_all()
+
+    @contextmanager
+    def session(self, url, proxy=None, timeout=None):
+        """Session to fetch a URL with, given back when the block exits.
+
+        Args:
+            url (str): URL
+            proxy (str): proxy URL, if any
+            timeout (float): seconds to wait for a session, see acquire()
+
+        Yields:
+            requests.Session: session
+        """
+        session = self.acquire(url, proxy, timeout)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def _sweep(self):
+        """Close the sessions left unused for longer than idleTimeout. The
+        caller holds the lock."""
+        now = time.monotonic()
+        if now - self._lastSweep < self.sweepInterval:
+            return
+        self._lastSweep = now
+
+        for key in list(self._idle):
+            idle = self._idle[key]
+            # sessions are appended as they are released, so the oldest come first
+            while idle and now - idle[0][1] > self.idleTimeout:
+                session, lastUsed = idle.pop(0)
+                session.close()
+                self._open[key] -= 1
+                self.evicted += 1
+            if not idle:
+                del self._idle[key]
+
+    def stats(self):
+        """Statistics of the session pool.
+
+        Returns:
+            dict: sessions created, reused, closed after being left unused,
+                and currently open
+        """
+        with self._cond:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'evicted': self.evicted,
+                'open': sum(self._open.values())
+            }
+
+    def close(self):
+        """Close every unused session. Sessions in use are closed when
+        released, and no session is pooled from here on."""
+        with self._cond:
+            self.closed = True
+            for idle in self._idle.values():
+                for session, lastUsed in idle:
+                    session.close()
+            self._idle = dict()
+            self._open = dict()
+            self._cond.notify_all()
+
+# end of SpiderFootSessionPool class
@@ -0,0 +1,53 @@
+"""Benchmark SpiderFootEvent construction, hashing and memory use.
+
+Builds events under a ROOT event, then reads each event's hash twice: the
+first read computes it, the second should come from the cache. Memory is
+measured per event with tracemalloc, once the hashes are computed.
+
+Usage:
+    python tools/benchmark/bench_event.py [-n COUNT] [--baseline REV]
+"""
+
+import gc
+import time
+import tracemalloc
+
+from benchutil import run
+
+
+def bench(args):
+    from spiderfoot import SpiderFootEvent
+
+    root = SpiderFootEvent("ROOT", "example.com", "", None)
+
+    gc.collect()
+    start = time.perf_counter()
+    events = [SpiderFootEvent("INTERNET_NAME", "host.example.com", "sfp_test", root) for i in range(args.count)]
+    construct = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for event in events:
+        event.hash
+    firstHash = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for event in events:
+        event.hash
+    repeatHash = time.perf_counter() - start
+
+    del events
+    gc.collect()
+
+    sample = min(args.count, 100000)
+    tracemalloc.start()
+    events = [SpiderFootEvent("INTERNET_NAME", "host.example.com", "sfp_test", root) for i in range(sample)]
+    for event in events:
+        event.hash
+    size = tracemalloc.get_traced_memory()[0] / sample
+    tracemalloc.stop()
+
+    print(f"{args.count:,} events: construct {construct:.2f}s, first hash {firstHash:.2f}s, repeat hash {repeatHash:.2f}s, {size:.0f} bytes/event")
+
+
+if __name__ == "__main__":
+    run("SpiderFootEvent construction, hashing and memory use", 1000000, bench)
@@ -0,0 +1,48 @@
+"""Benchmark the cost of finding the component SpiderFoot.info() logs for.
+
+Calls info() from a module several frames deep, as a module's
+handleEvent() would, without a database handle and with Python logging
+disabled, so that only the lookup of the calling module is measured:
+once with the frame walk used when no component is bound, and once with
+a bound component (SpiderFoot.component), where the tree supports it.
+
+Usage:
+    python tools/benchmark/bench_logcomponent.py [-n COUNT] [--baseline REV]
+"""
+
+import logging
+import time
+
+from benchutil import run
+
+
+def bench(args):
+    from sflib import SpiderFoot
+
+    logging.disable(logging.CRITICAL)
+
+    def handleEvent(sf, count):
+        for i in range(count):
+            sf.info("Found something")
+
+    def nested(sf, count, depth=10):
+        if depth:
+            return nested(sf, count, depth - 1)
+        return handleEvent(sf, count)
+
+    sf = SpiderFoot({'__logging': True, '_debug': False})
+    start = time.perf_counter()
+    nested(sf, args.count)
+    print(f"unbound (calling module looked up): {(time.perf_counter() - start) / args.count * 1e6:.2f} us/call")
+
+    if not hasattr(SpiderFoot, 'component'):
+        return
+
+    sf.component = "modules.sfp_test"
+    start = time.perf_counter()
+    nested(sf, args.count)
+    print(f"bound component: {(time.perf_counter() - start) / args.count * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    run("Cost of finding the component SpiderFoot.info() logs for", 20000, bench)
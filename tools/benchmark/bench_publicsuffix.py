@@ -0,0 +1,43 @@
+"""Benchmark hostname lookups against the public suffix list.
+
+Runs SpiderFoot.hostDomain(), validHost() and isDomain() on a fixed mix
+of hostnames (known and unknown TLDs, multi-label suffixes, bare
+suffixes) against the public suffix list bundled with publicsuffixlist,
+given as a list of lines as module options hold it. Trees which parse
+the list on every call are stopped after a few seconds.
+
+Usage:
+    python tools/benchmark/bench_publicsuffix.py [-n COUNT] [--baseline REV]
+"""
+
+import random
+import time
+
+import publicsuffixlist
+
+from benchutil import rate, run
+
+
+def bench(args):
+    from sflib import SpiderFoot
+
+    with open(publicsuffixlist.PSLFILE, "r", encoding="utf-8") as f:
+        tldList = f.read().splitlines()
+
+    sf = SpiderFoot({'__logging': False, '_debug': False})
+
+    suffixes = ['example.com', 'foo.co.uk', 'bar.github.io', 'x.unknowntld', 'baz.com.au', 'a.b.c.jp', 'co.uk', 'localhost', 'bad_host.com']
+    rnd = random.Random(1)
+    hosts = [f"h{i}.{rnd.choice(suffixes)}" for i in range(args.count)]
+
+    start = time.perf_counter()
+    sf.hostDomain("example.com", tldList)
+    print(f"first call: {time.perf_counter() - start:.3f}s")
+
+    for func in (sf.hostDomain, sf.validHost, sf.isDomain):
+        perSecond, calls = rate(lambda host: func(host, tldList), hosts, limit=5.0)
+        print(f"{func.__name__}: {perSecond:,.0f} lookups/s ({calls:,} lookups)")
+
+
+if __name__ == "__main__":
+    run("Hostname lookups against the public suffix list", 2000, bench)
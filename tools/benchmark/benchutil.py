@@ -0,0 +1,85 @@
+"""Helpers shared by the benchmark scripts.
+
+Every benchmark measures the SpiderFoot tree it is given with --tree (by
+default, the tree it belongs to). With --baseline REV, it runs once on a
+copy of the tree at git revision REV, such as the revision before a
+change, and once on the working tree, so that the two can be compared.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parseArgs(description, count):
+    """Parse the command line of a benchmark.
+
+    Args:
+        description (str): what the benchmark measures
+        count (int): default number of iterations
+
+    Returns:
+        argparse.Namespace: tree, baseline and count
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--tree", default=repoRoot, help="SpiderFoot tree to measure")
+    parser.add_argument("--baseline", metavar="REV", help="also measure the tree at this git revision")
+    parser.add_argument("-n", "--count", type=int, default=count, help=f"number of iterations (default: {count})")
+    return parser.parse_args()
+
+
+def run(description, count, bench):
+    """Run a benchmark on the tree given on the command line, or on the
+    baseline revision and then the working tree.
+
+    Args:
+        description (str): what the benchmark measures
+        count (int): default number of iterations
+        bench (function): benchmark, given the parsed arguments once the
+            tree is importable
+    """
+    args = parseArgs(description, count)
+
+    if not args.baseline:
+        sys.path.insert(0, os.path.abspath(args.tree))
+        os.chdir(args.tree)
+        bench(args)
+        return
+
+    tmpDir = tempfile.mkdtemp(prefix="spiderfoot-bench-")
+    try:
+        archive = subprocess.run(["git", "-C", repoRoot, "archive", args.baseline], check=True, stdout=subprocess.PIPE).stdout
+        subprocess.run(["tar", "-x", "-C", tmpDir], input=archive, check=True)
+        for label, tree in ((f"baseline ({args.baseline})", tmpDir), ("working tree", repoRoot)):
+            print(f"== {label}", flush=True)
+            subprocess.run([sys.executable, sys.argv[0], "--tree", tree, "-n", str(args.count)], check=True)
+    finally:
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+
+def rate(func, items, limit=10.0):
+    """Call a function on items until they run out or a time limit is
+    reached, so that slow implementations can be measured too.
+
+    Args:
+        func (function): function, given one item
+        items (list): items
+        limit (float): seconds after which to stop
+
+    Returns:
+        tuple: calls per second, and number of calls made
+    """
+    start = time.perf_counter()
+    calls = 0
+    for item in items:
+        func(item)
+        calls += 1
+        if not calls % 100 and time.perf_counter() - start > limit:
+            break
+    return calls / (time.perf_counter() - start), calls